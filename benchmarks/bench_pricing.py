@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Offline throughput and memory benchmark of the pricing pipeline.
+
+get_products responses are served by botocore's Stubber, either synthetic
+pages or pages recorded from the API, so no credentials or network are needed.
+Each case reports the best wall time of several runs, products per second and
+the tracemalloc peak of a separate run.
+
+    python benchmarks/bench_pricing.py --sizes 1000 10000 --output bench_pricing.json
+    python benchmarks/bench_pricing.py --replay recorded_pages.json
+"""
+import argparse
+import functools
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from itertools import cycle, islice
+from typing import Any, Callable, Dict, Iterable, List, Sequence
+
+from botocore.stub import Stubber
+
+
+# Dummy credentials and region, the stubbed client never sends a request
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from boto_remora.aws import Pricing  # noqa: E402 pylint: disable=wrong-import-position
+from boto_remora.pricing import Offers  # noqa: E402 pylint: disable=wrong-import-position
+
+
+PAGE_SIZE = 100
+REGION = "us-east-1"
+LOCATION = "US East (N. Virginia)"
+INSTANCE_TYPE = "m5.large"
+OPERATING_SYSTEMS = ("Linux", "Windows", "RHEL", "SUSE")
+TENANCIES = ("Shared", "Dedicated", "Host")
+CAPACITY_STATUSES = ("Used", "UnusedCapacityReservation", "AllocatedCapacityReservation")
+
+
+def _term(sku: str, code: str, price: str, attributes: Dict[str, str]) -> Dict[str, Any]:
+    rate_code = f"{sku}.{code}.6YS6EN2CT7"
+    return {
+        f"{sku}.{code}": {
+            "offerTermCode": code,
+            "sku": sku,
+            "effectiveDate": "2020-04-01T00:00:00Z",
+            "termAttributes": attributes,
+            "priceDimensions": {
+                rate_code: {
+                    "rateCode": rate_code,
+                    "unit": "Hrs",
+                    "description": f"{price} USD per hour",
+                    "pricePerUnit": {"USD": price},
+                    "beginRange": "0",
+                    "endRange": "Inf",
+                    "appliesTo": [],
+                }
+            },
+        }
+    }
+
+
+def synthetic_product(number: int) -> str:
+    """ get_products PriceList entry of a synthetic EC2 instance offer """
+    sku = f"SKU{number:012d}"
+    reserved = {
+        "LeaseContractLength": "1yr",
+        "OfferingClass": "standard",
+        "PurchaseOption": "No Upfront",
+    }
+    return json.dumps(
+        {
+            "product": {
+                "sku": sku,
+                "productFamily": "Compute Instance",
+                "attributes": {
+                    "location": LOCATION,
+                    "regionCode": REGION,
+                    "instanceType": INSTANCE_TYPE,
+                    "operatingSystem": OPERATING_SYSTEMS[number % len(OPERATING_SYSTEMS)],
+                    "tenancy": TENANCIES[number // 4 % len(TENANCIES)],
+                    "capacitystatus": CAPACITY_STATUSES[number // 12 % len(CAPACITY_STATUSES)],
+                    "preInstalledSw": "NA",
+                    "licenseModel": "No License required",
+                    "vcpu": "2",
+                    "memory": "8 GiB",
+                    "usagetype": f"BoxUsage:{INSTANCE_TYPE}",
+                    "operation": f"RunInstances:{number:04d}",
+                },
+            },
+            "serviceCode": "AmazonEC2",
+            "version": "20200401000000",
+            "publicationDate": "2020-04-01T00:00:00Z",
+            "terms": {
+                "OnDemand": _term(sku, "JRTCKXETXF", f"{0.05 + number % 97 / 100:.4f}", dict()),
+                "Reserved": _term(sku, "4NA7Y494T4", f"{0.03 + number % 89 / 100:.4f}", reserved),
+            },
+        }
+    )
+
+
+def synthetic_pages(products: int) -> List[Dict[str, Any]]:
+    """ get_products responses holding products synthetic offers """
+    pages = list()
+    for start in range(0, products, PAGE_SIZE):
+        stop = min(start + PAGE_SIZE, products)
+        page = {
+            "FormatVersion": "aws_v1",
+            "PriceList": [synthetic_product(num_) for num_ in range(start, stop)],
+            "ResponseMetadata": {"RequestId": f"page-{start}", "HTTPStatusCode": 200},
+        }
+        if stop < products:
+            page["NextToken"] = str(stop)
+        pages.append(page)
+    return pages
+
+
+def replayed_pages(recorded: Sequence[Dict[str, Any]], products: int) -> List[Dict[str, Any]]:
+    """ Recorded get_products responses cycled and re-chained up to products offers """
+    price_list = list(
+        islice(cycle(item_ for page_ in recorded for item_ in page_["PriceList"]), products)
+    )
+    pages = list()
+    for start in range(0, products, PAGE_SIZE):
+        page = {
+            "FormatVersion": "aws_v1",
+            "PriceList": price_list[start : start + PAGE_SIZE],
+            "ResponseMetadata": {"RequestId": f"page-{start}", "HTTPStatusCode": 200},
+        }
+        if start + PAGE_SIZE < products:
+            page["NextToken"] = str(start + PAGE_SIZE)
+        pages.append(page)
+    return pages
+
+
+def stubbed_pricing(pages: Sequence[Dict[str, Any]]) -> Pricing:
+    """ Pricing whose client serves pages once, without region lookups or pacing """
+    pricing = Pricing(pool=None, rate_limiter=None)
+    # Skip the Ssm region lookup, the stub serves every region
+    pricing._region_map = {REGION: LOCATION}  # pylint: disable=protected-access
+    stubber = Stubber(pricing.client)
+    for page in pages:
+        stubber.add_response("get_products", page)
+    stubber.activate()
+    return pricing
+
+
+def loaded_offers(pages: Sequence[Dict[str, Any]]) -> Offers:
+    """ Offers with every page stored as the REGION.INSTANCE_TYPE partition """
+    offers = Offers("EC2", aws_pricing=stubbed_pricing(pages))
+    offers.get(REGION, INSTANCE_TYPE)
+    return offers
+
+
+def setup_get_price_list(pages: Sequence[Dict[str, Any]]) -> Callable[[], Any]:
+    """ Pricing.get_price_list over all pages, decoding every item """
+    pricing = stubbed_pricing(pages)
+    return lambda: pricing.get_price_list(
+        "AmazonEC2", region=REGION, filter_kv={"instanceType": INSTANCE_TYPE}
+    )
+
+
+def setup_iter_price_list_items(pages: Sequence[Dict[str, Any]]) -> Callable[[], Any]:
+    """ Pricing.iter_price_list_items over all pages, decoding no item """
+    pricing = stubbed_pricing(pages)
+    return lambda: list(
+        pricing.iter_price_list_items(
+            "AmazonEC2", region=REGION, filter_kv={"instanceType": INSTANCE_TYPE}
+        )
+    )
+
+
+def setup_get(pages: Sequence[Dict[str, Any]]) -> Callable[[], Any]:
+    """ Offers.get of a cold partition """
+    offers = Offers("EC2", aws_pricing=stubbed_pricing(pages))
+    return lambda: offers.get(REGION, INSTANCE_TYPE)
+
+
+def setup_iter_offers(pages: Sequence[Dict[str, Any]]) -> Callable[[], Any]:
+    """ Offers.iter_offers, decoding pages and creating offers without caching them """
+    offers = Offers("EC2", aws_pricing=stubbed_pricing(pages))
+    return lambda: list(offers.iter_offers(region=REGION, key=INSTANCE_TYPE))
+
+
+def setup_filter_cached(pages: Sequence[Dict[str, Any]]) -> Callable[[], Any]:
+    """ filter_cached across all cached partitions """
+    offers = loaded_offers(pages)
+    return lambda: offers.filter_cached({"operatingSystem": "Linux", "tenancy": "Shared"})
+
+
+def setup_get_ece2filtered(pages: Sequence[Dict[str, Any]]) -> Callable[[], Any]:
+    """ get_ece2filtered of the loaded partition """
+    offers = loaded_offers(pages)
+    return lambda: offers.get_ece2filtered(REGION, INSTANCE_TYPE)
+
+
+def setup_flatten(pages: Sequence[Dict[str, Any]]) -> Callable[[], Any]:
+    """ _flatten of the cache """
+    offers = loaded_offers(pages)
+    return lambda: offers._flatten(offers._data)  # pylint: disable=protected-access
+
+
+# name: setup receiving the pages and returning the callable to measure
+CASES: Dict[str, Callable[[Sequence[Dict[str, Any]]], Callable[[], Any]]] = {
+    "Pricing.get_price_list": setup_get_price_list,
+    "Pricing.iter_price_list_items": setup_iter_price_list_items,
+    "Offers.iter_offers": setup_iter_offers,
+    "Offers.get": setup_get,
+    "Offers.filter_cached": setup_filter_cached,
+    "Offers.get_ece2filtered": setup_get_ece2filtered,
+    "Offers._flatten": setup_flatten,
+}
+
+
+def measure(setup: Callable[[], Callable[[], Any]], runs: int) -> Dict[str, float]:
+    """ Best seconds over runs and tracemalloc peak bytes of one more run """
+    timings = list()
+    for _ in range(runs):
+        func = setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    func = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": min(timings), "peak_bytes": peak}
+
+
+def run(sizes: Iterable[int], runs: int, cases: Sequence[str], recorded=None) -> List[Dict]:
+    """ Measure cases for each number of products """
+    results = list()
+    for products in sizes:
+        pages = replayed_pages(recorded, products) if recorded else synthetic_pages(products)
+        for name in cases:
+            result = measure(functools.partial(CASES[name], pages), runs)
+            result.update(case=name, products=products)
+            result["per_second"] = products / result["seconds"] if result["seconds"] else 0.0
+            results.append(result)
+            print(
+                f"{name:<42} {products:>7} products {result['seconds'] * 1000:10.1f} ms "
+                f"{result['per_second']:>12,.0f}/s {result['peak_bytes'] / 2 ** 20:8.1f} MiB"
+            )
+    return results
+
+
+def main():
+    """ Run benchmarks """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument(
+        "--replay", help="JSON file with a list of recorded get_products responses to serve"
+    )
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    recorded = None
+    if args.replay:
+        with open(args.replay) as fid:
+            recorded = json.load(fid)
+
+    results = run(args.sizes, args.runs, args.cases, recorded)
+
+    if args.output:
+        from boto_remora import __version__  # pylint: disable=import-outside-toplevel
+
+        with open(args.output, "w") as fid:
+            json.dump(
+                {
+                    "boto_remora": __version__,
+                    "python": sys.version,
+                    "platform": platform.platform(),
+                    "source": args.replay or "synthetic",
+                    "results": results,
+                },
+                fid,
+                indent=2,
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Import time benchmark and guard for boto_remora.
+
+Each snippet runs in a fresh interpreter. The script exits non zero when the
+median wall time exceeds its budget or when importing created boto3 sessions.
+
+    python benchmarks/import_time.py --runs 10 --output import_time.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+CHECK_NO_SESSIONS = """
+import gc, sys
+sessions = [
+    obj_ for obj_ in gc.get_objects()
+    if type(obj_).__module__ in ("boto3.session", "botocore.session")
+]
+assert not sessions, f"Import created sessions {sessions}"
+"""
+
+# name: (code, budget in seconds)
+SNIPPETS = {
+    "boto_remora": (
+        "import sys, boto_remora\nassert 'boto3' not in sys.modules, 'boto3 imported eagerly'",
+        0.25,
+    ),
+    "boto_remora.pricing": ("import boto_remora.pricing", 0.25),
+    "Offers": ("from boto_remora.pricing import Offers\nOffers('EC2')", 1.0),
+}
+
+
+def measure(code: str, runs: int) -> float:
+    """ Median seconds for a fresh interpreter to run code and its guards """
+    timings = list()
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", f"{code}\n{CHECK_NO_SESSIONS}"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    """ Run benchmarks """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    baseline = measure("pass", args.runs)
+    results = dict()
+    for name, (code, budget) in SNIPPETS.items():
+        elapsed = measure(code, args.runs) - baseline
+        results[name] = {"seconds": elapsed, "budget": budget, "ok": elapsed <= budget}
+        print(f"{name:<24} {elapsed * 1000:8.1f} ms (budget {budget * 1000:.0f} ms)")
+
+    if args.output:
+        with open(args.output, "w") as fid:
+            json.dump({"python": sys.version, "results": results}, fid, indent=2)
+
+    return 0 if all(res_["ok"] for res_ in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
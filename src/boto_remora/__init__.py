@@ -1,15 +1,7 @@
 """ c7n Broom top level """
 import logging
 
-import pkg_resources
-
-from . import aws, pricing
-
-
-try:
-    __version__ = pkg_resources.get_distribution(__name__).version
-except pkg_resources.DistributionNotFound:
-    __version__ = ""
+from .util import lazy_attributes
 
 
 logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -17,3 +9,20 @@ logging.getLogger("botocore").setLevel(logging.INFO)
 logging.getLogger("urllib3").setLevel(logging.INFO)
 
 __all__ = ["aws", "pricing"]
+
+_getattr = lazy_attributes(  # pylint: disable=invalid-name
+    __name__, {"aws": ".aws", "pricing": ".pricing"}
+)
+
+
+def __getattr__(name):
+    if name == "__version__":
+        try:
+            from importlib import metadata  # pylint: disable=import-outside-toplevel
+        except ImportError:  # Python < 3.8
+            import importlib_metadata as metadata  # pylint: disable=import-outside-toplevel
+        try:
+            return metadata.version(__name__)
+        except metadata.PackageNotFoundError:
+            return ""
+    return _getattr(name)
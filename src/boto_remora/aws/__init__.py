@@ -1,4 +1,32 @@
-""" boto_remora.aws package """
-from . import helper
-from .base import AwsBase, AwsBaseService
-from .main import Ec2, Pricing, Ssm, Sts
+""" boto_remora.aws package, submodules are imported on first access """
+from boto_remora.util import lazy_attributes
+
+
+__getattr__ = lazy_attributes(
+    __name__,
+    {
+        "helper": ".helper",
+        "AwsBase": ".base",
+        "AwsBaseService": ".base",
+        "ResponseCache": ".cache",
+        "ClientPool": ".pool",
+        "get_default_pool": ".pool",
+        "set_default_pool": ".pool",
+        "FanOut": ".fanout",
+        "FanOutResult": ".fanout",
+        "Target": ".fanout",
+        "Ec2": ".main",
+        "Pricing": ".main",
+        "Ssm": ".main",
+        "Sts": ".main",
+        "CallRecord": ".metrics",
+        "JsonLinesSink": ".metrics",
+        "LoggingSink": ".metrics",
+        "ServiceMetrics": ".metrics",
+        "metrics_for": ".metrics",
+        "PriceListItem": ".pricelist",
+        "AdaptiveRateLimiter": ".ratelimit",
+        "get_default_limiter": ".ratelimit",
+        "set_default_limiter": ".ratelimit",
+    },
+)
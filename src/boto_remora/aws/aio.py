@@ -0,0 +1,287 @@
+"""
+asyncio counterparts of boto_remora.aws.main objects
+
+Requires aiobotocore, install with ``pip install boto_remora[async]``.
+Clients are opened with ``async with`` and every request, including each
+page of a paginator, waits on a semaphore bounding concurrent calls.
+"""
+import asyncio
+import contextlib
+import dataclasses
+import logging
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional, Sequence
+
+import botocore.exceptions
+from aiobotocore.session import AioSession
+
+from boto_remora.util import json_loads
+
+from .main import (
+    _REGION_NAMES,
+    _REGION_PARAMETER_PATH,
+    Ssm,
+    _partition_of,
+    _region_long_names,
+    _term_match_filters,
+)
+from .pricelist import PriceListItem
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(eq=False)
+class AsyncAwsBaseService:  # pylint: disable=too-many-instance-attributes
+    """ Base class to call a service with an async botocore client """
+
+    profile_name: Optional[str] = None
+    region_name: Optional[str] = None
+    endpoint_url: Optional[str] = None
+    max_concurrency: int = 10
+    session: Optional[AioSession] = dataclasses.field(default=None, compare=False, repr=False)
+    service_name: str = ""
+    client: Optional[Any] = dataclasses.field(default=None, init=False, compare=False, repr=False)
+    _semaphore: Optional[asyncio.Semaphore] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+    _exit_stack: Optional[contextlib.AsyncExitStack] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        if not self.session:
+            self.session = AioSession(profile=self.profile_name)
+        if not self.region_name:
+            self.region_name = self.session.get_config_variable("region")
+
+    async def __aenter__(self):
+        self._exit_stack = contextlib.AsyncExitStack()
+        self.client = await self._exit_stack.enter_async_context(
+            self.session.create_client(
+                self.service_name, region_name=self.region_name, endpoint_url=self.endpoint_url
+            )
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._exit_stack.aclose()
+        self.client = None
+
+    async def _call(self, operation: str, **kwargs) -> Dict[str, Any]:
+        """ Call a client operation within the concurrency limit """
+        async with self._semaphore:
+            response = await getattr(self.client, operation)(**kwargs)
+        metadata = response["ResponseMetadata"]
+        _LOGGER.debug(
+            "Request %s status code %s", metadata.get("RequestId"), metadata["HTTPStatusCode"],
+        )
+        return response
+
+    async def _paginate(self, operation: str, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """ Pages of a paginated operation, each fetched within the concurrency limit """
+        pages = self.client.get_paginator(operation).paginate(**kwargs).__aiter__()
+        while True:
+            async with self._semaphore:
+                try:
+                    page = await pages.__anext__()
+                except StopAsyncIteration:
+                    return
+            yield page
+
+
+@dataclasses.dataclass(eq=False)
+class AsyncEc2(AsyncAwsBaseService):
+    """ async counterpart of Ec2 """
+
+    service_name: str = dataclasses.field(default="ec2", init=False)
+    _available_regions: Optional[FrozenSet[str]] = dataclasses.field(
+        default=None, init=False, repr=False
+    )
+
+    async def available_regions(self) -> FrozenSet[str]:
+        """ Regions enabled for the account """
+        if not self._available_regions:
+            response = await self._call("describe_regions")
+            self._available_regions = frozenset(
+                region_["RegionName"] for region_ in response["Regions"]
+            )
+        return self._available_regions
+
+
+@dataclasses.dataclass(eq=False)
+class AsyncSsm(AsyncAwsBaseService):
+    """
+    async counterpart of Ssm
+
+    Region names are shared with Ssm, so each partition is resolved once per
+    process whichever flavour asks first. Missing long names are fetched in
+    concurrent batches of get_parameters.
+    """
+
+    service_name: str = dataclasses.field(default="ssm", init=False)
+    parameter_batch_size: int = 10
+    all_partitions: bool = True
+
+    async def region_names(self) -> Dict[str, str]:
+        """ Dict of region short codes mapped to their long codes. """
+        memo_key = (_partition_of(self.session, self.region_name), self.all_partitions)
+        regions = _REGION_NAMES.get(memo_key)
+        if regions is None:
+            regions = _REGION_NAMES.setdefault(memo_key, await self._load_region_names(*memo_key))
+        return dict(regions)
+
+    async def _load_region_names(self, partition: str, all_partitions: bool) -> Dict[str, str]:
+        # pylint: disable=protected-access
+        regions = Ssm._get_region_from_boto(None if all_partitions else partition)
+        short_codes = [
+            param_["Value"]
+            async for page_ in self._paginate(
+                "get_parameters_by_path", Path=_REGION_PARAMETER_PATH
+            )
+            for param_ in page_["Parameters"]
+        ]
+        missing = [code_ for code_ in short_codes if code_ not in regions]
+        regions.update(await self._get_region_long_names(missing))
+        _LOGGER.debug("Resolved %s region names of partition %s", len(regions), partition)
+        return regions
+
+    async def _get_region_long_names(self, short_codes: Sequence[str]) -> Dict[str, str]:
+        """ Long names of regions fetched in concurrent batches of get_parameters """
+        responses = await asyncio.gather(
+            *(
+                self._call(
+                    "get_parameters",
+                    Names=[
+                        f"{_REGION_PARAMETER_PATH}/{code_}/longName"
+                        for code_ in short_codes[idx : idx + self.parameter_batch_size]
+                    ],
+                )
+                for idx in range(0, len(short_codes), self.parameter_batch_size)
+            )
+        )
+        long_names = dict()
+        for response in responses:
+            long_names.update(_region_long_names(response))
+        return long_names
+
+
+@dataclasses.dataclass(eq=False)
+class AsyncSts(AsyncAwsBaseService):
+    """ async counterpart of Sts """
+
+    service_name: str = dataclasses.field(default="sts", init=False)
+    _caller_identity: Dict[str, str] = dataclasses.field(default_factory=dict, init=False)
+
+    async def caller_identity(self) -> Dict[str, str]:
+        """ Cached get_caller_identity, empty if the region is not accessible """
+        if not self._caller_identity:
+            try:
+                self._caller_identity = await self._call("get_caller_identity")
+            except botocore.exceptions.ClientError as err:
+                _LOGGER.debug(
+                    "Profile %s could not reach region %s. Caught exception %s.%s",
+                    self.profile_name,
+                    self.region_name,
+                    type(err).__name__,
+                    err.response["Error"]["Code"],
+                )
+        return self._caller_identity
+
+    async def is_accessible(self) -> bool:
+        """ Checks if the session region is accessible. """
+        return bool(await self.caller_identity())
+
+
+@dataclasses.dataclass(eq=False)
+class AsyncPricing(AsyncAwsBaseService):
+    """
+    async counterpart of Pricing
+
+    Region names are looked up with AsyncSsm on the same endpoint_url, so a
+    single stub endpoint can serve both services.
+    """
+
+    service_name: str = dataclasses.field(default="pricing", init=False)
+    region_name: str = "us-east-1"
+    filter_keys: Sequence[str] = dataclasses.field(default_factory=lambda: ("Field", "Value"))
+    _region_map: Dict[str, str] = dataclasses.field(default_factory=dict, init=False, repr=False)
+    _services: Dict[str, Any] = dataclasses.field(default_factory=dict, init=False, repr=False)
+
+    async def services(self) -> Dict[str, List[str]]:
+        """ Maps service attributes by service code """
+        if not self._services:
+            async for page in self._paginate("describe_services"):
+                self._services.update(
+                    (item_["ServiceCode"], item_["AttributeNames"]) for item_ in page["Services"]
+                )
+        return self._services
+
+    async def region_names(self) -> Dict[str, str]:
+        """ Region short names to long names """
+        if not self._region_map:
+            async with AsyncSsm(
+                profile_name=self.profile_name,
+                region_name=self.region_name,
+                endpoint_url=self.endpoint_url,
+                max_concurrency=self.max_concurrency,
+                session=self.session,
+            ) as ssm:
+                self._region_map = await ssm.region_names()
+        return self._region_map
+
+    async def iter_price_list(
+        self,
+        servicecode: Optional[str] = None,
+        region: Optional[str] = None,
+        filter_kv: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """ Lazily fetch from price API, yielding decoded items one page at a time. """
+        async for raw in self._iter_raw_price_list(servicecode, region, filter_kv):
+            yield json_loads(raw)
+
+    async def iter_price_list_items(
+        self,
+        servicecode: Optional[str] = None,
+        region: Optional[str] = None,
+        filter_kv: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[PriceListItem]:
+        """ Like ``iter_price_list``, but items decode their JSON on first access """
+        async for raw in self._iter_raw_price_list(servicecode, region, filter_kv):
+            yield PriceListItem(raw)
+
+    async def _iter_raw_price_list(
+        self,
+        servicecode: Optional[str],
+        region: Optional[str],
+        filter_kv: Optional[Dict[str, str]],
+    ) -> AsyncIterator[str]:
+        """ JSON strings of the PriceList of get_products """
+        filter_kv = dict(filter_kv) if filter_kv else dict()
+        if region:
+            filter_kv["location"] = (await self.region_names())[region]
+        kwargs = {"ServiceCode": servicecode}
+        if filter_kv:
+            kwargs["Filters"] = _term_match_filters(filter_kv, self.filter_keys)
+        _LOGGER.debug("Price search %s with filter %s", servicecode, kwargs.get("Filters"))
+
+        response = {"NextToken": ""}
+        while "NextToken" in response:
+            response = await self._call("get_products", **kwargs)
+            for raw in response["PriceList"]:
+                yield raw
+            kwargs["NextToken"] = response.get("NextToken")
+
+    async def get_price_list(
+        self,
+        servicecode: Optional[str] = None,
+        region: Optional[str] = None,
+        filter_kv: Optional[Dict[str, str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """ Fetch from price API, see ``iter_price_list`` """
+        return [
+            item_
+            async for item_ in self.iter_price_list(
+                servicecode=servicecode, region=region, filter_kv=filter_kv
+            )
+        ]
@@ -11,6 +11,8 @@ from boto_remora.exception import (
 )
 
 from . import helper
+from .metrics import ServiceMetrics, metrics_for
+from .pool import ClientPool, get_default_pool
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -35,11 +37,17 @@ class AwsBase:
     session: Optional[boto3.session.Session] = dataclasses.field(
         default=None, compare=False, repr=False
     )
+    # Set to None to build a private session and client instead of sharing pooled ones.
+    pool: Optional[ClientPool] = dataclasses.field(
+        default_factory=get_default_pool, compare=False, repr=False
+    )
 
     def __post_init__(self):
         if not self.session:
-            self.session = boto3.Session(
-                region_name=self.region_name, profile_name=self.profile_name
+            self.session = (
+                self.pool.session(self.profile_name, self.region_name)
+                if self.pool is not None
+                else boto3.Session(region_name=self.region_name, profile_name=self.profile_name)
             )
         if not self.profile_name:
             self.profile_name = self.session.profile_name
@@ -75,14 +83,31 @@ class AwsBaseService(AwsBase):
             self.region_name = self.session.region_name
         if self.region_name not in self.session.get_available_regions(self.service_name):
             raise BotoRemoraInvalidServiceRegion(self.service_name, self.region_name)
-        self.client = self.session.client(self.service_name)
+        self.client = self.get_client()
+        metrics_for(self.client)
+
+    def get_client(self, region_name: Optional[str] = None, config=None):
+        """ Client of the service, shared through the pool when one is set """
+        if self.pool is not None:
+            return self.pool.client(
+                self.service_name,
+                region_name=region_name or self.region_name,
+                config=config,
+                session=self.session,
+            )
+        return self.session.client(self.service_name, region_name=region_name, config=config)
+
+    @property
+    def metrics(self) -> ServiceMetrics:
+        """ Call counts, latencies, retries, pages and response bytes by operation """
+        return metrics_for(self.client)
 
     @property
     def available_regions(self):
         """ Checks to which regions are enabled and accessible """
         if not self._available_regions:
             self._available_regions = helper.get_accessible_regions(
-                self.service_name, self.session
+                self.service_name, self.session, pool=self.pool
             )
 
         return self._available_regions
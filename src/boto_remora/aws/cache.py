@@ -0,0 +1,146 @@
+""" Persistent cache for AWS API responses """
+import dataclasses
+import json
+import logging
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Union
+
+
+_LOGGER = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL,
+    value TEXT NOT NULL
+)
+"""
+
+
+def default_cache_dir() -> pathlib.Path:
+    """ Directory for cache files, honoring XDG_CACHE_HOME """
+    base = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home().joinpath(".cache")
+    return pathlib.Path(base).joinpath("boto_remora")
+
+
+@dataclasses.dataclass()
+class ResponseCache:
+    """
+    SQLite backed cache of API responses with a TTL and size based eviction.
+
+    The database runs in WAL mode with a busy timeout, so one cache file can be
+    shared by several threads and processes. Each thread gets its own connection.
+    """
+
+    path: Optional[Union[str, pathlib.Path]] = None
+    ttl: Optional[float] = 24 * 60 * 60
+    max_bytes: Optional[int] = 512 * 2 ** 20
+    timeout: float = 30.0
+    _local: threading.local = dataclasses.field(
+        default_factory=threading.local, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        if self.path is None:
+            self.path = default_cache_dir().joinpath("responses.sqlite")
+        self.path = pathlib.Path(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection.execute(_SCHEMA)
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """ Connection of the current thread, reopened after a fork """
+        pid = os.getpid()
+        if getattr(self._local, "pid", None) != pid:
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = pid
+        return self._local.conn
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """ Stable key from JSON serializable parts """
+        return json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+
+    def get(self, key: str) -> Optional[Any]:
+        """ Cached value or None if missing or expired """
+        conn = self._connection
+        row = conn.execute(
+            "SELECT created, value FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if self.ttl is not None and now - row[0] > self.ttl:
+            conn.execute("DELETE FROM responses WHERE key = ? AND created = ?", (key, row[0]))
+            _LOGGER.debug("Cache entry %s expired", key)
+            return None
+        conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        _LOGGER.debug("Cache hit %s", key)
+        return json.loads(row[1])
+
+    def set(self, key: str, value: Any):
+        """
+        Store a JSON serializable value and evict the least recently used entries.
+
+        Values larger than max_bytes are not stored, an entry of the key is removed.
+        """
+        data = json.dumps(value, separators=(",", ":"))
+        conn = self._connection
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            _LOGGER.debug("Not caching %s, %s bytes exceed max_bytes", key, len(data))
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, now, now, len(data), data),
+            )
+            self._evict(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _evict(self, conn: sqlite3.Connection):
+        if self.ttl is not None:
+            conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        if self.max_bytes is None:
+            return
+        excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        excess -= self.max_bytes
+        if excess <= 0:
+            return
+        evict = list()
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            evict.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", evict)
+        _LOGGER.debug("Evicted %s cache entries", len(evict))
+
+    def delete(self, key: str):
+        """ Remove an entry """
+        self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self):
+        """ Remove all entries """
+        self._connection.execute("DELETE FROM responses")
+
+    @property
+    def size(self) -> int:
+        """ Bytes of stored values """
+        return self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
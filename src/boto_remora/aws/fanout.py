@@ -0,0 +1,286 @@
+""" Run a callable over every profile and region """
+import dataclasses
+import heapq
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+import boto3
+
+from . import helper
+from .main import Ec2, Sts
+from .pool import ClientPool, get_default_pool
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class Target:
+    """ A profile and region a task runs against """
+
+    profile_name: Optional[str]
+    region_name: Optional[str]
+    account: Optional[str] = None
+    session: Optional[boto3.session.Session] = dataclasses.field(
+        default=None, compare=False, repr=False
+    )
+    pool: Optional[ClientPool] = dataclasses.field(default=None, compare=False, repr=False)
+
+    def client(self, service_name: str, **kwargs):
+        """ Client of a service in the target region, pooled when a pool is set """
+        if self.pool is not None:
+            return self.pool.client(
+                service_name, region_name=self.region_name, session=self.session, **kwargs
+            )
+        return self.session.client(service_name, region_name=self.region_name, **kwargs)
+
+
+@dataclasses.dataclass()
+class FanOutResult:
+    """ Outcome of a task for a target """
+
+    target: Target
+    value: Any = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """ Checks if the task succeeded """
+        return self.error is None
+
+
+def _limit_keys(target: Target) -> Tuple[Hashable, Optional[str]]:
+    """ Account and region a target counts against, its profile when the account is unknown """
+    return (target.account or ("profile", target.profile_name), target.region_name)
+
+
+class _PendingTargets:
+    """
+    Targets waiting to run, taken in order among those the account and region
+    limits allow.
+
+    Targets are queued per account and region. Only queues whose account and
+    region are below their limits are in the ready heap, so a finished task
+    only revisits the queues of the account or region it frees rather than
+    every pending target.
+    """
+
+    def __init__(
+        self,
+        targets: Iterable[Target],
+        max_per_account: Optional[int],
+        max_per_region: Optional[int],
+    ):
+        self._limits = (max_per_account, max_per_region)
+        self._running: Tuple[Counter, Counter] = (Counter(), Counter())
+        # Queue keys by account and by region
+        self._members: Tuple[Dict[Hashable, Set], Dict[Hashable, Set]] = (
+            defaultdict(set),
+            defaultdict(set),
+        )
+        self._queues: Dict[Tuple, Deque[Tuple[int, Target]]] = defaultdict(deque)
+        self._pending = 0
+        for order, target in enumerate(targets):
+            keys = _limit_keys(target)
+            self._queues[keys].append((order, target))
+            self._pending += 1
+            for members_, key_ in zip(self._members, keys):
+                members_[key_].add(keys)
+        # (order of the first target, queue key), at most one entry per queue
+        self._ready = [(queue_[0][0], keys_) for keys_, queue_ in self._queues.items()]
+        heapq.heapify(self._ready)
+        self._in_ready = set(self._queues)
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def _allowed(self, keys: Tuple) -> bool:
+        return all(
+            limit_ is None or running_[key_] < limit_
+            for limit_, running_, key_ in zip(self._limits, self._running, keys)
+        )
+
+    def pop(self) -> Optional[Target]:
+        """ First target allowed to start, counted as running, None when none is """
+        while self._ready:
+            keys = heapq.heappop(self._ready)[1]
+            self._in_ready.discard(keys)
+            # Blocked queues come back when their account or region is released
+            if not self._allowed(keys):
+                continue
+            queue = self._queues[keys]
+            target = queue.popleft()[1]
+            self._pending -= 1
+            for running_, key_ in zip(self._running, keys):
+                running_[key_] += 1
+            if not queue:
+                del self._queues[keys]
+                for members_, key_ in zip(self._members, keys):
+                    members_[key_].discard(keys)
+            else:
+                self._push(keys)
+            return target
+        return None
+
+    def done(self, target: Target):
+        """ Release the account and region of a finished target """
+        for limit, running, members, key in zip(
+            self._limits, self._running, self._members, _limit_keys(target)
+        ):
+            running[key] -= 1
+            if limit is not None and running[key] == limit - 1:
+                for keys_ in members[key]:
+                    self._push(keys_)
+
+    def _push(self, keys: Tuple):
+        """ Add a queue to the ready heap unless it is blocked or already there """
+        if keys not in self._in_ready and self._allowed(keys):
+            heapq.heappush(self._ready, (self._queues[keys][0][0], keys))
+            self._in_ready.add(keys)
+
+
+@dataclasses.dataclass()
+class FanOut:  # pylint: disable=too-many-instance-attributes
+    """
+    Executor running a callable over the profiles x regions grid.
+
+    Identity and enabled regions are discovered once per profile and reused by
+    every run. Results are yielded as tasks finish, failures are returned as
+    results carrying the error and also collected in ``errors``.
+
+    Parameters
+    ----------
+    profiles : Sequence[str], optional
+        Profiles to run against (default all authenticated profiles)
+    regions : Sequence[str], optional
+        Regions to run in (default the EC2 enabled regions of each account)
+    max_workers : int
+        Global limit of concurrent tasks (default 32)
+    max_per_account : int, optional
+        Limit of concurrent tasks per account, per profile when the account is unknown
+    max_per_region : int, optional
+        Limit of concurrent tasks per region
+    discovery_region : str
+        Region used for identity and region discovery (default "us-east-1")
+    """
+
+    profiles: Optional[Sequence[str]] = None
+    regions: Optional[Sequence[str]] = None
+    max_workers: int = 32
+    max_per_account: Optional[int] = None
+    max_per_region: Optional[int] = None
+    discovery_region: str = "us-east-1"
+    pool: Optional[ClientPool] = dataclasses.field(
+        default_factory=get_default_pool, compare=False, repr=False
+    )
+    errors: List[FanOutResult] = dataclasses.field(default_factory=list, init=False, repr=False)
+    _targets: Optional[List[Target]] = dataclasses.field(default=None, init=False, repr=False)
+    _lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def _discover_profile(self, target: Target) -> List[Target]:
+        profile_name = target.profile_name
+        sts = Sts(profile_name, self.discovery_region, pool=self.pool)
+        account = sts.caller_identity.get("Account")
+        regions: FrozenSet[str] = (
+            frozenset(self.regions)
+            if self.regions is not None
+            else Ec2(profile_name, self.discovery_region, pool=self.pool).available_regions
+        )
+        session = (
+            self.pool.session(profile_name, self.discovery_region)
+            if self.pool is not None
+            else sts.session
+        )
+        return [
+            Target(profile_name, region_, account, session, self.pool)
+            for region_ in sorted(regions)
+        ]
+
+    @property
+    def targets(self) -> List[Target]:
+        """ Targets of the grid, discovered concurrently on first access """
+        with self._lock:
+            if self._targets is None:
+                profiles = (
+                    tuple(self.profiles)
+                    if self.profiles is not None
+                    else helper.get_authed_profiles(region=self.discovery_region)
+                )
+                targets = list()
+                profile_targets = (Target(profile_, None) for profile_ in profiles)
+                for result in self._run(self._discover_profile, profile_targets):
+                    if result.ok:
+                        targets.extend(result.value)
+                    else:
+                        _LOGGER.warning(
+                            "Skipping profile %s: %s", result.target.profile_name, result.error
+                        )
+                        self.errors.append(result)
+                self._targets = targets
+        return self._targets
+
+    def _run(self, func: Callable, targets) -> Iterator[FanOutResult]:
+        """ Schedule func over targets honoring global, account and region limits """
+        pending = _PendingTargets(targets, self.max_per_account, self.max_per_region)
+        running: Dict[Any, Target] = dict()
+
+        def call(target: Target) -> FanOutResult:
+            start = time.perf_counter()
+            try:
+                value = func(target)
+            except Exception as err:  # pylint: disable=broad-except
+                return FanOutResult(target, error=err, elapsed=time.perf_counter() - start)
+            return FanOutResult(target, value=value, elapsed=time.perf_counter() - start)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                while len(running) < self.max_workers:
+                    target = pending.pop()
+                    if target is None:
+                        break
+                    running[executor.submit(call, target)] = target
+                if not running:
+                    raise ValueError("Concurrency limits do not allow any task to run.")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.done(running.pop(future))
+                    yield future.result()
+
+    def run(self, func: Callable[[Target], Any]) -> Iterator[FanOutResult]:
+        """
+        Run func for every target, yielding results as they finish.
+
+        func receives a ``Target`` whose ``client`` method returns pooled clients
+        of the target profile and region.
+        """
+        for result in self._run(func, self.targets):
+            if not result.ok:
+                _LOGGER.debug("Task failed for %s: %s", result.target, result.error)
+                self.errors.append(result)
+            yield result
+
+    def map(self, func: Callable[[Target], Any]) -> Dict[Target, Any]:
+        """ Run func for every target and return the values of successful tasks """
+        return {result_.target: result_.value for result_ in self.run(func) if result_.ok}
@@ -1,25 +1,39 @@
 """ Helper funtions for boto_remora.aws """
 import logging
 from concurrent.futures import ThreadPoolExecutor
-from functools import partial
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import as_completed
 from itertools import compress
-from typing import FrozenSet, Iterator, Tuple
+from typing import FrozenSet, Iterator, Optional, Tuple
 
 import boto3
 import botocore
+from botocore.config import Config
 
-from boto_remora.aws.main import Sts
+from .pool import ClientPool
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def is_region_accessible(region, session):
+def probe_config(timeout: float = 5.0) -> Config:
+    """ Client config failing fast on unreachable endpoints """
+    return Config(connect_timeout=timeout, read_timeout=timeout, retries={"max_attempts": 0})
+
+
+def is_region_accessible(
+    region, session, config: Optional[Config] = None, pool: Optional[ClientPool] = None
+):
     """
     Checks region is accessible from a given session.
     see: https://www.cloudar.be/awsblog/checking-if-a-region-is-enabled-using-the-aws-api/
+
+    The STS client comes from pool when set, else from the session.
     """
-    client = session.client("sts", region_name=region)
+    if pool is not None:
+        client = pool.client("sts", region_name=region, config=config, session=session)
+    else:
+        client = session.client("sts", region_name=region, config=config)
     try:
         client.get_caller_identity()
     except botocore.exceptions.ClientError as err:
@@ -33,15 +47,74 @@ def is_region_accessible(region, session):
             raise err from None
         _LOGGER.debug(err)
         return False
+    except botocore.exceptions.BotoCoreError as err:
+        _LOGGER.debug("Unable to reach region %s: %s", region, err)
+        return False
     return True
 
 
-def get_accessible_regions(service_name: str, session: boto3.session.Session) -> FrozenSet[str]:
-    """ Returns enabled regions from a given session. """
+def iter_accessible_regions(
+    service_name: str,
+    session: boto3.session.Session,
+    max_workers: int = 16,
+    timeout: float = 5.0,
+    deadline: Optional[float] = 30.0,
+    pool: Optional[ClientPool] = None,
+) -> Iterator[str]:
+    """
+    Yields enabled regions from a given session as their probes resolve.
+
+    Parameters
+    ----------
+    service_name : str
+        Service whose regions are probed
+    session : boto3.session.Session
+        Session to probe with
+    max_workers : int
+        Maximum number of concurrent probes (default 16)
+    timeout : float
+        Connect and read timeout of each probe in seconds (default 5)
+    deadline : float, optional
+        Seconds after which unresolved regions are skipped (default 30)
+    pool : ClientPool, optional
+        Pool sharing the probe clients (default a private client per probe)
+
+    Raises
+    ------
+    botocore.exceptions.ClientError
+        When the session token expired, outstanding probes are cancelled.
+    """
     # TODO: Add partition
     regions = session.get_available_regions(service_name)
-    is_region_accessible_ = partial(is_region_accessible, session=session)
-    available_regions = frozenset(filter(is_region_accessible_, regions))
+    if not regions:
+        return
+    config = probe_config(timeout)
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(regions)))
+    futures = {
+        executor.submit(is_region_accessible, region_, session, config, pool): region_
+        for region_ in regions
+    }
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            if future.result():
+                yield futures[future]
+    except FutureTimeoutError:
+        _LOGGER.warning(
+            "Probing regions exceeded %ss, skipping %s.",
+            deadline,
+            sorted(region_ for future_, region_ in futures.items() if not future_.done()),
+        )
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def get_accessible_regions(
+    service_name: str, session: boto3.session.Session, **kwargs
+) -> FrozenSet[str]:
+    """ Returns enabled regions from a given session, see ``iter_accessible_regions``. """
+    available_regions = frozenset(iter_accessible_regions(service_name, session, **kwargs))
 
     if not available_regions:
         _LOGGER.error("Access to all regions failed. There may be a network issue.")
@@ -49,10 +122,13 @@ def get_accessible_regions(service_name: str, session: boto3.session.Session) ->
     return available_regions
 
 
-def get_authed_profiles(
-    profiles: Iterator[str] = tuple(botocore.session.Session().available_profiles), region=None
-) -> Tuple[str]:
-    """ Return iterator of authenticated profiles. """
+def get_authed_profiles(profiles: Optional[Iterator[str]] = None, region=None) -> Tuple[str]:
+    """ Return iterator of authenticated profiles, by default of all available profiles. """
+    from boto_remora.aws.main import Sts  # pylint: disable=import-outside-toplevel
+
+    if profiles is None:
+        profiles = botocore.session.Session().available_profiles
+    profiles = tuple(profiles)
     kwargs = {"region_name": region} if region else dict()
     with ThreadPoolExecutor() as executor:
         account_check = executor.map(
@@ -1,23 +1,40 @@
 """ boto_remora.aws.main package for main objects and functions """
 import dataclasses
+import functools
 import itertools
-import json
 import logging
-import pathlib
+import time
 import warnings
 from collections import ChainMap
-from typing import Any, Dict, Optional, Sequence
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import botocore.exceptions
+import botocore.loaders
 import jmespath
-from pkg_resources import resource_filename
+from botocore.config import Config
 
+from boto_remora.util import json_loads
+
+from . import ratelimit
 from .base import AwsBaseService
+from .cache import ResponseCache
+from .pricelist import PriceListItem
+from .ratelimit import AdaptiveRateLimiter
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _term_match_filters(
+    filter_kv: Dict[str, str], filter_keys: Sequence[str] = ("Field", "Value")
+) -> List[Dict[str, str]]:
+    """ get_products Filters matching every attribute of filter_kv """
+    return [
+        {"Type": "TERM_MATCH", filter_keys[0]: k, filter_keys[1]: v} for k, v in filter_kv.items()
+    ]
+
+
 @dataclasses.dataclass()
 class Ec2(AwsBaseService):
     """ Object to help with EC2 """
@@ -39,6 +56,30 @@ class Ec2(AwsBaseService):
 
         return self._available_regions
 
+    def _paginate(
+        self, operation: str, query: str, filters: Optional[Dict[str, Sequence[str]]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """ Lazily yield the items selected by query from every page of operation """
+        kwargs = dict()
+        if filters:
+            kwargs["Filters"] = [
+                {"Name": name_, "Values": list(values_)} for name_, values_ in filters.items()
+            ]
+        for page in self.client.get_paginator(operation).paginate(**kwargs):
+            yield from jmespath.search(query, page) or ()
+
+    def iter_instances(
+        self, filters: Optional[Dict[str, Sequence[str]]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """ Lazily yield instances, e.g. filters={"instance-state-name": ["running"]} """
+        return self._paginate("describe_instances", "Reservations[].Instances[]", filters)
+
+    def iter_volumes(
+        self, filters: Optional[Dict[str, Sequence[str]]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """ Lazily yield EBS volumes of the region """
+        return self._paginate("describe_volumes", "Volumes[]", filters)
+
 
 @dataclasses.dataclass()
 class Pricing(AwsBaseService):
@@ -58,15 +99,73 @@ class Pricing(AwsBaseService):
         default_factory=dict, init=False, repr=False
     )
     _services: Dict[str, Any] = dataclasses.field(default_factory=dict, init=False, repr=False)
+    cache: Optional[ResponseCache] = dataclasses.field(default=None, compare=False, repr=False)
+    # Shared by all Pricing objects of the process, None disables client side pacing.
+    rate_limiter: Optional[AdaptiveRateLimiter] = dataclasses.field(
+        default_factory=ratelimit.get_default_limiter, compare=False, repr=False
+    )
+    max_throttle_retries: int = 8
+
+    def __post_init__(self):
+        super().__post_init__()
+        if self.rate_limiter is not None:
+            self.rate_limiter.attach(self.client)
+
+    def get_client(self, region_name: Optional[str] = None, config=None):
+        """ Client of the service, leaving throttling retries to the rate limiter when set """
+        if self.rate_limiter is None:
+            return super().get_client(region_name=region_name, config=config)
+        standard_mode = Config(retries={"mode": "standard"})
+        config = standard_mode.merge(config) if config else standard_mode
+        client = super().get_client(region_name=region_name, config=config)
+        retries = client.meta.config.retries or dict()
+        if "total_max_attempts" in retries:
+            ratelimit.retry_except_throttling(client, retries["total_max_attempts"])
+        else:
+            ratelimit.retry_except_throttling(client)
+        return client
+
+    def _call(self, operation: str, **kwargs):
+        """
+        Call a client operation, retrying throttled calls with jittered backoff.
+
+        Callers keep their pagination kwargs, so a retry resumes from the last NextToken.
+        """
+        attempt = 0
+        while True:
+            try:
+                return getattr(self.client, operation)(**kwargs)
+            except botocore.exceptions.ClientError as err:
+                if not ratelimit.is_throttling_error(err) or attempt >= self.max_throttle_retries:
+                    raise
+                delay = ratelimit.jittered_backoff(attempt)
+                _LOGGER.debug("%s throttled, retrying in %.2fs", operation, delay)
+                time.sleep(delay)
+                attempt += 1
+
+    def _iter_pages(self, operation: str, **kwargs) -> Iterator[Dict[str, Any]]:
+        """ Pages of a NextToken paginated operation, each call retried like ``_call`` """
+        while True:
+            response = self._call(operation, **kwargs)
+            yield response
+            if not response.get("NextToken"):
+                return
+            kwargs["NextToken"] = response["NextToken"]
+
+    def _cache_get(self, *key_parts):
+        return self.cache.get(ResponseCache.make_key(*key_parts)) if self.cache else None
+
+    def _cache_set(self, value, *key_parts):
+        if self.cache:
+            self.cache.set(ResponseCache.make_key(*key_parts), value)
 
     @property
     def services(self):
         """ Maps service attributes by service code """
         if not self._services:
-            next_token = ""
-            response = {"NextToken": ""}
-            while "NextToken" in response:
-                response = self.client.describe_services(NextToken=next_token)
+            self._services = self._cache_get("describe_services") or dict()
+        if not self._services:
+            for response in self._iter_pages("describe_services"):
                 metadata = response["ResponseMetadata"]
                 _LOGGER.debug(
                     "Request %s status code %s",
@@ -79,15 +178,51 @@ class Pricing(AwsBaseService):
                 )
 
                 self._services.update(svcdata)
-                next_token = response.get("NextToken")
+            self._cache_set(self._services, "describe_services")
 
         return self._services
 
+    def attribute_values(self, servicecode: str, attribute_name: str) -> Tuple[str, ...]:
+        """ Possible values of a service attribute """
+        cache_key = ("get_attribute_values", servicecode, attribute_name)
+        values = self._cache_get(*cache_key)
+        if values is None:
+            pages = self._iter_pages(
+                "get_attribute_values", ServiceCode=servicecode, AttributeName=attribute_name
+            )
+            values = [val_["Value"] for page_ in pages for val_ in page_["AttributeValues"]]
+            self._cache_set(values, *cache_key)
+
+        return tuple(values)
+
+    def price_list_versions(
+        self, servicecode: str, currency: str = "USD", effective_date: Optional[datetime] = None
+    ) -> Dict[str, str]:
+        """
+        Price list ARN, which embeds the publication version, by region code.
+
+        Empty when the installed botocore predates the ListPriceLists operation.
+        """
+        if not hasattr(self.client, "list_price_lists"):
+            _LOGGER.debug("botocore does not support list_price_lists")
+            return dict()
+        pages = self._iter_pages(
+            "list_price_lists",
+            ServiceCode=servicecode,
+            CurrencyCode=currency,
+            EffectiveDate=effective_date or datetime.now(timezone.utc),
+        )
+        return {
+            price_list_["RegionCode"]: price_list_["PriceListArn"]
+            for page_ in pages
+            for price_list_ in page_["PriceLists"]
+        }
+
     @property
     def region_names(self):
         """ Region short names to long names """
         if not self._region_map:
-            self._region_map = Ssm(session=self.session).region_names
+            self._region_map = Ssm(session=self.session, cache=self.cache).region_names
         return self._region_map
 
     @property
@@ -97,43 +232,86 @@ class Pricing(AwsBaseService):
             self._region_map_rev = {v: k for k, v in self.region_names.items()}
         return self._region_map_rev
 
-    def get_price_list(
+    def iter_price_list(
         self,
         servicecode: Optional[str] = None,
         region: Optional[str] = None,
         filter_kv: Optional[Dict[str, str]] = None,
-    ):
+        use_cache: bool = True,
+    ) -> Iterator[Dict[str, Any]]:
         """
-        Fetch from price API
+        Lazily fetch from price API, yielding decoded items one page at a time.
+
+        With a cache configured, a hit is served without any request and the raw
+        pages of a fully consumed listing are stored for the next caller. Set
+        use_cache to False to skip the lookup and replace the cached pages.
         """
-        if region:
-            filter_kv["location"] = self.region_names[region]
-        filters = (
-            [
-                {"Type": "TERM_MATCH", self.filter_keys[0]: k, self.filter_keys[1]: v}
-                for k, v in filter_kv.items()
-            ]
-            if filter_kv
-            else None
+        return map(
+            json_loads, self._iter_raw_price_list(servicecode, region, filter_kv, use_cache)
         )
-        _LOGGER.debug("Price search %s with filter %s", servicecode, filters)
 
-        kwargs = {
-            "ServiceCode": servicecode,
-            "Filters": filters,
-        }
-        pricelist = list()
-        response = {"NextToken": ""}
-        while "NextToken" in response:
-            response = self.client.get_products(**kwargs)
+    def iter_price_list_items(
+        self,
+        servicecode: Optional[str] = None,
+        region: Optional[str] = None,
+        filter_kv: Optional[Dict[str, str]] = None,
+        use_cache: bool = True,
+    ) -> Iterator[PriceListItem]:
+        """
+        Like ``iter_price_list``, but items are read only mappings which decode
+        their JSON on first access, so skipped items are never decoded.
+        """
+        return map(
+            PriceListItem, self._iter_raw_price_list(servicecode, region, filter_kv, use_cache)
+        )
+
+    def _iter_raw_price_list(
+        self,
+        servicecode: Optional[str],
+        region: Optional[str],
+        filter_kv: Optional[Dict[str, str]],
+        use_cache: bool,
+    ) -> Iterator[str]:
+        """ JSON strings of the PriceList of get_products, see ``iter_price_list`` """
+        filter_kv = dict(filter_kv) if filter_kv else dict()
+        if region:
+            filter_kv["location"] = self.region_names[region]
+        kwargs = {"ServiceCode": servicecode}
+        if filter_kv:
+            kwargs["Filters"] = _term_match_filters(filter_kv, self.filter_keys)
+        _LOGGER.debug("Price search %s with filter %s", servicecode, kwargs.get("Filters"))
+
+        cache_key = ("get_products", servicecode, sorted(map(list, filter_kv.items())))
+        cached = self._cache_get(*cache_key) if use_cache else None
+        if cached is not None:
+            yield from cached
+            return
+
+        raw_pricelist = list() if self.cache else None
+        for response in self._iter_pages("get_products", **kwargs):
             metadata = response["ResponseMetadata"]
             _LOGGER.debug(
                 "Request %s status code %s", metadata["RequestId"], metadata["HTTPStatusCode"],
             )
-            pricelist.extend(map(json.loads, response["PriceList"]))
-            kwargs["NextToken"] = response.get("NextToken")
+            if raw_pricelist is not None:
+                raw_pricelist.extend(response["PriceList"])
+            yield from response["PriceList"]
+
+        if raw_pricelist is not None:
+            self._cache_set(raw_pricelist, *cache_key)
 
-        return pricelist
+    def get_price_list(
+        self,
+        servicecode: Optional[str] = None,
+        region: Optional[str] = None,
+        filter_kv: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Fetch from price API, see ``iter_price_list``
+        """
+        return list(
+            self.iter_price_list(servicecode=servicecode, region=region, filter_kv=filter_kv)
+        )
 
     # def filter_fmt(self, filters: Dict[str, str], filter_type="TERM_MATCH"):
     #     """
@@ -142,11 +320,62 @@ class Pricing(AwsBaseService):
     #     return [{"Type": filter_type}.update(super().filter_fmt(cached)) for cached in filters]
 
 
+# Region names by (partition, all_partitions) shared by all Ssm instances of the process
+_REGION_NAMES: Dict[Tuple[str, bool], Dict[str, str]] = dict()
+_REGION_PARAMETER_PATH = "/aws/service/global-infrastructure/regions"
+
+
+def _partition_of(session, region_name: Optional[str]) -> str:
+    """ Partition of a region, "aws" when the session cannot tell """
+    try:
+        return session.get_partition_for_region(region_name)
+    except (AttributeError, botocore.exceptions.UnknownRegionError):
+        return "aws"
+
+
+def _region_long_names(response: Dict[str, Any]) -> Dict[str, str]:
+    """ Region short codes mapped to the long names of a get_parameters response """
+    if response.get("InvalidParameters"):
+        _LOGGER.warning("Unknown region parameters %s", response["InvalidParameters"])
+    return {param_["Name"].split("/")[-2]: param_["Value"] for param_ in response["Parameters"]}
+
+
+@functools.lru_cache(maxsize=None)
+def _load_boto_region_names(partition: Optional[str]) -> Tuple[Tuple[str, str], ...]:
+    jmes_search = (
+        f"partitions[?partition == '{partition}'].regions"
+        if partition
+        else f"partitions[*].regions"
+    )
+
+    endpoints = botocore.loaders.create_loader().load_data("endpoints")
+    region_data = jmespath.search(jmes_search, endpoints)
+
+    return tuple((k, v["description"]) for k, v in ChainMap(*region_data).items())
+
+
 @dataclasses.dataclass()
 class Ssm(AwsBaseService):
-    """ Object to help with SSM """
+    """
+    Object to help with SSM
+
+    Region names are resolved once per partition and shared across instances.
+    With a cache they are also persisted, so new processes skip SSM entirely.
+
+    By default region_names holds the botocore names of every partition, e.g.
+    GovCloud and China regions, plus the SSM names of the session partition.
+    Set all_partitions to False to only keep the session partition.
+    """
 
     service_name: str = dataclasses.field(default="ssm", init=False)
+    cache: Optional[ResponseCache] = dataclasses.field(default=None, compare=False, repr=False)
+    parameter_batch_size: int = 10
+    all_partitions: bool = True
+
+    @property
+    def partition(self) -> str:
+        """ Partition of the session region """
+        return _partition_of(self.session, self.region_name)
 
     @property
     def region_names(self):
@@ -156,15 +385,33 @@ class Ssm(AwsBaseService):
         -------
         Dict of region short codes mapped to their long codes.
         """
-        regions = self._get_region_from_boto()
-        regions.update(
-            map(
-                lambda code: (code, self._get_region_long_name(code)),
-                filter(
-                    lambda short_code: short_code not in regions, self._get_region_short_codes(),
-                ),
-            )
-        )
+        memo_key = (self.partition, self.all_partitions)
+        regions = _REGION_NAMES.get(memo_key)
+        if regions is None:
+            # Loaded without a lock, so a slow SSM call does not block other
+            # partitions; concurrent first callers may load twice, the first
+            # published result wins.
+            regions = _REGION_NAMES.setdefault(memo_key, self._load_region_names(*memo_key))
+
+        return dict(regions)
+
+    @staticmethod
+    def clear_region_names():
+        """ Forget region names resolved by this process """
+        _REGION_NAMES.clear()
+
+    def _load_region_names(self, partition: str, all_partitions: bool) -> Dict[str, str]:
+        cache_key = ResponseCache.make_key("ssm_region_names", partition, all_partitions)
+        regions = self.cache.get(cache_key) if self.cache else None
+        if regions:
+            return regions
+
+        regions = self._get_region_from_boto(None if all_partitions else partition)
+        missing = [code_ for code_ in self._get_region_short_codes() if code_ not in regions]
+        regions.update(self._get_region_long_names(missing))
+        _LOGGER.debug("Resolved %s region names of partition %s", len(regions), partition)
+        if self.cache:
+            self.cache.set(cache_key, regions)
 
         return regions
 
@@ -176,38 +423,36 @@ class Ssm(AwsBaseService):
         Parameters
         ----------
         partition : str, optional
-            AWS partitions: aws, aws-cn, aws-us-gov, aws-iso, aws-iso-b (default "aws")
+            AWS partitions: aws, aws-cn, aws-us-gov, aws-iso, aws-iso-b (default all)
 
         Returns
         -------
         Dict[str, str]
             A map of region names to their human friend names.
         """
-        endpoints_file = pathlib.Path(resource_filename("botocore", "data/endpoints.json"))
-        jmes_search = (
-            f"partitions[?partition == '{partition}'].regions"
-            if partition
-            else f"partitions[*].regions"
-        )
-
-        with endpoints_file.open("r") as fid:
-            region_data = jmespath.search(jmes_search, json.load(fid))
-
-        region_data = {k: v["description"] for k, v in ChainMap(*region_data).items()}
-
-        return region_data
-
-    def _get_region_long_name(self, short_code):
-        param_name = "/aws/service/global-infrastructure/regions/" f"{short_code}/longName"
-        response = self.client.get_parameters(Names=[param_name])
-        return response["Parameters"][0]["Value"]
+        return dict(_load_boto_region_names(partition))
+
+    def _get_region_long_name(self, short_code: str) -> Optional[str]:
+        """ Long name of a region, None if SSM does not know the region """
+        return self._get_region_long_names([short_code]).get(short_code)
+
+    def _get_region_long_names(self, short_codes: Sequence[str]) -> Dict[str, str]:
+        """ Long names of regions fetched in batches of get_parameters """
+        long_names = dict()
+        for idx in range(0, len(short_codes), self.parameter_batch_size):
+            names = [
+                f"{_REGION_PARAMETER_PATH}/{code_}/longName"
+                for code_ in short_codes[idx : idx + self.parameter_batch_size]
+            ]
+            long_names.update(_region_long_names(self.client.get_parameters(Names=names)))
+        return long_names
 
     def _get_region_short_codes(self):
         return itertools.chain.from_iterable(
             map(
                 lambda page: map(lambda param: param["Value"], page["Parameters"]),
                 self.client.get_paginator("get_parameters_by_path").paginate(
-                    Path="/aws/service/global-infrastructure/regions"
+                    Path=_REGION_PARAMETER_PATH
                 ),
             )
         )
@@ -232,9 +477,7 @@ class Sts(AwsBaseService):
         return self._caller_identity
 
     def _get_caller_identity(self, region=None):
-        client = (
-            self.session.client(self.service_name, region_name=region) if region else self.client
-        )
+        client = self.get_client(region_name=region) if region else self.client
         if not client:
             client = self.client
         caller_identity = dict()
@@ -0,0 +1,283 @@
+""" Per operation call metrics of botocore clients """
+import bisect
+import copy
+import dataclasses
+import functools
+import json
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import botocore.exceptions
+import botocore.session
+import jmespath
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+_START_KEY = "boto_remora_metrics_start"
+_CONTINUED_KEY = "boto_remora_metrics_continued"
+
+
+@dataclasses.dataclass(frozen=True)
+class CallRecord:  # pylint: disable=too-many-instance-attributes
+    """ A finished client call as passed to sinks """
+
+    service_name: str
+    operation: str
+    latency: float
+    status_code: Optional[int]
+    retries: int = 0
+    # Response is a page of a result spanning several, see Pagination
+    paged: bool = False
+    response_bytes: int = 0
+    error: Optional[str] = None
+    timestamp: float = dataclasses.field(default_factory=time.time)
+
+
+@dataclasses.dataclass()
+class OperationStats:  # pylint: disable=too-many-instance-attributes
+    """ Aggregated statistics of an operation """
+
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    # Responses of results spanning several pages
+    pages: int = 0
+    response_bytes: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    latency_histogram: List[int] = dataclasses.field(
+        default_factory=lambda: [0] * len(LATENCY_BUCKETS)
+    )
+
+    def add(self, record: CallRecord):
+        """ Aggregate a call """
+        self.calls += 1
+        self.errors += record.error is not None
+        self.retries += record.retries
+        self.pages += record.paged
+        self.response_bytes += record.response_bytes
+        self.latency_total += record.latency
+        self.latency_max = max(self.latency_max, record.latency)
+        self.latency_histogram[bisect.bisect_left(LATENCY_BUCKETS, record.latency)] += 1
+
+    @property
+    def latency_mean(self) -> float:
+        """ Mean latency in seconds """
+        return self.latency_total / self.calls if self.calls else 0.0
+
+    def latency_quantile(self, quantile: float) -> float:
+        """ Upper bound of the histogram bucket holding the quantile """
+        rank = quantile * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.latency_histogram):
+            seen += count
+            if count and seen >= rank:
+                return bound
+        return 0.0
+
+
+@dataclasses.dataclass(frozen=True)
+class Pagination:
+    """ Tokens of a paginated operation, from the botocore paginator model """
+
+    input_tokens: Tuple[str, ...]
+    output_tokens: Tuple[str, ...]
+    more_results: Optional[str] = None
+
+    def continues(self, params: Dict[str, Any]) -> bool:
+        """ Checks if a request continues a previous page """
+        return any(params.get(token_) for token_ in self.input_tokens)
+
+    def has_more(self, parsed: Dict[str, Any]) -> bool:
+        """ Checks if a response is followed by another page """
+        if self.more_results is not None:
+            return bool(jmespath.search(self.more_results, parsed))
+        return any(jmespath.search(token_, parsed) for token_ in self.output_tokens)
+
+
+def _as_tuple(value) -> Tuple[str, ...]:
+    return tuple(value) if isinstance(value, list) else (value,)
+
+
+@functools.lru_cache(maxsize=None)
+def _paginator_model(service_name: str, api_version: str):
+    """ botocore paginator model of a service version, None when it has none """
+    try:
+        return botocore.session.get_session().get_paginator_model(service_name, api_version)
+    except botocore.exceptions.DataNotFoundError:
+        return None
+
+
+def client_pagination(client) -> Dict[str, Pagination]:
+    """ Pagination of the paginated operations of a client by operation name """
+    service_model = client.meta.service_model
+    model = _paginator_model(service_model.service_name, service_model.api_version)
+    operations = dict()
+    for method, operation in client.meta.method_to_api_mapping.items():
+        if model is not None and client.can_paginate(method):
+            config = model.get_paginator(operation)
+            operations[operation] = Pagination(
+                _as_tuple(config["input_token"]),
+                _as_tuple(config["output_token"]),
+                config.get("more_results"),
+            )
+    return operations
+
+
+@dataclasses.dataclass()
+class ServiceMetrics:
+    """
+    Call metrics of a client, fed by botocore's before-call and after-call events.
+
+    Sinks are callables receiving every ``CallRecord``, e.g. ``LoggingSink`` or
+    ``JsonLinesSink``.
+    """
+
+    service_name: str
+    operations: Dict[str, OperationStats] = dataclasses.field(default_factory=dict)
+    sinks: List[Callable[[CallRecord], Any]] = dataclasses.field(default_factory=list, repr=False)
+    _lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def record(self, record: CallRecord):
+        """ Aggregate a call and pass it to the sinks """
+        with self._lock:
+            self.operations.setdefault(record.operation, OperationStats()).add(record)
+        for sink in self.sinks:
+            try:
+                sink(record)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Metrics sink %s failed", sink)
+
+    def add_sink(self, sink: Callable[[CallRecord], Any]):
+        """ Export every following call to sink """
+        self.sinks.append(sink)
+
+    def stats(self) -> Dict[str, OperationStats]:
+        """ Copy of the statistics by operation """
+        with self._lock:
+            return copy.deepcopy(self.operations)
+
+    def reset(self):
+        """ Forget aggregated statistics """
+        with self._lock:
+            self.operations.clear()
+
+    def attach(self, client):
+        """ Record calls of a client """
+        service = client.meta.service_model.service_id.hyphenize()
+        events = client.meta.events
+        unique_id = f"boto_remora-metrics-{id(self)}"
+        paginated = client_pagination(client)
+
+        def before_parameter_build(params=None, model=None, context=None, **_):
+            if context is not None and model.name in paginated:
+                context[_CONTINUED_KEY] = paginated[model.name].continues(params or dict())
+
+        def before_call(context=None, **_):
+            if context is not None:
+                context[_START_KEY] = time.perf_counter()
+
+        def after_call(model=None, http_response=None, parsed=None, context=None, **_):
+            context = context or dict()
+            start = context.pop(_START_KEY, None)
+            status_code = getattr(http_response, "status_code", None)
+            parsed = parsed or dict()
+            pagination = paginated.get(model.name)
+            continued = context.pop(_CONTINUED_KEY, False)
+            self.record(
+                CallRecord(
+                    service_name=service,
+                    operation=model.name,
+                    latency=time.perf_counter() - start if start else 0.0,
+                    status_code=status_code,
+                    retries=parsed.get("ResponseMetadata", dict()).get("RetryAttempts", 0),
+                    paged=pagination is not None and (continued or pagination.has_more(parsed)),
+                    response_bytes=len(getattr(http_response, "content", b"") or b""),
+                    error=parsed.get("Error", dict()).get("Code", str(status_code))
+                    if status_code is None or status_code >= 300
+                    else None,
+                )
+            )
+
+        def after_call_error(event_name="", exception=None, context=None, **_):
+            context = context or dict()
+            start = context.pop(_START_KEY, None)
+            context.pop(_CONTINUED_KEY, None)
+            self.record(
+                CallRecord(
+                    service_name=service,
+                    operation=event_name.rsplit(".", 1)[-1],
+                    latency=time.perf_counter() - start if start else 0.0,
+                    status_code=None,
+                    error=type(exception).__name__,
+                )
+            )
+
+        events.register(
+            f"before-parameter-build.{service}",
+            before_parameter_build,
+            unique_id=f"{unique_id}-params",
+        )
+        events.register(f"before-call.{service}", before_call, unique_id=f"{unique_id}-before")
+        events.register(f"after-call.{service}", after_call, unique_id=f"{unique_id}-after")
+        events.register(
+            f"after-call-error.{service}", after_call_error, unique_id=f"{unique_id}-error"
+        )
+
+
+_CLIENT_METRICS: "weakref.WeakKeyDictionary[Any, ServiceMetrics]" = weakref.WeakKeyDictionary()
+_CLIENT_METRICS_LOCK = threading.Lock()
+
+
+def metrics_for(client) -> ServiceMetrics:
+    """ Metrics of a client, attached on first use and shared by its users """
+    with _CLIENT_METRICS_LOCK:
+        metrics = _CLIENT_METRICS.get(client)
+        if metrics is None:
+            metrics = ServiceMetrics(client.meta.service_model.service_name)
+            metrics.attach(client)
+            _CLIENT_METRICS[client] = metrics
+        return metrics
+
+
+@dataclasses.dataclass()
+class LoggingSink:
+    """ Sink logging every call """
+
+    logger: logging.Logger = _LOGGER
+    level: int = logging.DEBUG
+
+    def __call__(self, record: CallRecord):
+        self.logger.log(
+            self.level,
+            "%s.%s status %s in %.3fs, %s bytes, %s retries",
+            record.service_name,
+            record.operation,
+            record.status_code,
+            record.latency,
+            record.response_bytes,
+            record.retries,
+        )
+
+
+@dataclasses.dataclass()
+class JsonLinesSink:
+    """ Sink appending every call as a UTF-8 JSON line to a file """
+
+    path: str
+    _lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def __call__(self, record: CallRecord):
+        line = json.dumps(dataclasses.asdict(record), ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as fid:
+            fid.write(f"{line}\n")
@@ -0,0 +1,165 @@
+""" Shared pool of boto3 sessions and clients """
+import dataclasses
+import logging
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass()
+class _Entry:
+    value: Any
+    last_used: float = dataclasses.field(default_factory=time.monotonic)
+    # Keeps the session a client was created from alive while the client is pooled.
+    owner: Any = None
+
+
+@dataclasses.dataclass()
+class ClientPool:
+    """
+    Thread safe pool reusing sessions by (profile, region) and clients by
+    (profile, region, service).
+
+    Credentials, endpoint data and connection pools are resolved once per
+    entry instead of once per object. Entries idle for longer than ``max_idle``
+    seconds are evicted on later access or with ``evict_idle``.
+    """
+
+    max_pool_connections: int = 10
+    tcp_keepalive: bool = True
+    max_idle: Optional[float] = 15 * 60
+    _sessions: Dict[Tuple[Optional[str], Optional[str]], _Entry] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+    _clients: Dict[Tuple[Hashable, ...], _Entry] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+    _lock: threading.RLock = dataclasses.field(
+        default_factory=threading.RLock, init=False, repr=False, compare=False
+    )
+    _last_sweep: float = dataclasses.field(default_factory=time.monotonic, init=False, repr=False)
+
+    def __len__(self):
+        return len(self._sessions) + len(self._clients)
+
+    @property
+    def config(self) -> Config:
+        """ Client config applied to pooled clients """
+        return Config(
+            max_pool_connections=self.max_pool_connections, tcp_keepalive=self.tcp_keepalive
+        )
+
+    def session(
+        self, profile_name: Optional[str] = None, region_name: Optional[str] = None
+    ) -> boto3.session.Session:
+        """ Shared session of a profile and region """
+        key = (profile_name, region_name)
+        with self._lock:
+            self._maybe_sweep()
+            entry = self._sessions.get(key)
+            if entry is None:
+                _LOGGER.debug("Creating session for profile %s in %s", profile_name, region_name)
+                entry = self._sessions[key] = _Entry(
+                    boto3.Session(profile_name=profile_name, region_name=region_name)
+                )
+            entry.last_used = time.monotonic()
+            return entry.value
+
+    def client(
+        self,
+        service_name: str,
+        profile_name: Optional[str] = None,
+        region_name: Optional[str] = None,
+        config: Optional[Config] = None,
+        session: Optional[boto3.session.Session] = None,
+    ):
+        """
+        Shared client of a service.
+
+        Parameters
+        ----------
+        service_name : str
+            Service of the client
+        profile_name : str, optional
+            Profile of the pooled session to use, ignored when session is given
+        region_name : str, optional
+            Region of the client (default the session region)
+        config : botocore.config.Config, optional
+            Merged over the pool config, clients with different options are not shared
+        session : boto3.session.Session, optional
+            Session to create the client from instead of a pooled one
+        """
+        if session is None:
+            session = self.session(profile_name, region_name)
+            session_key: Hashable = profile_name
+        else:
+            session_key = ("session", id(session))
+        region_name = region_name or session.region_name
+        # pylint: disable=protected-access
+        config_key = tuple(sorted(config._user_provided_options.items())) if config else ()
+        key = (session_key, region_name, service_name, repr(config_key))
+        with self._lock:
+            self._maybe_sweep()
+            entry = self._clients.get(key)
+            if entry is None:
+                _LOGGER.debug("Creating %s client in %s", service_name, region_name)
+                entry = self._clients[key] = _Entry(
+                    session.client(
+                        service_name,
+                        region_name=region_name,
+                        config=self.config.merge(config) if config else self.config,
+                    ),
+                    owner=session,
+                )
+            entry.last_used = time.monotonic()
+            return entry.value
+
+    def _maybe_sweep(self):
+        if self.max_idle is None:
+            return
+        now = time.monotonic()
+        if now - self._last_sweep >= min(self.max_idle, 60):
+            self._last_sweep = now
+            self.evict_idle()
+
+    def evict_idle(self, max_idle: Optional[float] = None) -> int:
+        """ Drop entries unused for max_idle seconds (default ``max_idle``), returns the count """
+        max_idle = self.max_idle if max_idle is None else max_idle
+        if max_idle is None:
+            return 0
+        cutoff = time.monotonic() - max_idle
+        evicted = 0
+        with self._lock:
+            for entries in (self._clients, self._sessions):
+                idle = [key_ for key_, entry_ in entries.items() if entry_.last_used < cutoff]
+                for key in idle:
+                    # In flight users keep their references, the pool only forgets them.
+                    del entries[key]
+                    evicted += 1
+        if evicted:
+            _LOGGER.debug("Evicted %s idle sessions and clients", evicted)
+        return evicted
+
+    def clear(self):
+        """ Drop all sessions and clients """
+        self.evict_idle(max_idle=-1)
+
+
+_DEFAULT_POOL = ClientPool()
+
+
+def get_default_pool() -> ClientPool:
+    """ Process wide pool used by AwsBase objects by default """
+    return _DEFAULT_POOL
+
+
+def set_default_pool(pool: ClientPool):
+    """ Replace the process wide pool, e.g. to tune max_pool_connections """
+    global _DEFAULT_POOL  # pylint: disable=global-statement
+    _DEFAULT_POOL = pool
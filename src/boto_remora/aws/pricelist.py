@@ -0,0 +1,126 @@
+""" Lazily decoded Pricing API documents """
+import json
+import re
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from boto_remora.util import json_loads
+
+
+# C scanners of the json module, decoding a value or a string at an index
+_SCAN = json.JSONDecoder().scan_once
+_SCAN_STRING = json.decoder.scanstring
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def _skip_whitespace(raw: str, pos: int) -> int:
+    """ Index of the first non whitespace character from pos """
+    return _WHITESPACE.match(raw, pos).end() if raw[pos : pos + 1] in " \t\n\r" else pos
+
+
+def _decode_members(raw: str, start: int, until: str) -> Tuple[Dict[str, Any], Optional[int]]:
+    """
+    Members of the JSON object at start, decoded in document order up to the key
+    until, and the index of its value. Members after it are not read. The index
+    is None, and every member decoded, when the object has no such key.
+    """
+    members = dict()
+    pos = _skip_whitespace(raw, start)
+    if raw[pos : pos + 1] != "{":
+        raise json.JSONDecodeError("Expecting object", raw, pos)
+    pos = _skip_whitespace(raw, pos + 1)
+    if raw[pos : pos + 1] == "}":
+        return members, None
+    try:
+        while True:
+            if raw[pos : pos + 1] != '"':
+                raise json.JSONDecodeError("Expecting property name", raw, pos)
+            key, pos = _SCAN_STRING(raw, pos + 1)
+            pos = _skip_whitespace(raw, pos)
+            if raw[pos : pos + 1] != ":":
+                raise json.JSONDecodeError("Expecting ':' delimiter", raw, pos)
+            pos = _skip_whitespace(raw, pos + 1)
+            if key == until:
+                return members, pos
+            members[key], pos = _SCAN(raw, pos)
+            pos = _skip_whitespace(raw, pos)
+            if raw[pos : pos + 1] == "}":
+                return members, None
+            if raw[pos : pos + 1] != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", raw, pos)
+            pos = _skip_whitespace(raw, pos + 1)
+    except StopIteration as err:
+        raise json.JSONDecodeError("Expecting value", raw, err.value) from None
+
+
+class PriceListItem(Mapping):
+    """
+    Read only mapping over a ``PriceList`` JSON string of ``get_products``.
+
+    The raw string is kept and only decoded, with orjson when installed, when a
+    field is first accessed. Fields before ``terms``, which the API sends after
+    ``product`` and ``serviceCode``, are read without decoding the terms, and
+    ``term_type`` decodes the terms of a single type.
+    """
+
+    __slots__ = ("raw", "_data", "_head", "_terms_at")
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self._data: Optional[Dict[str, Any]] = None
+        # Members before terms and the index of the terms, see _decode_members
+        self._head: Optional[Dict[str, Any]] = None
+        self._terms_at: Optional[int] = None
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """ Decoded document """
+        if self._data is None:
+            self._data = json_loads(self.raw)
+            self._head = None
+        return self._data
+
+    @property
+    def is_decoded(self) -> bool:
+        """ Checks if the document has been decoded """
+        return self._data is not None
+
+    def _decoded_head(self) -> Dict[str, Any]:
+        """ Members before terms, the whole document when it has no terms """
+        if self._head is None:
+            if not isinstance(self.raw, str):
+                return self.data
+            self._head, self._terms_at = _decode_members(self.raw, 0, "terms")
+            if self._terms_at is None:
+                self._data = self._head
+        return self._head
+
+    def term_type(self, term_type: str) -> Dict[str, Any]:
+        """ Terms of a type by their code, decoding the terms before it but none after """
+        if self._data is None:
+            self._decoded_head()
+        if self._data is not None:
+            return self._data.get("terms", dict()).get(term_type, dict())
+        terms, pos = _decode_members(self.raw, self._terms_at, term_type)
+        if pos is None:
+            return terms.get(term_type, dict())
+        try:
+            return _SCAN(self.raw, pos)[0]
+        except StopIteration as err:
+            raise json.JSONDecodeError("Expecting value", self.raw, err.value) from None
+
+    def __getitem__(self, key: str) -> Any:
+        if self._data is None and key != "terms":
+            head = self._decoded_head()
+            if key in head:
+                return head[key]
+        return self.data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.data if self.is_decoded else self.raw!r})"
@@ -0,0 +1,220 @@
+""" Client side pacing of throttled AWS APIs """
+import dataclasses
+import logging
+import random
+import threading
+import time
+import weakref
+from typing import Optional
+
+import botocore.exceptions
+from botocore.retries import standard
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# Clients are shared by the pool, their handlers are registered once per client.
+_PACED_CLIENTS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_RETRY_CLIENTS: "weakref.WeakSet" = weakref.WeakSet()
+_REGISTER_LOCK = threading.Lock()
+
+THROTTLING_ERROR_CODES = frozenset(
+    (
+        "Throttling",
+        "ThrottlingException",
+        "ThrottledException",
+        "TooManyRequestsException",
+        "RequestLimitExceeded",
+        "RequestThrottled",
+        "SlowDown",
+    )
+)
+
+
+def is_throttling_error(err: BaseException) -> bool:
+    """ Checks if an exception is a throttling response """
+    return (
+        isinstance(err, botocore.exceptions.ClientError)
+        and err.response.get("Error", dict()).get("Code") in THROTTLING_ERROR_CODES
+    )
+
+
+def jittered_backoff(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """ Seconds to wait before retry attempt, exponential with full jitter """
+    return random.uniform(0, min(cap, base * 2 ** attempt))  # nosec
+
+
+@dataclasses.dataclass()
+class AdaptiveRateLimiter:  # pylint: disable=too-many-instance-attributes
+    """
+    Token bucket whose rate halves on throttling and recovers additively on success.
+
+    Attach it to clients with ``attach``, every call then waits for a token and
+    throttling responses, including ones botocore retries itself, lower the rate.
+
+    Parameters
+    ----------
+    rate : float
+        Initial requests per second
+    max_rate : float
+        Upper bound the rate recovers to
+    min_rate : float
+        Lower bound the rate backs off to
+    burst : float
+        Bucket capacity, requests allowed back to back after idling
+    decrease_factor : float
+        Multiplier applied to the rate on throttling
+    increase : float
+        Requests per second regained per second of successful calls
+    """
+
+    rate: float = 5.0
+    max_rate: float = 10.0
+    min_rate: float = 0.2
+    burst: float = 5.0
+    decrease_factor: float = 0.5
+    increase: float = 0.5
+    _tokens: float = dataclasses.field(default=0.0, init=False, repr=False)
+    _updated: float = dataclasses.field(default_factory=time.monotonic, init=False, repr=False)
+    _lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        self._tokens = self.burst
+
+    @property
+    def current_rate(self) -> float:
+        """ Requests per second currently allowed """
+        return self.rate
+
+    def set_rate(self, rate: float, max_rate: Optional[float] = None):
+        """ Tune the rate, e.g. when running several processes against one account """
+        with self._lock:
+            if max_rate is not None:
+                self.max_rate = max_rate
+            self.rate = min(max(rate, self.min_rate), self.max_rate)
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        """ Block until tokens are available """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_throttle(self):
+        """ Back off after a throttling response """
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+        _LOGGER.debug("Throttled, lowering rate to %.2f requests/s", self.rate)
+
+    def on_success(self):
+        """ Recover rate after a successful call """
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.increase / max(self.rate, 1.0))
+
+    def _before_call(self, **_):
+        self.acquire()
+
+    def _needs_retry(self, response=None, **_):
+        if response and response[1].get("Error", dict()).get("Code") in THROTTLING_ERROR_CODES:
+            self.on_throttle()
+
+    def _after_call(self, http_response=None, **_):
+        if http_response is not None and http_response.status_code < 400:
+            self.on_success()
+
+    def attach(self, client):
+        """
+        Pace every call of a client.
+
+        A client is paced by the first limiter attached to it, attaching it again
+        or to another limiter, e.g. from objects sharing a pooled client, does nothing.
+        """
+        with _REGISTER_LOCK:
+            limiter = _PACED_CLIENTS.get(client)
+            if limiter is None:
+                _PACED_CLIENTS[client] = self
+        if limiter is not None:
+            if limiter is not self:
+                _LOGGER.debug("%r is already paced by %r", client, limiter)
+            return
+        service = client.meta.service_model.service_id.hyphenize()
+        events = client.meta.events
+        unique_id = f"boto_remora-ratelimit-{id(self)}"
+        events.register(
+            f"before-call.{service}", self._before_call, unique_id=f"{unique_id}-before"
+        )
+        events.register(
+            f"needs-retry.{service}", self._needs_retry, unique_id=f"{unique_id}-retry"
+        )
+        events.register(f"after-call.{service}", self._after_call, unique_id=f"{unique_id}-after")
+
+
+class _RetryConditions(standard.StandardRetryConditions):
+    """ botocore standard retry conditions, except for throttling errors """
+
+    def is_retryable(self, context):
+        if context.get_error_code() in THROTTLING_ERROR_CODES:
+            return False
+        return super().is_retryable(context)
+
+
+def retry_except_throttling(client, max_attempts: int = standard.DEFAULT_MAX_ATTEMPTS):
+    """
+    Replace the standard mode retry handler of client by one leaving throttling to the caller.
+
+    Transient, connection and modeled errors are still retried by botocore,
+    throttling errors are raised at once so the caller retries them paced by
+    a limiter. The client must use the standard retry mode. The handler is
+    replaced once per client, later calls for the same client do nothing.
+    """
+    with _REGISTER_LOCK:
+        if client in _RETRY_CLIENTS:
+            return
+        _RETRY_CLIENTS.add(client)
+    service = client.meta.service_model.service_id.hyphenize()
+    retry_quota = standard.RetryQuotaChecker(standard.quota.RetryQuota())
+    handler = standard.RetryHandler(
+        retry_policy=standard.RetryPolicy(
+            retry_checker=_RetryConditions(max_attempts=max_attempts),
+            retry_backoff=standard.ExponentialBackoff(),
+        ),
+        retry_event_adapter=standard.RetryEventAdapter(),
+        retry_quota=retry_quota,
+    )
+    events = client.meta.events
+    # botocore skips handlers whose unique_id is registered, remove its handler first
+    unique_id = f"retry-config-{service}"
+    events.unregister(f"needs-retry.{service}", unique_id=unique_id)
+    events.register(f"needs-retry.{service}", handler.needs_retry, unique_id=unique_id)
+    events.register(
+        f"after-call.{service}",
+        retry_quota.release_retry_quota,
+        unique_id=f"boto_remora-retry-quota-{service}",
+    )
+
+
+_DEFAULT_LIMITER = AdaptiveRateLimiter()
+
+
+def get_default_limiter() -> AdaptiveRateLimiter:
+    """ Process wide limiter shared by Pricing objects by default """
+    return _DEFAULT_LIMITER
+
+
+def set_default_limiter(limiter: AdaptiveRateLimiter):
+    """ Replace the process wide limiter """
+    global _DEFAULT_LIMITER  # pylint: disable=global-statement
+    _DEFAULT_LIMITER = limiter
@@ -21,3 +21,27 @@ class BotoRemoraPricingResourceKeyUndefined(BotoRemoraError, KeyError):
     """ Exception for attempting to a region without the pricing endpoint """
 
     fmt = "{} is not a defined ResourceKey."
+
+
+class BotoRemoraSnapshotError(BotoRemoraError, ValueError):
+    """ Exception for reading a file which is not a supported offers snapshot """
+
+    fmt = "{} is not a supported offers snapshot: {}"
+
+
+class BotoRemoraOfferFileError(BotoRemoraError, ValueError):
+    """ Exception for an offer file which can not be loaded """
+
+    fmt = "Unable to load offer file {}: {}"
+
+
+class BotoRemoraInvalidFilterValue(BotoRemoraError, ValueError):
+    """ Exception for filtering an attribute on a value the service does not have """
+
+    fmt = "{!r} is not a value of {} {}, close matches are {}."
+
+
+class BotoRemoraDaemonError(BotoRemoraError, RuntimeError):
+    """ Exception for a request the pricing daemon failed to answer """
+
+    fmt = "Pricing daemon at {} answered {}: {}"
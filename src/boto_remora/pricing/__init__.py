@@ -1,4 +1,29 @@
 """ boto_remora.pricing package for helper for AWS Pricing """
-from boto_remora.pricing.main import AWSResourceKeys
+from boto_remora.util import lazy_attributes
 
-from .main import Offer, Offers, ResourceKey
+
+__getattr__ = lazy_attributes(
+    __name__,
+    {
+        "CacheStats": ".budget",
+        "AttributeCatalog": ".catalog",
+        "PricingClient": ".client",
+        "PricingDaemon": ".daemon",
+        "Fleet": ".fleet",
+        "FleetCost": ".fleet",
+        "FleetResource": ".fleet",
+        "ResourceCost": ".fleet",
+        "AWSResourceKeys": ".main",
+        "Offer": ".main",
+        "Offers": ".main",
+        "ResourceKey": ".main",
+        "RefreshReport": ".refresh",
+        "PriceDimension": ".terms",
+        "Term": ".terms",
+        "Terms": ".terms",
+        "OfferTable": ".table",
+        "query": ".query",
+        "Range": ".query",
+        "Snapshot": ".snapshot",
+    },
+)
@@ -0,0 +1,66 @@
+""" Size accounting and statistics of the Offers partition cache """
+import dataclasses
+import itertools
+import logging
+import sys
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from .terms import Terms
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# Offers measured per partition, the size of the rest is extrapolated
+SAMPLE_SIZE = 64
+
+
+def offer_size(offer: Any) -> int:
+    """ Approximate bytes held by an offer, counting strings as unshared """
+    attributes = offer.attributes or dict()
+    # Only prices stored with the offer, derived ones are not held
+    prices = getattr(offer, "_prices", None)
+    prices = prices if isinstance(prices, dict) else dict()
+    return (
+        sys.getsizeof(offer)
+        + sys.getsizeof(getattr(offer, "__dict__", None) or ())
+        + sys.getsizeof(attributes)
+        + sum(map(sys.getsizeof, itertools.chain.from_iterable(attributes.items())))
+        + sys.getsizeof(prices)
+        + sum(map(sys.getsizeof, prices.values()))
+        + sum(map(sys.getsizeof, (offer.unit, offer.description, offer.sku)))
+        + sys.getsizeof(offer.terms)
+    )
+
+
+def partition_size(offers: Sequence[Any]) -> int:
+    """ Approximate bytes held by a partition's offers, extrapolated from a sample """
+    if not offers:
+        return sys.getsizeof(offers)
+    step = max(1, len(offers) // SAMPLE_SIZE)
+    sample = offers[::step] if isinstance(offers, (list, tuple)) else list(offers)[::step]
+    mean = sum(map(offer_size, sample)) / len(sample)
+    return sys.getsizeof(offers) + int(mean * len(offers))
+
+
+def watch_terms(offers: Iterable[Any], on_parse: Optional[Callable[[int], None]]):
+    """ Set the callback receiving the size change of offers' terms once parsed """
+    for offer_ in offers:
+        if isinstance(offer_.terms, Terms):
+            offer_.terms.on_parse = on_parse
+
+
+@dataclasses.dataclass()
+class CacheStats:
+    """ Counters of the Offers partition cache """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    partitions: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """ Share of get calls answered from the cache """
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
@@ -0,0 +1,161 @@
+""" Catalog of the attribute values of a pricing service for local filter checks """
+import dataclasses
+import difflib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional
+
+from boto_remora.aws import Pricing, ResponseCache
+from boto_remora.exception import BotoRemoraInvalidFilterValue
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _fold(value: str) -> str:
+    """ Case and whitespace insensitive form of a value """
+    return " ".join(str(value).split()).casefold()
+
+
+@dataclasses.dataclass()
+class AttributeCatalog:
+    """
+    Values of every attribute of a service, to check filters before calling the API.
+
+    Values are fetched per attribute on first use, or all at once and
+    concurrently with ``prefetch``. The catalog is persisted as a whole in cache
+    (default the cache of pricing, if any), so later processes load it with a
+    single lookup.
+
+    Attributes the service does not list are passed through unchecked. The
+    catalog is not refreshed, values published later are only known once
+    the cache entry expires and a new catalog is loaded.
+    """
+
+    servicecode: str
+    pricing: Optional[Pricing] = dataclasses.field(default=None, repr=False)
+    cache: Optional[ResponseCache] = dataclasses.field(default=None, repr=False)
+    max_workers: int = 8
+    _lock: threading.RLock = dataclasses.field(
+        default_factory=threading.RLock, init=False, repr=False, compare=False
+    )
+    # Canonical values by folded value, by attribute
+    _values: Dict[str, Dict[str, str]] = dataclasses.field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    def __post_init__(self):
+        if self.pricing is None:
+            self.pricing = Pricing()
+        if self.cache is None:
+            self.cache = self.pricing.cache
+        cached = self.cache.get(self._cache_key) if self.cache else None
+        for attr, values in (cached or dict()).items():
+            self._add(attr, values)
+
+    @property
+    def _cache_key(self) -> str:
+        return ResponseCache.make_key("attribute_catalog", self.servicecode)
+
+    @property
+    def attribute_names(self) -> FrozenSet[str]:
+        """ Attributes of the service """
+        return frozenset(self.pricing.services.get(self.servicecode, ()))
+
+    def _add(self, attr: str, values: Iterable[str]):
+        with self._lock:
+            self._values[attr] = {_fold(val_): val_ for val_ in values}
+
+    def _save(self):
+        if self.cache:
+            with self._lock:
+                catalog = {attr_: sorted(vals_.values()) for attr_, vals_ in self._values.items()}
+            self.cache.set(self._cache_key, catalog)
+
+    def prefetch(self, attributes: Optional[Iterable[str]] = None) -> Dict[str, Exception]:
+        """
+        Concurrently fetch the values of attributes not loaded yet.
+
+        Parameters
+        ----------
+        attributes : Iterable[str], optional
+            Attributes to load (default every attribute of the service)
+
+        Returns
+        -------
+        Dict[str, Exception]
+            Attributes which failed to load mapped to the raised exception.
+        """
+        names = self.attribute_names
+        attributes = names if attributes is None else frozenset(attributes) & names
+        with self._lock:
+            missing = sorted(attributes - self._values.keys())
+        failures = dict()
+        if not missing:
+            return failures
+
+        _LOGGER.debug("Fetching values of %s attributes of %s", len(missing), self.servicecode)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+            futures = {
+                executor.submit(self.pricing.attribute_values, self.servicecode, attr_): attr_
+                for attr_ in missing
+            }
+            for future in as_completed(futures):
+                attr = futures[future]
+                try:
+                    self._add(attr, future.result())
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.warning("Unable to load values of %s: %s", attr, err)
+                    failures[attr] = err
+
+        self._save()
+        return failures
+
+    def values(self, attribute: str) -> Optional[FrozenSet[str]]:
+        """ Values of an attribute, None if the service does not list the attribute """
+        self.prefetch((attribute,))
+        with self._lock:
+            values = self._values.get(attribute)
+        return frozenset(values.values()) if values is not None else None
+
+    def _canonical(self, attribute: str, value: str) -> Optional[str]:
+        """ Canonical spelling of value, the value itself if the attribute is unknown """
+        values = self._values.get(attribute)
+        if values is None:
+            return value
+        return values.get(_fold(value))
+
+    def validate(self, filter_kv: Mapping[str, str]) -> Dict[str, str]:
+        """
+        Filter with values in their canonical spelling, e.g. "linux" as "Linux".
+
+        Raises BotoRemoraInvalidFilterValue with close matches for a value the
+        service does not have.
+        """
+        self.prefetch(filter_kv)
+        normalized = dict()
+        with self._lock:
+            for attr, value in filter_kv.items():
+                canonical = self._canonical(attr, value)
+                if canonical is None:
+                    raise BotoRemoraInvalidFilterValue(
+                        value, self.servicecode, attr, self.suggest(attr, value)
+                    )
+                normalized[attr] = canonical
+        return normalized
+
+    def normalize(self, filter_kv: Mapping[str, str]) -> Optional[Dict[str, str]]:
+        """ Like ``validate`` but returns None when no offer can match the filter """
+        try:
+            return self.validate(filter_kv)
+        except BotoRemoraInvalidFilterValue as err:
+            _LOGGER.info("%s", err.args[-1])
+            return None
+
+    def suggest(self, attribute: str, value: str, count: int = 3) -> List[str]:
+        """ Values of an attribute close to value """
+        with self._lock:
+            values = self._values.get(attribute, dict())
+            matches = difflib.get_close_matches(_fold(value), values, n=count)
+            return [values[match_] for match_ in matches]
@@ -0,0 +1,151 @@
+""" ``boto-remora-pricing`` command to run and query the pricing daemon """
+import argparse
+import json
+import logging
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .client import DEFAULT_ADDRESS, PricingClient
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _filter(value: str) -> Tuple[str, str]:
+    """ attribute=value argument """
+    attr, sep, val = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"{value!r} is not attribute=value")
+    return attr, val
+
+
+def _range(value: str) -> Tuple[str, Tuple[Optional[float], Optional[float]]]:
+    """ attribute=low:high argument, either bound may be empty """
+    attr, sep, bounds = value.partition("=")
+    low, colon, high = bounds.partition(":")
+    if not sep or not colon:
+        raise argparse.ArgumentTypeError(f"{value!r} is not attribute=low:high")
+    return attr, (float(low) if low else None, float(high) if high else None)
+
+
+def _ranges(pairs: Optional[List[Tuple[str, Tuple]]]) -> Optional[Dict[str, Tuple]]:
+    return dict(pairs) if pairs else None
+
+
+def _add_query_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--region", help="region code, e.g. us-east-1")
+    parser.add_argument("--key", help="value of the resource key, e.g. m5.large")
+    parser.add_argument(
+        "--filter", dest="filters", action="append", type=_filter, metavar="ATTR=VALUE"
+    )
+    parser.add_argument(
+        "--range", dest="ranges", action="append", type=_range, metavar="ATTR=LOW:HIGH"
+    )
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="boto-remora-pricing", description=__doc__)
+    parser.add_argument(
+        "--address", help=f"Unix socket path or host:port (default {DEFAULT_ADDRESS})"
+    )
+    parser.add_argument("--resource-type", default="EC2", help="default EC2")
+    parser.add_argument("-v", "--verbose", action="count", default=0)
+    commands = parser.add_subparsers(dest="command", required=True)
+    # Options of the commands returning offers
+    offers = argparse.ArgumentParser(add_help=False)
+    offers.add_argument("--terms", action="store_true", help="include the terms of offers")
+
+    serve = commands.add_parser("serve", help="run the daemon")
+    serve.add_argument(
+        "--refresh-interval", type=float, default=3600.0, help="seconds, 0 disables"
+    )
+    serve.add_argument("--snapshot-dir", help="load snapshots from and save them to")
+    serve.add_argument("--warm-region", action="append", help="region to prefetch before serving")
+    serve.add_argument("--warm-key", action="append", help="key to prefetch (default every key)")
+
+    commands.add_parser("health", help="daemon status")
+    commands.add_parser("stats", help="cache counters")
+    commands.add_parser("refresh", help="refresh stale partitions now")
+
+    get = commands.add_parser("get", parents=[offers], help="offers of a region and key")
+    get.add_argument("region")
+    get.add_argument("key")
+
+    query = commands.add_parser(
+        "query", parents=[offers], help="cached offers matching filters and ranges"
+    )
+    _add_query_arguments(query)
+    query.add_argument("--limit", type=int)
+
+    cheapest = commands.add_parser("cheapest", parents=[offers], help="cheapest cached offers")
+    _add_query_arguments(cheapest)
+    cheapest.add_argument("-k", type=int, default=1)
+    cheapest.add_argument("--price-type", default="OnDemand")
+    cheapest.add_argument(
+        "--term",
+        dest="term_attributes",
+        action="append",
+        type=_filter,
+        metavar="ATTR=VALUE",
+        help="argument of Offer.price, e.g. lease_contract_length=1yr or unit=Hrs",
+    )
+    return parser
+
+
+def _serve(args: argparse.Namespace):
+    from .daemon import PricingDaemon  # pylint: disable=import-outside-toplevel
+
+    daemon = PricingDaemon(
+        address=args.address,
+        refresh_interval=args.refresh_interval or None,
+        snapshot_dir=args.snapshot_dir,
+    )
+    if args.warm_region:
+        daemon.warm(args.resource_type, regions=args.warm_region, keys=args.warm_key)
+    daemon.serve_forever()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """ Entry point of the boto-remora-pricing command """
+    args = _parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING - 10 * min(args.verbose, 2))
+    if args.command == "serve":
+        _serve(args)
+        return 0
+
+    with PricingClient(address=args.address, resource_type=args.resource_type) as client:
+        if args.command == "health":
+            result = client.health()
+        elif args.command == "stats":
+            result = client.stats()
+        elif args.command == "refresh":
+            result = client.refresh()
+        elif args.command == "get":
+            result = client.get(args.region, args.key, terms=args.terms)
+        elif args.command == "query":
+            result = client.filter_cached(
+                filters=args.filters,
+                region=args.region,
+                key=args.key,
+                ranges=_ranges(args.ranges),
+                terms=args.terms,
+                limit=args.limit,
+            )
+        else:
+            result = client.cheapest(
+                k=args.k,
+                price_type=args.price_type,
+                filters=args.filters,
+                ranges=_ranges(args.ranges),
+                region=args.region,
+                key=args.key,
+                terms=args.terms,
+                term_attributes=dict(args.term_attributes or ()),
+            )
+    json.dump(result, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
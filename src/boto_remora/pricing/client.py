@@ -0,0 +1,202 @@
+"""
+Client of the pricing daemon, see ``boto_remora.pricing.daemon``.
+
+Only the standard library is imported, so clients start without boto3.
+"""
+import dataclasses
+import http.client
+import json
+import logging
+import os
+import socket
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from boto_remora.exception import BotoRemoraDaemonError
+
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = "127.0.0.1:8787"
+ADDRESS_ENV = "BOTO_REMORA_PRICING_DAEMON"
+# POST requests which only read offers, safe to send again
+_READ_ONLY_PATHS = frozenset(("/get", "/query", "/cheapest"))
+
+
+def parse_address(address: Optional[str] = None) -> Union[str, Tuple[str, int]]:
+    """
+    Unix socket path or (host, port) of a daemon address.
+
+    Addresses containing a "/" are socket paths, others are "host:port". The
+    default is the BOTO_REMORA_PRICING_DAEMON environment variable, else
+    DEFAULT_ADDRESS.
+    """
+    address = address or os.environ.get(ADDRESS_ENV) or DEFAULT_ADDRESS
+    if "/" in address:
+        return address
+    host, _, port = address.rpartition(":")
+    return (host or "127.0.0.1", int(port))
+
+
+class _TCPHTTPConnection(http.client.HTTPConnection):
+    """ HTTP connection sending small requests without delay """
+
+    def connect(self):
+        super().connect()
+        # Headers and body are separate writes, Nagle would delay every request
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """ HTTP connection over a Unix socket """
+
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+@dataclasses.dataclass()
+class PricingClient:
+    """
+    Client of a running pricing daemon.
+
+    A keep-alive connection is held per thread, so repeated lookups only cost
+    a local round trip and JSON decoding. Offers are returned as dicts with
+    the fields of ``Offer``, terms included when requested. Query options are
+    keyword only.
+
+    Parameters
+    ----------
+    address : str, optional
+        Unix socket path or "host:port" (default BOTO_REMORA_PRICING_DAEMON or
+        DEFAULT_ADDRESS)
+    resource_type : str
+        Resource type queried when calls do not name one (default "EC2")
+    timeout : float
+        Socket timeout in seconds (default 30)
+    """
+
+    address: Optional[str] = None
+    resource_type: str = "EC2"
+    timeout: float = 30.0
+    _local: threading.local = dataclasses.field(
+        default_factory=threading.local, init=False, repr=False, compare=False
+    )
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            address = parse_address(self.address)
+            if isinstance(address, str):
+                conn = _UnixHTTPConnection(address, timeout=self.timeout)
+            else:
+                conn = _TCPHTTPConnection(*address, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """ Close the connection of the calling thread """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+        body = None if payload is None else json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json"} if body is not None else dict()
+        # A kept-alive connection closed by the daemon fails once, requests which
+        # are safe to repeat are retried on a new one. A refresh may have run.
+        attempts = 2 if method == "GET" or path in _READ_ONLY_PATHS else 1
+        for attempt in range(attempts):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (ConnectionError, http.client.HTTPException):
+                self.close()
+                if attempt == attempts - 1:
+                    raise
+        document = json.loads(data) if data else None
+        if response.status >= 400:
+            message = document.get("error") if isinstance(document, dict) else data
+            raise BotoRemoraDaemonError(self.address or parse_address(), response.status, message)
+        return document
+
+    def health(self) -> Dict[str, Any]:
+        """ Status, uptime and last background refresh of the daemon """
+        return self._request("GET", "/health")
+
+    def stats(self) -> Dict[str, Any]:
+        """ Cache counters by resource type """
+        return self._request("GET", "/stats")
+
+    def get(
+        self, region: str, key: str, resource_type: Optional[str] = None, terms: bool = False
+    ) -> List[Dict[str, Any]]:
+        """ Offers of a region and key, see ``Offers.get`` """
+        payload = dict(region=region, key=key, terms=terms)
+        return self._post("/get", resource_type, payload)
+
+    def filter_cached(
+        self,
+        filters: Optional[Union[Sequence[Sequence[str]], Dict[str, str]]] = None,
+        *,
+        region: Optional[str] = None,
+        key: Optional[str] = None,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        resource_type: Optional[str] = None,
+        terms: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """ Offers matching filters and (low, high) ranges, see ``Offers.filter_cached`` """
+        payload = dict(
+            filters=filters, region=region, key=key, ranges=ranges, terms=terms, limit=limit
+        )
+        return self._post("/query", resource_type, payload)
+
+    def cheapest(
+        self,
+        k: int = 1,
+        *,
+        price_type: str = "OnDemand",
+        filters: Optional[Union[Sequence[Sequence[str]], Dict[str, str]]] = None,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        region: Optional[str] = None,
+        key: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        terms: bool = False,
+        term_attributes: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """ k cheapest offers, see ``Offers.cheapest`` """
+        payload = dict(
+            k=k,
+            price_type=price_type,
+            filters=filters,
+            ranges=ranges,
+            region=region,
+            key=key,
+            terms=terms,
+            term_attributes=term_attributes,
+        )
+        return self._post("/cheapest", resource_type, payload)
+
+    def refresh(self, resource_type: Optional[str] = None) -> Dict[str, Any]:
+        """ Refresh stale partitions now, see ``Offers.refresh`` """
+        return self._post("/refresh", resource_type, dict())
+
+    def _post(self, path: str, resource_type: Optional[str], payload: Dict[str, Any]) -> Any:
+        payload["resource_type"] = resource_type or self.resource_type
+        return self._request("POST", path, payload)
@@ -0,0 +1,373 @@
+"""
+Long-running process answering price queries from warm Offers.
+
+The daemon speaks JSON over HTTP/1.1 on localhost or a Unix socket, use
+``boto_remora.pricing.client.PricingClient`` or the ``boto-remora-pricing``
+command to query it.
+
+=========  ====================  ==================================================
+Method     Path                  Answer
+=========  ====================  ==================================================
+GET        /health               status, uptime and background refresh outcome
+GET        /stats                ``Offers.cache_stats`` by resource type
+POST       /get                  ``Offers.get`` of region and key
+POST       /query                ``Offers.filter_cached`` of filters and ranges
+POST       /cheapest             ``Offers.cheapest``
+POST       /refresh              ``Offers.refresh`` of stale partitions, now
+=========  ====================  ==================================================
+
+POST bodies are JSON objects of the method arguments plus ``resource_type``
+(default "EC2"), and ``terms`` to include the terms of each offer.
+"""
+import dataclasses
+import json
+import logging
+import os
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from boto_remora.aws import Pricing
+from boto_remora.exception import BotoRemoraPricingResourceKeyUndefined
+
+from .client import parse_address
+from .main import AWSResourceKeys, Offer, Offers
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def offer_to_dict(offer: Offer, terms: bool = False) -> Dict[str, Any]:
+    """
+    Fields of an offer with prices derived from its terms, and its terms as
+    returned by the API when terms is set
+    """
+    document = {
+        field_.name: getattr(offer, field_.name)
+        for field_ in dataclasses.fields(offer)
+        if field_.name != "terms"
+    }
+    if terms:
+        document["terms"] = offer.terms.to_dict()
+    return document
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """ Route requests to the PricingDaemon of the server """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "boto-remora-pricing"
+    # Headers and body are separate writes, Nagle would delay the body of every reply
+    disable_nagle_algorithm = True
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return str(self.client_address or "unix")
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        _LOGGER.debug("%s %s", self.address_string(), format % args)
+
+    def _reply(self, status: int, document: Any):
+        body = json.dumps(document, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, routes: Dict[str, Callable[[Dict[str, Any]], Any]]):
+        route = routes.get(self.path)
+        if route is None:
+            self._reply(404, {"error": f"No route {self.command} {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length)) if length else dict()
+            if not isinstance(payload, dict):
+                raise TypeError("Request body must be a JSON object")
+            document = route(payload)
+        except (KeyError, TypeError, ValueError) as err:
+            self._reply(400, {"error": str(err.args[-1] if err.args else err)})
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.exception("Failed to answer %s %s", self.command, self.path)
+            self._reply(500, {"error": str(err.args[-1] if err.args else err)})
+        else:
+            self._reply(200, document)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """ Answer GET requests """
+        daemon = self.server.pricing_daemon
+        self._dispatch({"/health": daemon.health, "/stats": daemon.stats})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """ Answer POST requests """
+        daemon = self.server.pricing_daemon
+        self._dispatch(
+            {
+                "/get": daemon.get,
+                "/query": daemon.query,
+                "/cheapest": daemon.cheapest,
+                "/refresh": daemon.refresh,
+            }
+        )
+
+
+class _UnixHandler(_Handler):
+    """ Handler of Unix socket requests, which have no Nagle algorithm to disable """
+
+    disable_nagle_algorithm = False
+
+
+class _DaemonServerMixIn:  # pylint: disable=too-few-public-methods
+    """ Server whose handlers answer with a PricingDaemon """
+
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class, pricing_daemon: "PricingDaemon"):
+        self.pricing_daemon = pricing_daemon
+        super().__init__(server_address, handler_class)
+
+
+class _TCPHTTPServer(_DaemonServerMixIn, ThreadingHTTPServer):
+    """ Threaded HTTP server on localhost """
+
+
+class _UnixHTTPServer(
+    _DaemonServerMixIn, socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    """ Threaded HTTP server on a Unix socket """
+
+
+@dataclasses.dataclass()
+class PricingDaemon:  # pylint: disable=too-many-instance-attributes
+    """
+    Server holding one warm Offers per resource type.
+
+    Offers are created on first use, loaded from ``<snapshot_dir>/<type>.snapshot``
+    when present, and saved there on ``stop``. A background thread refreshes
+    stale partitions every refresh_interval seconds; partitions loaded from a
+    snapshot are fetched again once their price list version changed or they
+    are older than refresh_interval.
+
+    Parameters
+    ----------
+    address : str, optional
+        Unix socket path or "host:port" to listen on (default as the client)
+    pricing : Pricing, optional
+        Pricing client shared by every Offers
+    refresh_interval : float, optional
+        Seconds between background refreshes, None disables them (default 3600)
+    snapshot_dir : str, optional
+        Directory of the snapshots loaded on first use and saved on stop
+    """
+
+    address: Optional[str] = None
+    pricing: Optional[Pricing] = dataclasses.field(default=None, repr=False)
+    refresh_interval: Optional[float] = 3600.0
+    snapshot_dir: Optional[str] = None
+    started_at: Optional[float] = dataclasses.field(default=None, init=False)
+    last_refresh: Optional[float] = dataclasses.field(default=None, init=False)
+    refresh_error: Optional[str] = dataclasses.field(default=None, init=False)
+    _offers: Dict[str, Offers] = dataclasses.field(default_factory=dict, init=False, repr=False)
+    _lock: threading.RLock = dataclasses.field(
+        default_factory=threading.RLock, init=False, repr=False, compare=False
+    )
+    _server: Any = dataclasses.field(default=None, init=False, repr=False, compare=False)
+    _stopping: threading.Event = dataclasses.field(
+        default_factory=threading.Event, init=False, repr=False, compare=False
+    )
+    _threads: List[threading.Thread] = dataclasses.field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+
+    def _snapshot_path(self, resource_type: str) -> Optional[str]:
+        if self.snapshot_dir is None:
+            return None
+        return os.path.join(self.snapshot_dir, f"{resource_type}.snapshot")
+
+    def offers(self, resource_type: str = "EC2") -> Offers:
+        """ Offers of a resource type, created on first use """
+        with self._lock:
+            offers = self._offers.get(resource_type)
+            if offers is None:
+                if not hasattr(AWSResourceKeys, resource_type):
+                    raise BotoRemoraPricingResourceKeyUndefined(resource_type)
+                if self.pricing is None:
+                    self.pricing = Pricing()
+                path = self._snapshot_path(resource_type)
+                if path and os.path.exists(path):
+                    _LOGGER.info("Loading %s offers from %s", resource_type, path)
+                    offers = Offers.load_snapshot(path, aws_pricing=self.pricing)
+                else:
+                    offers = Offers(resource_type, aws_pricing=self.pricing)
+                self._offers[resource_type] = offers
+        return offers
+
+    def warm(
+        self,
+        resource_type: str = "EC2",
+        regions: Optional[Iterable[str]] = None,
+        keys: Optional[Iterable[str]] = None,
+        max_workers: int = 8,
+    ):
+        """ Prefetch partitions before serving, see ``Offers.prefetch`` """
+        failures = self.offers(resource_type).prefetch(
+            regions=regions, keys=keys, max_workers=max_workers
+        )
+        for partition, err in failures.items():
+            _LOGGER.warning("Unable to warm %s %s: %s", resource_type, partition, err)
+
+    def health(self, _payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """ Status, uptime and outcome of the last background refresh """
+        with self._lock:
+            resource_types = sorted(self._offers)
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "uptime": time.time() - self.started_at if self.started_at else 0.0,
+            "resource_types": resource_types,
+            "last_refresh": self.last_refresh,
+            "refresh_error": self.refresh_error,
+        }
+
+    def stats(self, _payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """ Cache counters and hit ratio by resource type """
+        with self._lock:
+            offers = dict(self._offers)
+        stats = dict()
+        for resource_type, offers_ in offers.items():
+            cache_stats = offers_.cache_stats
+            stats[resource_type] = dict(
+                dataclasses.asdict(cache_stats), hit_ratio=cache_stats.hit_ratio
+            )
+        return stats
+
+    @staticmethod
+    def _documents(offers: Sequence[Offer], payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        limit = payload.get("limit")
+        terms = bool(payload.get("terms"))
+        return [offer_to_dict(offer_, terms) for offer_ in offers[:limit]]
+
+    def get(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """ Answer a /get request """
+        offers = self.offers(payload.get("resource_type", "EC2"))
+        return self._documents(offers.get(payload["region"], payload["key"]), payload)
+
+    def query(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """ Answer a /query request """
+        offers = self.offers(payload.get("resource_type", "EC2"))
+        matches = offers.filter_cached(
+            filters=payload.get("filters"),
+            region=payload.get("region"),
+            key=payload.get("key"),
+            ranges=payload.get("ranges"),
+        )
+        return self._documents(list(matches), payload)
+
+    def cheapest(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """ Answer a /cheapest request """
+        offers = self.offers(payload.get("resource_type", "EC2"))
+        matches = offers.cheapest(
+            k=int(payload.get("k", 1)),
+            price_type=payload.get("price_type", "OnDemand"),
+            filters=payload.get("filters"),
+            ranges=payload.get("ranges"),
+            region=payload.get("region"),
+            key=payload.get("key"),
+            term_attributes=payload.get("term_attributes"),
+        )
+        return self._documents(matches, payload)
+
+    def refresh(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """ Answer a /refresh request, refreshing partitions older than refresh_interval """
+        offers = self.offers(payload.get("resource_type", "EC2"))
+        report = offers.refresh(max_age=self.refresh_interval)
+        return {
+            "checked": len(report.checked),
+            "refreshed": len(report.refreshed),
+            "added": len(report.added),
+            "removed": len(report.removed),
+            "changed": len(report.changed),
+            "failures": {"/".join(part_): str(err_) for part_, err_ in report.failures.items()},
+        }
+
+    def _refresh_loop(self):
+        while not self._stopping.wait(self.refresh_interval):
+            with self._lock:
+                resource_types = sorted(self._offers)
+            errors = list()
+            for resource_type in resource_types:
+                try:
+                    report = self.refresh(dict(resource_type=resource_type))
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.warning("Refresh of %s offers failed: %s", resource_type, err)
+                    errors.append(f"{resource_type}: {err}")
+                    continue
+                _LOGGER.info("Refreshed %s offers: %s", resource_type, report)
+                errors.extend(f"{resource_type} {failure_}" for failure_ in report["failures"])
+            self.last_refresh = time.time()
+            self.refresh_error = "; ".join(errors) or None
+
+    def start(self):
+        """ Listen on address and refresh in the background, without blocking """
+        address = parse_address(self.address)
+        if isinstance(address, str):
+            # A socket left by a daemon which did not stop cleanly
+            if os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+                os.unlink(address)
+            self._server = _UnixHTTPServer(address, _UnixHandler, self)
+            os.chmod(address, 0o600)
+        else:
+            self._server = _TCPHTTPServer(address, _Handler, self)
+        self.started_at = time.time()
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(
+                target=self._server.serve_forever, name="pricing-daemon", daemon=True
+            )
+        ]
+        if self.refresh_interval:
+            self._threads.append(
+                threading.Thread(target=self._refresh_loop, name="pricing-refresh", daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+        _LOGGER.info("Pricing daemon listening on %s", address)
+
+    @property
+    def server_address(self) -> Any:
+        """ Address the daemon listens on, e.g. with the port picked for port 0 """
+        return self._server.server_address if self._server else None
+
+    def stop(self):
+        """ Stop serving and save snapshots when snapshot_dir is set """
+        self._stopping.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            if isinstance(self._server.server_address, str):
+                os.unlink(self._server.server_address)
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = list()
+        if self.snapshot_dir is not None:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            with self._lock:
+                offers = dict(self._offers)
+            for resource_type, offers_ in offers.items():
+                offers_.save_snapshot(self._snapshot_path(resource_type))
+
+    def serve_forever(self):
+        """ Start and block until interrupted """
+        self.start()
+        try:
+            while not self._stopping.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            _LOGGER.info("Stopping pricing daemon")
+        finally:
+            self.stop()
@@ -0,0 +1,290 @@
+""" Cost of running EC2 instances and EBS volumes from their inventory and cached offers """
+import dataclasses
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from boto_remora.aws import Ec2, FanOut, Target
+
+from .main import Offer, Offers
+from .query import offer_price
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# Hours in a month as used by the AWS pricing pages
+HOURS_PER_MONTH = 730
+
+INSTANCE = "instance"
+VOLUME = "volume"
+
+# Pricing tenancy by EC2 Placement.Tenancy
+_TENANCIES = {"default": "Shared", "dedicated": "Dedicated", "host": "Host"}
+
+# Pricing volumeType by EC2 VolumeType, the API name is matched on volumeApiName
+_VOLUME_TYPES = {
+    "gp2": "General Purpose",
+    "gp3": "General Purpose",
+    "io1": "Provisioned IOPS",
+    "io2": "Provisioned IOPS",
+    "st1": "Throughput Optimized HDD",
+    "sc1": "Cold HDD",
+    "standard": "Magnetic",
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class FleetResource:
+    """
+    An instance or volume of the inventory.
+
+    ``key`` is the value of the Offers resource key, the instance type or the
+    pricing volume type, and ``match`` the attribute values the offer must
+    have within the (region, key) partition.
+    """
+
+    kind: str
+    resource_id: str
+    region: str
+    key: str
+    match: Tuple[Tuple[str, str], ...] = ()
+    # Size in GiB of a volume, 1 for an instance
+    quantity: float = 1.0
+    account: Optional[str] = None
+    # Why the resource cannot be priced from the price list, e.g. spot instances
+    unpriced: Optional[str] = None
+
+    @classmethod
+    def from_instance(
+        cls, instance: Dict[str, Any], region: str, account: Optional[str] = None
+    ) -> "FleetResource":
+        """ Resource of a describe_instances item """
+        operation = instance.get("UsageOperation") or (
+            "RunInstances:0002" if instance.get("Platform") == "windows" else "RunInstances"
+        )
+        tenancy = instance.get("Placement", dict()).get("Tenancy", "default")
+        lifecycle = instance.get("InstanceLifecycle")
+        return cls(
+            kind=INSTANCE,
+            resource_id=instance["InstanceId"],
+            region=region,
+            key=instance["InstanceType"],
+            match=(("operation", operation), ("tenancy", _TENANCIES.get(tenancy, tenancy))),
+            account=account,
+            unpriced=f"{lifecycle} instance" if lifecycle else None,
+        )
+
+    @classmethod
+    def from_volume(
+        cls, volume: Dict[str, Any], region: str, account: Optional[str] = None
+    ) -> "FleetResource":
+        """ Resource of a describe_volumes item """
+        api_name = volume["VolumeType"]
+        return cls(
+            kind=VOLUME,
+            resource_id=volume["VolumeId"],
+            region=region,
+            key=_VOLUME_TYPES.get(api_name, api_name),
+            match=(("volumeApiName", api_name),),
+            quantity=float(volume.get("Size", 0)),
+            account=account,
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class ResourceCost:
+    """ Cost of a resource, None when it has no matching offer """
+
+    resource: FleetResource
+    offer: Optional[Offer] = dataclasses.field(default=None, repr=False)
+    hourly: Optional[float] = None
+
+    @property
+    def monthly(self) -> Optional[float]:
+        """ Cost of a month of HOURS_PER_MONTH hours """
+        return None if self.hourly is None else self.hourly * HOURS_PER_MONTH
+
+    @property
+    def priced(self) -> bool:
+        """ Checks if the cost is known """
+        return self.hourly is not None
+
+
+@dataclasses.dataclass()
+class FleetCost:
+    """ Aggregated hourly cost of a fleet by region, kind and key """
+
+    hourly: float = 0.0
+    resources: int = 0
+    unpriced: List[FleetResource] = dataclasses.field(default_factory=list, repr=False)
+    by_region: Dict[str, float] = dataclasses.field(
+        default_factory=lambda: defaultdict(float), repr=False
+    )
+    by_key: Dict[Tuple[str, str], float] = dataclasses.field(
+        default_factory=lambda: defaultdict(float), repr=False
+    )
+
+    @property
+    def monthly(self) -> float:
+        """ Cost of a month of HOURS_PER_MONTH hours """
+        return self.hourly * HOURS_PER_MONTH
+
+    def add(self, cost: ResourceCost):
+        """ Account for the cost of a resource """
+        self.resources += 1
+        if not cost.priced:
+            self.unpriced.append(cost.resource)
+            return
+        self.hourly += cost.hourly
+        self.by_region[cost.resource.region] += cost.hourly
+        self.by_key[(cost.resource.kind, cost.resource.key)] += cost.hourly
+
+
+def _offer_index(offers: Sequence[Offer], attributes: Sequence[str]) -> Dict[Tuple, Offer]:
+    """ Offers of a partition by their values of attributes, first offer wins """
+    index = dict()
+    for offer in offers:
+        if offer.attributes.get("capacitystatus", "Used") != "Used":
+            continue
+        index.setdefault(tuple(offer.attributes.get(attr_) for attr_ in attributes), offer)
+    return index
+
+
+@dataclasses.dataclass()
+class Fleet:
+    """
+    Cost of the running instances and EBS volumes of the targets of a FanOut.
+
+    Inventory is fetched concurrently per profile and region with paginated
+    describe calls. Each region is priced as its inventory arrives: only the
+    distinct (region, instance type) and (region, volume type) partitions it
+    uses are prefetched, then every resource is joined to its offer through a
+    hash index of the partition. Instances are matched on the
+    ``operation`` (UsageOperation) and ``tenancy`` attributes, volumes on
+    ``volumeApiName``. Volumes are priced for storage only, provisioned IOPS
+    and throughput are not included.
+
+    Parameters
+    ----------
+    fanout : FanOut, optional
+        Profiles and regions to inventory (default every authenticated profile
+        and its enabled regions)
+    instances : Offers, optional
+        Offers of EC2 instances (default Offers("EC2"))
+    volumes : Offers, optional
+        Offers of EBS volumes (default Offers("EBS"))
+    states : Sequence[str]
+        Instance states to price (default running)
+    include_volumes : bool
+        Price EBS volumes too (default True)
+    max_workers : int
+        Maximum number of concurrent price list requests per region (default 8)
+    """
+
+    fanout: Optional[FanOut] = dataclasses.field(default=None, repr=False)
+    instances: Optional[Offers] = dataclasses.field(default=None, repr=False)
+    volumes: Optional[Offers] = dataclasses.field(default=None, repr=False)
+    states: Sequence[str] = ("running",)
+    include_volumes: bool = True
+    max_workers: int = 8
+
+    def __post_init__(self):
+        if self.fanout is None:
+            self.fanout = FanOut()
+        if self.instances is None:
+            self.instances = Offers("EC2")
+        if self.volumes is None:
+            self.volumes = Offers("EBS", aws_pricing=self.instances.pricing)
+
+    def describe(self, target: Target) -> List[FleetResource]:
+        """ Inventory of a target """
+        ec2 = Ec2(
+            target.profile_name, target.region_name, session=target.session, pool=target.pool
+        )
+        filters = {"instance-state-name": list(self.states)} if self.states else None
+        resources = [
+            FleetResource.from_instance(instance_, target.region_name, target.account)
+            for instance_ in ec2.iter_instances(filters)
+        ]
+        if self.include_volumes:
+            resources.extend(
+                FleetResource.from_volume(volume_, target.region_name, target.account)
+                for volume_ in ec2.iter_volumes()
+            )
+        return resources
+
+    def iter_inventory(self) -> Iterator[List[FleetResource]]:
+        """ Yield the inventory of each target as it finishes, failures are logged """
+        for result in self.fanout.run(self.describe):
+            if result.ok:
+                yield result.value
+            else:
+                _LOGGER.warning("Unable to inventory %s: %s", result.target, result.error)
+
+    def _offers(self, kind: str) -> Offers:
+        return self.instances if kind == INSTANCE else self.volumes
+
+    def _prefetch(self, resources: Sequence[FleetResource]):
+        """ Load the distinct partitions used by resources, one prefetch per region """
+        keys: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        for resource in resources:
+            if resource.unpriced is None:
+                keys[(resource.kind, resource.region)].add(resource.key)
+        for (kind, region), region_keys in keys.items():
+            failures = self._offers(kind).prefetch(
+                regions=(region,), keys=sorted(region_keys), max_workers=self.max_workers
+            )
+            for partition, err in failures.items():
+                _LOGGER.warning("Unable to load %s offers of %s: %s", kind, partition, err)
+
+    def price(self, resources: Iterable[FleetResource]) -> Iterator[ResourceCost]:
+        """ Yield the cost of each resource, prefetching the offers they need first """
+        resources = list(resources)
+        self._prefetch(resources)
+        indexes: Dict[Tuple[str, str, str, Tuple[str, ...]], Dict[Tuple, Offer]] = dict()
+        for resource in resources:
+            if resource.unpriced is not None:
+                yield ResourceCost(resource)
+                continue
+            attributes = tuple(attr_ for attr_, _ in resource.match)
+            partition = (resource.kind, resource.region, resource.key, attributes)
+            index = indexes.get(partition)
+            if index is None:
+                offers = self._offers(resource.kind)
+                try:
+                    partition_offers = offers.get(resource.region, resource.key)
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.debug("No offers for %s: %s", partition, err)
+                    partition_offers = ()
+                index = indexes[partition] = _offer_index(partition_offers, attributes)
+            offer = index.get(tuple(val_ for _, val_ in resource.match))
+            if offer is None:
+                _LOGGER.debug("No offer matches %s", resource)
+                yield ResourceCost(resource)
+                continue
+            price = offer_price(offer)
+            if price is not None and resource.kind == VOLUME:
+                # Storage is priced per GB-month
+                price = price * resource.quantity / HOURS_PER_MONTH
+            yield ResourceCost(resource, offer, price)
+
+    def iter_costs(
+        self, inventory: Optional[Iterable[Iterable[FleetResource]]] = None
+    ) -> Iterator[ResourceCost]:
+        """
+        Yield the cost of every resource, one batch of the inventory at a time.
+
+        Parameters
+        ----------
+        inventory : Iterable[Iterable[FleetResource]], optional
+            Batches of resources (default ``iter_inventory``, a batch per target)
+        """
+        for batch in self.iter_inventory() if inventory is None else inventory:
+            yield from self.price(batch)
+
+    def total(self, costs: Optional[Iterable[ResourceCost]] = None) -> FleetCost:
+        """ Aggregate costs (default ``iter_costs``) without keeping them """
+        fleet_cost = FleetCost()
+        for cost in self.iter_costs() if costs is None else costs:
+            fleet_cost.add(cost)
+        return fleet_cost
@@ -0,0 +1,141 @@
+""" Inverted attribute index over cached offers """
+import dataclasses
+import logging
+from collections import defaultdict
+from itertools import count
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+from .query import Range, RangeIndex
+
+
+_LOGGER = logging.getLogger(__name__)
+
+Partition = Tuple[str, str]
+
+
+@dataclasses.dataclass()
+class OfferIndex:
+    """
+    Maps attribute -> value -> offer ids for equality lookups.
+
+    Offers are added and removed a (region, key) partition at a time. Ids grow
+    monotonically, so sorting ids returns offers in the order they were cached.
+    Numeric range indexes are kept per partition, so adding or removing one
+    never rebuilds the others. Callers are responsible for locking.
+    """
+
+    _offers: Dict[int, Any] = dataclasses.field(default_factory=dict, repr=False)
+    _postings: Dict[str, Dict[str, Set[int]]] = dataclasses.field(
+        default_factory=lambda: defaultdict(lambda: defaultdict(set)), repr=False
+    )
+    _partitions: Dict[Partition, Set[int]] = dataclasses.field(default_factory=dict, repr=False)
+    _ids: Iterator[int] = dataclasses.field(default_factory=count, repr=False)
+    # Numeric indexes by attribute and partition, built on the first range query of a partition
+    _ranges: Dict[str, Dict[Partition, RangeIndex]] = dataclasses.field(
+        default_factory=lambda: defaultdict(dict), repr=False
+    )
+
+    def __len__(self):
+        return len(self._offers)
+
+    def add_partition(self, region: str, key: str, offers: Iterable[Any]):
+        """ Index offers of a partition, replacing what was indexed for it before """
+        self.remove_partition(region, key)
+        ids = set()
+        for offer in offers:
+            id_ = next(self._ids)
+            self._offers[id_] = offer
+            ids.add(id_)
+            for attr, val in (offer.attributes or dict()).items():
+                self._postings[attr][val].add(id_)
+        self._partitions[(region, key)] = ids
+
+    def remove_partition(self, region: str, key: str):
+        """ Drop offers of a partition from the index """
+        ids = self._partitions.pop((region, key), set())
+        for indexes in self._ranges.values():
+            indexes.pop((region, key), None)
+        for id_ in ids:
+            offer = self._offers.pop(id_)
+            for attr, val in (offer.attributes or dict()).items():
+                values = self._postings[attr]
+                values[val].discard(id_)
+                if not values[val]:
+                    del values[val]
+
+    def _scope(self, region: Optional[str], key: Optional[str]) -> List[Partition]:
+        """ Partitions of region and key, any when None """
+        return [
+            partition_
+            for partition_ in self._partitions
+            if (region is None or region == partition_[0])
+            and (key is None or key == partition_[1])
+        ]
+
+    def range_index(self, attr: str, partition: Partition) -> RangeIndex:
+        """ Numeric index of an attribute over the offers of a partition """
+        index = self._ranges[attr].get(partition)
+        if index is None:
+            postings = defaultdict(list)
+            for id_ in self._partitions[partition]:
+                val = (self._offers[id_].attributes or dict()).get(attr)
+                if val is not None:
+                    postings[val].append(id_)
+            index = self._ranges[attr][partition] = RangeIndex.build(postings.items())
+            _LOGGER.debug(
+                "Built range index of %s over %s offers of %s", attr, len(index), partition
+            )
+        return index
+
+    def search_ids(
+        self,
+        filters: Sequence[Tuple[str, str]],
+        region: Optional[str] = None,
+        key: Optional[str] = None,
+        ranges: Optional[Mapping[str, Range]] = None,
+    ) -> List[int]:
+        """ Ids of offers matching every filter and numeric range, in cache order """
+        candidates = list()
+        for attr, val in filters:
+            ids = self._postings.get(attr, dict()).get(val)
+            if not ids:
+                return list()
+            candidates.append(ids)
+        scope = self._scope(region, key)
+        for attr, rng in (ranges or dict()).items():
+            ids = set()
+            for partition in scope:
+                ids |= self.range_index(attr, partition).search(rng)
+            if not ids:
+                return list()
+            candidates.append(ids)
+        if region is not None or key is not None:
+            candidates.append(
+                set().union(*(self._partitions[partition_] for partition_ in scope))
+            )
+        if not filters and not ranges:
+            # Offers without attributes never match, even an empty filter.
+            candidates.append({id_ for id_, offer in self._offers.items() if offer.attributes})
+
+        # Intersect starting with the most selective set so the working set stays small.
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for ids in candidates[1:]:
+            if not result:
+                break
+            result.intersection_update(ids)
+        _LOGGER.debug("Index matched %s offers for %s", len(result), filters)
+        return sorted(result)
+
+    def search(
+        self,
+        filters: Sequence[Tuple[str, str]],
+        region: Optional[str] = None,
+        key: Optional[str] = None,
+        ranges: Optional[Mapping[str, Range]] = None,
+    ) -> List[Any]:
+        """ Offers matching every filter and numeric range, in cache order """
+        return [
+            self._offers[id_]
+            for id_ in self.search_ids(filters, region=region, key=key, ranges=ranges)
+        ]
@@ -1,15 +1,42 @@
 """ Main objects and functions for boto_remora.pricing """
 # pylint: disable=expression-not-assigned,too-many-arguments
 import dataclasses
+import functools
+import itertools
 import logging
-from collections import defaultdict, deque
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
 from collections.abc import Mapping
-from itertools import chain
-from typing import Any, Dict, Optional, Sequence, Union
-
-from boto_remora.aws import Pricing
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from os import PathLike
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from boto_remora.aws import PriceListItem, Pricing
+from boto_remora.exception import BotoRemoraOfferFileError
 from boto_remora.util import ExtendedEnum
 
+from . import offerfile
+from .budget import CacheStats, partition_size, watch_terms
+from .catalog import AttributeCatalog
+from .index import OfferIndex
+from .offerfile import OfferFileSource
+from .query import Range, RangeLike, top_k
+from .refresh import OfferDelta, PartitionState, RefreshReport
+from .terms import Terms
+
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,7 +60,13 @@ class AWSResourceKeys(ExtendedEnum):
 
 @dataclasses.dataclass()
 class Offer:  # pylint: disable=too-many-instance-attributes
-    """ AWS Pricing API response """
+    """
+    AWS Pricing API response
+
+    The OnDemand and Reserved price dimensions are parsed from ``terms`` on
+    first access. ``prices`` is derived from the terms unless it was given,
+    as by offers rebuilt from a snapshot or a table, see ``price_summary``.
+    """
 
     unit: str
     description: str
@@ -43,23 +76,96 @@ class Offer:  # pylint: disable=too-many-instance-attributes
     prices: Union[Dict[str, float], float] = None
     region: Optional[str] = None
     serviceCode: str = ""  # pylint: disable=invalid-name
-    terms: Dict[str, Any] = dataclasses.field(default_factory=dict)
+    terms: Terms = dataclasses.field(default_factory=Terms)
+    sku: str = ""
+
+    def price(self, term_type: str = "OnDemand", **kwargs) -> Optional[float]:
+        """ Price from the term model in the offer currency, see ``Terms.price`` """
+        kwargs.setdefault("currency", self.currency)
+        return self.terms.price(term_type, **kwargs)
+
+    def price_summary(self) -> Dict[str, float]:
+        """
+        Price of each term type in the offer unit, e.g. the hourly rates of an
+        instance rather than the upfront fee of a reservation. The prices given
+        with the offer when set.
+        """
+        if isinstance(self._prices, dict):
+            return self._prices
+        return self.terms.summary(unit=self.unit or None, currency=self.currency)
+
+    def _get_prices(self) -> Union[Dict[str, float], float]:
+        return self._prices if self._prices is not None else self.price_summary()
+
+    def _set_prices(self, prices: Optional[Union[Dict[str, float], float]]):
+        self._prices = prices  # pylint: disable=attribute-defined-outside-init
+
+
+# Derived on access, set by __init__ through the setter
+Offer.prices = property(Offer._get_prices, Offer._set_prices)  # pylint: disable=protected-access
 
 
 @dataclasses.dataclass()
-class Offers:
+class Offers:  # pylint: disable=too-many-instance-attributes
     """
     A collection of offers
+
+    The cache holds (region, key) partitions. With max_partitions or max_bytes
+    set, the least recently used partitions are evicted beyond the budget and
+    loaded again by ``get`` on their next use, while queries spanning several
+    partitions only search the resident ones. ``cache_stats`` reports hits,
+    misses, evictions and the approximate size.
     """
 
     resource_type: str
     currency: str = "USD"
-    aws_pricing: Pricing = dataclasses.field(default=Pricing(), repr=False)
+    aws_pricing: Optional[Pricing] = dataclasses.field(default=None, repr=False)
+    max_partitions: Optional[int] = None
+    max_bytes: Optional[int] = None
+    # Checks and normalizes filter values locally, see ``use_catalog``
+    catalog: Optional[AttributeCatalog] = dataclasses.field(default=None, repr=False)
     resource_key: Optional[ResourceKey] = dataclasses.field(default=None, init=False, repr=False)
     _data: Dict[str, Dict[str, Sequence[Offer]]] = dataclasses.field(
         default_factory=dict, repr=False, init=False
     )
     _keys: Sequence[str] = dataclasses.field(default_factory=tuple, repr=False, init=False)
+    _lock: threading.RLock = dataclasses.field(
+        default_factory=threading.RLock, repr=False, init=False, compare=False
+    )
+    _index: OfferIndex = dataclasses.field(
+        default_factory=OfferIndex, repr=False, init=False, compare=False
+    )
+    # Snapshot partitions not in _data yet, materialized on access.
+    _snapshot: Any = dataclasses.field(default=None, repr=False, init=False, compare=False)
+    _snapshot_pending: Set[Tuple[str, str]] = dataclasses.field(
+        default_factory=set, repr=False, init=False, compare=False
+    )
+    # Approximate bytes of cached partitions, least recently used first
+    _sizes: "OrderedDict[Tuple[str, str], int]" = dataclasses.field(
+        default_factory=OrderedDict, repr=False, init=False, compare=False
+    )
+    _stats: CacheStats = dataclasses.field(
+        default_factory=CacheStats, repr=False, init=False, compare=False
+    )
+    # Fetches of partitions missing from the cache, shared by concurrent callers of get
+    _inflight: Dict[Tuple[str, str], Future] = dataclasses.field(
+        default_factory=dict, repr=False, init=False, compare=False
+    )
+    # Fetch time and price list version of partitions fetched from the API
+    _partition_state: Dict[Tuple[str, str], PartitionState] = dataclasses.field(
+        default_factory=dict, repr=False, init=False, compare=False
+    )
+    # Price list versions by region as of the last refresh, or the first fetch
+    _versions: Dict[str, str] = dataclasses.field(
+        default_factory=dict, repr=False, init=False, compare=False
+    )
+    _versions_checked: bool = dataclasses.field(
+        default=False, repr=False, init=False, compare=False
+    )
+    # Held while looking the versions up, without blocking cache hits on _lock
+    _versions_lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, repr=False, init=False, compare=False
+    )
     # provison_type: str = "OnDemand"
 
     def __post_init__(self):
@@ -67,6 +173,52 @@ class Offers:
         _LOGGER.debug(self.resource_key)
         self._data = defaultdict(dict)
 
+    @property
+    def pricing(self) -> Pricing:
+        """ Pricing client of aws_pricing, created on first use """
+        if self.aws_pricing is None:
+            with self._lock:
+                if self.aws_pricing is None:
+                    self.aws_pricing = Pricing()
+        return self.aws_pricing
+
+    def use_catalog(self, prefetch: bool = False, **kwargs) -> AttributeCatalog:
+        """
+        Check filters against the attribute catalog of the service before any request.
+
+        Values are matched ignoring case and whitespace and replaced by their
+        canonical spelling. Filters on values the service does not have give an
+        empty result without calling the API.
+
+        Parameters
+        ----------
+        prefetch : bool
+            Fetch the values of every attribute now rather than on first use
+        kwargs
+            Arguments of ``AttributeCatalog``, e.g. cache
+        """
+        if self.catalog is None:
+            kwargs.setdefault("pricing", self.pricing)
+            self.catalog = AttributeCatalog(self.resource_key.servicecode, **kwargs)
+        if prefetch:
+            self.catalog.prefetch()
+        return self.catalog
+
+    def _normalize_filters(
+        self, filters: Iterable[Tuple[str, str]]
+    ) -> Optional[Sequence[Tuple[str, str]]]:
+        """ Filters in canonical spelling, None if no offer can match """
+        filters = tuple(filters)
+        if self.catalog is None:
+            return filters
+        normalized = list()
+        for attr, val in filters:
+            pair = self.catalog.normalize({attr: val})
+            if pair is None:
+                return None
+            normalized.extend(pair.items())
+        return normalized
+
     @property
     def offers(self):
         """
@@ -75,26 +227,24 @@ class Offers:
         -------
         List of Offer objects
         """
-        return list(self._data)
+        with self._lock:
+            return list(self._data)
 
     @property
     def available_keys(self):
         """ Possible values for attributes """
         if not self._keys:
-            pages = self.aws_pricing.client.get_paginator("get_attribute_values").paginate(
-                ServiceCode=getattr(self.resource_key, "servicecode"),
-                AttributeName=getattr(self.resource_key, "key"),
+            self._keys = self.pricing.attribute_values(
+                getattr(self.resource_key, "servicecode"), getattr(self.resource_key, "key")
             )
-            results = chain.from_iterable(
-                map(lambda item_: (val_["Value"] for val_ in item_["AttributeValues"]), pages)
-            )
-            self._keys = tuple(results)
         return self._keys
 
     @property
     def cached(self) -> Sequence[Offer]:
         """ All cached data """
-        return self._flatten(self._data)
+        self._materialize_snapshot()
+        with self._lock:
+            return self._flatten(self._data)
 
     def _flatten(self, data: Mapping) -> Sequence[Any]:
         """ Flatten cached data """
@@ -105,31 +255,85 @@ class Offers:
 
     def _create_offer_from_pricelist_item(self, pricelist_item):
         product = pricelist_item["product"]
-        terms = pricelist_item["terms"]
-
-        prices = dict()
-        pdetails = dict()
-        # TODO: changing to recursion for more robust solution
-        for ptype, v1_ in terms.items():
-            for v2_ in v1_.values():
-                for pdetails in v2_["priceDimensions"].values():
-                    prices[ptype] = float(pdetails["pricePerUnit"][self.currency])
+        on_demand = None
+        if isinstance(pricelist_item, PriceListItem):
+            on_demand = pricelist_item.term_type("OnDemand")
+        if on_demand:
+            # Only the OnDemand terms are decoded, the offer keeps the raw document
+            terms = pricelist_item.raw
+            by_type = (on_demand,)
+        else:
+            terms = pricelist_item["terms"]
+            by_type = (
+                terms[type_] for type_ in sorted(terms, key=lambda type_: type_ != "OnDemand")
+            )
+        # Unit and description of the first OnDemand rate, read without parsing terms
+        dimension = next(
+            itertools.chain.from_iterable(
+                term_["priceDimensions"].values()
+                for terms_ in by_type
+                for term_ in terms_.values()
+            ),
+            dict(),
+        )
 
         offer_kargs = dict()
         offer_kargs["attributes"] = product["attributes"]
         offer_kargs["productFamily"] = product["productFamily"]
         offer_kargs["currency"] = self.currency
         offer_kargs["serviceCode"] = pricelist_item["serviceCode"]
-        offer_kargs["region"] = self.aws_pricing.region_names_rev[
-            product["attributes"]["location"]
-        ]
-        offer_kargs["prices"] = prices
-        offer_kargs["unit"] = pdetails["unit"]
-        offer_kargs["description"] = pdetails["description"]
-        offer_kargs["terms"] = terms
+        offer_kargs["region"] = product["attributes"].get(
+            "regionCode"
+        ) or self.pricing.region_names_rev.get(product["attributes"]["location"])
+        offer_kargs["unit"] = dimension.get("unit", "")
+        offer_kargs["description"] = dimension.get("description", "")
+        offer_kargs["terms"] = Terms(terms)
+        offer_kargs["sku"] = product.get("sku", "")
 
         return Offer(**offer_kargs)
 
+    def _pricelist_filter(
+        self, val_for_key: Optional[str] = None, key_val: Dict[str, Union[bool, int, str]] = None,
+    ) -> Dict[str, Union[bool, int, str]]:
+        """ Price list filter for the resource key """
+        filter_kv = key_val.copy() if key_val else dict()
+        pfkey = "productFamily"
+        filter_kv[pfkey] = getattr(self.resource_key, pfkey)
+        if val_for_key:
+            filter_kv[self.resource_key.key] = val_for_key
+        return filter_kv
+
+    def iter_pricelist_raw(
+        self,
+        region: Optional[str] = None,
+        val_for_key: Optional[str] = None,
+        key_val: Dict[str, Union[bool, int, str]] = None,
+        use_cache: bool = True,
+    ) -> Iterator[Dict[str, Any]]:
+        """ Lazily yield prices as returned by the AWS API """
+        return self._iter_pricelist(
+            self.pricing.iter_price_list, region, val_for_key, key_val, use_cache
+        )
+
+    def _iter_pricelist(
+        self,
+        iter_price_list: Callable[..., Iterator[Mapping]],
+        region: Optional[str],
+        val_for_key: Optional[str],
+        key_val: Optional[Dict[str, Union[bool, int, str]]],
+        use_cache: bool,
+    ) -> Iterator[Mapping]:
+        """ Items of iter_price_list or iter_price_list_items of Pricing for the resource key """
+        filter_kv = self._normalize_filters(self._pricelist_filter(val_for_key, key_val).items())
+        if filter_kv is None:
+            return iter(())
+        return iter_price_list(
+            servicecode=self.resource_key.servicecode,
+            region=region,
+            filter_kv=dict(filter_kv),
+            use_cache=use_cache,
+        )
+
     def get_pricelist_raw(
         self,
         region: Optional[str] = None,
@@ -137,55 +341,601 @@ class Offers:
         key_val: Dict[str, Union[bool, int, str]] = None,
     ):
         """ Get list of prices as returned by the AWS API """
-        filter_kv = key_val.copy() if key_val else dict()
-        pfkey = "productFamily"
-        filter_kv[pfkey] = getattr(self.resource_key, pfkey)
-        if val_for_key:
-            filter_kv[self.resource_key.key] = val_for_key
+        return list(
+            self.iter_pricelist_raw(region=region, val_for_key=val_for_key, key_val=key_val)
+        )
 
-        return self.aws_pricing.get_price_list(
-            servicecode=self.resource_key.servicecode, region=region, filter_kv=filter_kv,
+    def iter_offers(
+        self,
+        region: Optional[str] = None,
+        key: Optional[str] = None,
+        key_val: Dict[str, Union[bool, int, str]] = None,
+        use_cache: bool = True,
+    ) -> Iterator[Offer]:
+        """
+        Lazily yield offers from the API one page at a time, bypassing the cache.
+
+        Memory stays bounded by the page size, so callers can aggregate or persist
+        offers for broad filters which would not fit in the cache. use_cache
+        applies to the response cache of ``Pricing``. Items are read with
+        ``Pricing.iter_price_list_items``, offers keep their terms as raw JSON
+        until parsed.
+        """
+        return map(
+            self._create_offer_from_pricelist_item,
+            self._iter_pricelist(
+                self.pricing.iter_price_list_items, region, key, key_val, use_cache
+            ),
         )
 
+    def _fetch_partition(self, region: str, key: str, use_cache: bool = True) -> Sequence[Offer]:
+        """ Fetch offers for region.key from the API without touching the cache. """
+        state = PartitionState(time.time(), self._price_list_version(region))
+        offers = list(self.iter_offers(region=region, key=key, use_cache=use_cache))
+        with self._lock:
+            self._partition_state[(region, key)] = state
+        return offers
+
+    def _price_list_version(self, region: str) -> Optional[str]:
+        """ Price list version of a region, looked up once unless a refresh did """
+        with self._versions_lock:
+            if not self._versions_checked:
+                self._check_versions()
+        with self._lock:
+            return self._versions.get(region)
+
+    def _check_versions(self) -> Dict[str, str]:
+        """ Current price list versions by region, empty when they cannot be listed """
+        versions: Dict[str, str] = dict()
+        try:
+            versions = self.pricing.price_list_versions(
+                self.resource_key.servicecode, currency=self.currency
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Unable to check price list versions: %s", err)
+        with self._lock:
+            self._versions.update(versions)
+            self._versions_checked = True
+        return versions
+
+    @property
+    def _has_budget(self) -> bool:
+        return self.max_partitions is not None or self.max_bytes is not None
+
+    @property
+    def cache_stats(self) -> CacheStats:
+        """ Copy of the cache counters and its approximate size """
+        with self._lock:
+            return dataclasses.replace(self._stats, partitions=len(self._sizes))
+
+    def _store_partition(self, region: str, key: str, offers: Sequence[Offer]):
+        """ Add fetched offers to the cache. """
+        partition = (region, key)
+        size = partition_size(offers)
+        with self._lock:
+            self._snapshot_pending.discard(partition)
+            previous = self._data.get(region, dict()).get(key)
+            if previous is not None:
+                watch_terms(previous, None)
+            # Parsing terms changes their size, see _resize_partition
+            watch_terms(offers, functools.partial(self._resize_partition, partition))
+            self._data[region][key] = offers
+            self._index.add_partition(region, key, offers)
+            self._stats.bytes += size - self._sizes.pop(partition, 0)
+            self._sizes[partition] = size
+            self._enforce_budget()
+
+    def _resize_partition(self, partition: Tuple[str, str], change: int):
+        """ Account for offers of a cached partition whose terms got parsed """
+        with self._lock:
+            if partition in self._sizes:
+                self._sizes[partition] += change
+                self._stats.bytes += change
+
+    def _enforce_budget(self):
+        """ Evict least recently used partitions, never the most recent one """
+        while len(self._sizes) > 1 and (
+            (self.max_partitions is not None and len(self._sizes) > self.max_partitions)
+            or (self.max_bytes is not None and self._stats.bytes > self.max_bytes)
+        ):
+            self._evict_partition(next(iter(self._sizes)))
+
+    def _evict_partition(self, partition: Tuple[str, str]):
+        """ Drop a partition from the cache, it is loaded again on its next use """
+        region, key = partition
+        self._stats.bytes -= self._sizes.pop(partition, 0)
+        self._stats.evictions += 1
+        watch_terms(self._data[region].pop(key), None)
+        if not self._data[region]:
+            del self._data[region]
+        self._index.remove_partition(region, key)
+        # Partitions not fetched since the snapshot was loaded come back from it.
+        state = self._partition_state.get(partition)
+        if self._snapshot is not None and (state is None or state.restored):
+            if partition in self._snapshot.partitions:
+                self._snapshot_pending.add(partition)
+        _LOGGER.debug("Evicted offers of %s.%s", region, key)
+
+    def is_cached(self, region: str, key: str) -> bool:
+        """ Checks if offers for region.key have been loaded. """
+        with self._lock:
+            return key in self._data.get(region, ()) or (region, key) in self._snapshot_pending
+
+    def _materialize_snapshot(self, region: Optional[str] = None, key: Optional[str] = None):
+        """ Move snapshot partitions matching region and key into the cache. """
+        if not self._snapshot_pending:
+            return
+        if self._has_budget and (region is None or key is None):
+            # Loading everything only to evict it again would thrash the budget.
+            return
+        with self._lock:
+            for region_, key_ in tuple(self._snapshot_pending):
+                if (region is None or region == region_) and (key is None or key == key_):
+                    self._snapshot_pending.discard((region_, key_))
+                    self._store_partition(region_, key_, self._snapshot.offers(region_, key_))
+
     def get(self, region: str, key: str,) -> Sequence[Offer]:
-        """ Lazily load and return list of offers from region.key. """
-        if not (self._data.get(region) and self._data[region].get(key)):
-            self._data[region][key] = list(
-                map(
-                    self._create_offer_from_pricelist_item,
-                    self.get_pricelist_raw(region=region, val_for_key=key),
-                )
+        """
+        Lazily load and return list of offers from region.key.
+
+        Safe to call from several threads: concurrent misses of a partition wait
+        for a single fetch. A failed fetch raises in every waiting thread and
+        is not cached, the next call fetches again.
+
+        With a catalog, a key the service does not have returns an empty
+        sequence without calling the API.
+        """
+        if self.catalog is not None:
+            normalized = self._normalize_filters(((self.resource_key.key, key),))
+            if normalized is None:
+                return ()
+            key = normalized[0][1]
+        partition = (region, key)
+        with self._lock:
+            if key in self._data.get(region, ()):
+                self._stats.hits += 1
+                self._sizes.move_to_end(partition)
+                return self._data[region][key]
+            self._stats.misses += 1
+            if partition in self._snapshot_pending:
+                self._materialize_snapshot(region, key)
+                return self._data[region][key]
+            future = self._inflight.get(partition)
+            owner = future is None
+            if owner:
+                future = self._inflight[partition] = Future()
+
+        if not owner:
+            _LOGGER.debug("Waiting for in flight fetch of %s.%s", region, key)
+            return future.result()
+
+        try:
+            offers = self._fetch_partition(region, key)
+            self._store_partition(region, key, offers)
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        else:
+            future.set_result(offers)
+        finally:
+            with self._lock:
+                del self._inflight[partition]
+        return offers
+
+    def save_snapshot(self, path: Union[str, PathLike]):
+        """
+        Write the cached offers to a binary snapshot, see ``boto_remora.pricing.snapshot``.
+
+        Snapshots are meant to be built once and loaded by many processes with
+        ``load_snapshot``.
+        """
+        from . import snapshot  # pylint: disable=import-outside-toplevel
+
+        with self._lock:
+            partitions = [
+                (region_, key_, offers_)
+                for region_, offers_by_key_ in self._data.items()
+                for key_, offers_ in offers_by_key_.items()
+            ]
+            pending = tuple(self._snapshot_pending)
+            states = {
+                f"{region_}\t{key_}": [state_.fetched_at, state_.version]
+                for (region_, key_), state_ in self._partition_state.items()
+                if key_ in self._data.get(region_, ()) or (region_, key_) in pending
+            }
+        # Read partitions still in the loaded snapshot one at a time, bypassing the budget.
+        partitions = itertools.chain(
+            partitions,
+            ((region_, key_, self._snapshot.offers(region_, key_)) for region_, key_ in pending),
+        )
+        snapshot.write_snapshot(
+            path,
+            partitions,
+            meta={
+                "resource_type": self.resource_type,
+                "currency": self.currency,
+                "partition_states": states,
+            },
+        )
+
+    @classmethod
+    def load_snapshot(cls, path: Union[str, PathLike], **kwargs) -> "Offers":
+        """
+        Offers backed by a memory mapped snapshot written with ``save_snapshot``.
+
+        Loading maps the file without reading offers, partitions are turned
+        into ``Offer`` objects on first access. Missing partitions are fetched
+        from the API as usual. Fetch times and price list versions saved with
+        the snapshot let ``refresh`` skip partitions which are still current.
+        """
+        from .snapshot import Snapshot  # pylint: disable=import-outside-toplevel
+
+        snapshot = Snapshot(path)
+        kwargs.setdefault("currency", snapshot.meta.get("currency", "USD"))
+        offers = cls(snapshot.meta["resource_type"], **kwargs)
+        # pylint: disable=protected-access
+        offers._snapshot = snapshot
+        offers._snapshot_pending = set(snapshot.partitions)
+        for partition_, (fetched_at_, version_) in snapshot.meta.get(
+            "partition_states", dict()
+        ).items():
+            region_, key_ = partition_.split("\t", 1)
+            offers._partition_state[(region_, key_)] = PartitionState(
+                fetched_at_, version_, restored=True
             )
+        return offers
+
+    def load_offer_file(self, source: OfferFileSource) -> int:
+        """
+        Cache offers from a bulk offer file without calling the pricing API.
+
+        Parameters
+        ----------
+        source : str, PathLike or file object
+            Path to an offer file of the resource's service, or a text or byte stream of one.
+
+        Returns
+        -------
+        int
+            Number of offers loaded.
+
+        Raises
+        ------
+        BotoRemoraOfferFileError
+            When the region of an offer can not be told from the offer file.
+        """
+        partitions = defaultdict(list)
+        items = offerfile.iter_pricelist_items(
+            source, product_family=self.resource_key.productFamily
+        )
+        for item in items:
+            if not item["terms"]:
+                continue
+            attributes = item["product"].get("attributes") or dict()
+            if "regionCode" not in attributes:
+                # Never resolve locations with the API on this offline path
+                raise BotoRemoraOfferFileError(
+                    source, f"no region code for location {attributes.get('location')!r}"
+                )
+            offer = self._create_offer_from_pricelist_item(item)
+            partitions[(offer.region, offer.attributes.get(self.resource_key.key))].append(offer)
+
+        for (region, key), offers in partitions.items():
+            with self._lock:
+                self._store_partition(region, key, offers)
+                # The offer file may be older than what was fetched, refresh treats it as stale.
+                self._partition_state.pop((region, key), None)
+
+        return sum(map(len, partitions.values()))
+
+    @classmethod
+    def from_offer_file(cls, source: OfferFileSource, resource_type: str, **kwargs) -> "Offers":
+        """ Offers with the cache filled from a bulk offer file """
+        offers = cls(resource_type, **kwargs)
+        offers.load_offer_file(source)
+        return offers
+
+    def prefetch(
+        self,
+        regions: Optional[Iterable[str]] = None,
+        keys: Optional[Iterable[str]] = None,
+        max_workers: int = 8,
+    ) -> Dict[Tuple[str, str], Exception]:
+        """
+        Concurrently load offers for every region and key combination.
+
+        Partitions already cached are skipped. A failing partition does not stop the others.
+
+        Parameters
+        ----------
+        regions : Iterable[str], optional
+            Region codes to load (default all regions known to the pricing API)
+        keys : Iterable[str], optional
+            Values of the resource key to load (default ``available_keys``)
+        max_workers : int
+            Maximum number of concurrent price list requests (default 8)
+
+        Returns
+        -------
+        Dict[Tuple[str, str], Exception]
+            The (region, key) partitions which failed mapped to the raised exception.
+        """
+        regions = tuple(regions) if regions is not None else tuple(self.pricing.region_names)
+        keys = tuple(keys) if keys is not None else self.available_keys
+        partitions = [
+            partition_
+            for partition_ in itertools.product(regions, keys)
+            if not self.is_cached(*partition_)
+        ]
+        return self._load_partitions(partitions, max_workers)[1]
+
+    def get_many(
+        self,
+        regions: Optional[Iterable[str]] = None,
+        keys: Optional[Iterable[str]] = None,
+        max_workers: int = 8,
+    ) -> Dict[Tuple[str, str], Sequence[Offer]]:
+        """
+        Concurrently load and return offers for every region and key combination.
+
+        Partitions which failed to load are logged and left out of the result,
+        use ``prefetch`` to inspect the failures. Offers are returned as loaded,
+        so partitions evicted by a budget meanwhile are not fetched again.
+        """
+        regions = tuple(regions) if regions is not None else tuple(self.pricing.region_names)
+        keys = tuple(keys) if keys is not None else self.available_keys
+        loaded = self._load_partitions(list(itertools.product(regions, keys)), max_workers)[0]
+        return {
+            partition_: loaded[partition_]
+            for partition_ in itertools.product(regions, keys)
+            if partition_ in loaded
+        }
+
+    def _load_partitions(
+        self, partitions: Sequence[Tuple[str, str]], max_workers: int
+    ) -> Tuple[Dict[Tuple[str, str], Sequence[Offer]], Dict[Tuple[str, str], Exception]]:
+        """ Offers of partitions loaded with concurrent ``get``, and the failures """
+        loaded = dict()
+        failures = dict()
+        if not partitions:
+            return loaded, failures
+
+        # Warm the lazily built region maps before fanning out so threads do not race on them.
+        self.pricing.region_names_rev  # pylint: disable=pointless-statement
+        _LOGGER.debug("Loading %s partitions of %s", len(partitions), self.resource_type)
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(partitions))) as executor:
+            # get coalesces with fetches of the same partitions by other threads.
+            futures = {
+                executor.submit(self.get, *partition_): partition_ for partition_ in partitions
+            }
+            for future in as_completed(futures):
+                partition = futures[future]
+                try:
+                    loaded[partition] = future.result()
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.warning("Unable to load offers for %s.%s: %s", *partition, err)
+                    failures[partition] = err
+
+        return loaded, failures
+
+    def _cached_partitions(
+        self, regions: Optional[Iterable[str]] = None, keys: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, str]]:
+        """ Cached and pending snapshot partitions, optionally of some regions and keys """
+        regions = frozenset(regions) if regions is not None else None
+        keys = frozenset(keys) if keys is not None else None
+        with self._lock:
+            cached = [
+                (region_, key_) for region_, by_key_ in self._data.items() for key_ in by_key_
+            ]
+            cached.extend(self._snapshot_pending)
+        return [
+            partition_
+            for partition_ in cached
+            if (regions is None or partition_[0] in regions)
+            and (keys is None or partition_[1] in keys)
+        ]
+
+    def _is_stale(
+        self, partition: Tuple[str, str], version: Optional[str], max_age: Optional[float]
+    ) -> bool:
+        """ Checks if a cached partition needs to be fetched again """
+        with self._lock:
+            state = self._partition_state.get(partition)
+        if state is None:
+            return True
+        if version is not None and state.version != version:
+            return True
+        if max_age is not None and time.time() - state.fetched_at >= max_age:
+            return True
+        return version is None and max_age is None
+
+    def refresh(
+        self,
+        max_age: Optional[float] = None,
+        check_versions: bool = True,
+        regions: Optional[Iterable[str]] = None,
+        keys: Optional[Iterable[str]] = None,
+        max_workers: int = 8,
+    ) -> RefreshReport:
+        """
+        Fetch cached partitions again when they are stale and apply the differences.
+
+        A partition is stale when its region's price list version changed since
+        it was fetched, when it is older than max_age, or when neither tells
+        whether it is current. Partitions loaded from offer files, or from
+        snapshots saved before they were fetched, have no fetch record and are
+        always stale. Unchanged offers keep their
+        cached objects, so only added, removed and changed offers are replaced.
+
+        Parameters
+        ----------
+        max_age : float, optional
+            Seconds after which a partition is fetched again regardless of versions
+        check_versions : bool
+            Compare price list versions from ``Pricing.price_list_versions`` (default True)
+        regions : Iterable[str], optional
+            Only refresh these regions (default all cached)
+        keys : Iterable[str], optional
+            Only refresh these values of the resource key (default all cached)
+        max_workers : int
+            Maximum number of concurrent price list requests (default 8)
 
-        return self._data[region][key]
+        Returns
+        -------
+        RefreshReport
+            Checked and refreshed partitions, the offer differences and failures.
+        """
+        report = RefreshReport(checked=self._cached_partitions(regions, keys))
+        if not report.checked:
+            return report
+
+        versions = self._check_versions() if check_versions else dict()
+
+        stale = [
+            partition_
+            for partition_ in report.checked
+            if self._is_stale(partition_, versions.get(partition_[0]), max_age)
+        ]
+        _LOGGER.debug(
+            "Refreshing %s of %s partitions of %s",
+            len(stale),
+            len(report.checked),
+            self.resource_type,
+        )
+        if not stale:
+            return report
+
+        with self._lock:
+            previous = {
+                partition_: getattr(self._partition_state.get(partition_), "fingerprints", None)
+                for partition_ in stale
+            }
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(stale))) as executor:
+            futures = {
+                executor.submit(self._fetch_partition, *partition_, use_cache=False): partition_
+                for partition_ in stale
+            }
+            for future in as_completed(futures):
+                partition = futures[future]
+                try:
+                    self._apply_refresh(partition, future.result(), previous[partition], report)
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.warning("Unable to refresh offers for %s.%s: %s", *partition, err)
+                    report.failures[partition] = err
+
+        return report
+
+    def _apply_refresh(
+        self,
+        partition: Tuple[str, str],
+        fetched: Sequence[Offer],
+        previous: Optional[Dict[str, str]],
+        report: RefreshReport,
+    ):
+        """ Merge fetched offers of a partition into the cache and the report """
+        region, key = partition
+        with self._lock:
+            cached = self._data.get(region, dict()).get(key)
+            if cached is None and partition in self._snapshot_pending:
+                cached = self._snapshot.offers(region, key)
+        if cached is None:
+            # Evicted while fetching, the next get loads it again
+            _LOGGER.debug("Dropping refresh of evicted partition %s.%s", region, key)
+            return
+        delta = OfferDelta.compute(cached, fetched, previous)
+        with self._lock:
+            if delta.has_changes:
+                self._store_partition(*partition, delta.offers)
+            state = self._partition_state.get(partition)
+            if state is not None:
+                state.fingerprints = delta.fingerprints
+        report.refreshed.append(partition)
+        report.added.extend(delta.added)
+        report.removed.extend(delta.removed)
+        report.changed.extend(delta.changed)
 
     def filter_cached(
         self,
         filters: Optional[Union[Sequence[Sequence[str]], Dict[str, str]]] = None,
         region: Optional[str] = None,
         key: Optional[str] = None,
+        ranges: Optional[Dict[str, RangeLike]] = None,
     ) -> Sequence[Offer]:
-        """ Filter cached offers """
-
-        def isdata(offer: Offer) -> bool:
-            attribs = offer.attributes
-            filter_vals = map(lambda fil_: attribs.get(fil_[0]) == fil_[1], filters)
-            return all(filter_vals) if attribs else False
-
-        filters = deque(filters.items()) if isinstance(filters, Mapping) else deque(filters)
+        """
+        Filter cached offers
+
+        Equality filters are answered from an inverted attribute index,
+        intersecting the most selective attribute values first. ranges maps
+        numeric attributes to a ``query.Range``, e.g. ``query.ge(8)``, or an
+        inclusive (low, high) tuple with None for unbounded. Attribute values
+        are parsed with ``query.parse_quantity``, so {"memory": (32, None)}
+        matches "32 GiB" and more.
+        """
+        filters = deque(filters.items()) if isinstance(filters, Mapping) else deque(filters or ())
+        ranges = {attr_: Range.coerce(rng_) for attr_, rng_ in (ranges or dict()).items()}
+        if self.catalog is not None:
+            normalized = self._normalize_filters(filters)
+            if normalized is None:
+                return ()
+            filters = deque(normalized)
 
         if region and key:
-            data = self.get(region=region, key=key)
-        elif region:
-            data = self._data[region]
-        elif key:
-            filters.append((self.resource_key, key))
-            data = self.cached
+            self.get(region=region, key=key)
         else:
-            data = self.cached
+            self._materialize_snapshot(region, key)
+
+        _LOGGER.debug("Filter for offers %s and ranges %s", filters, ranges)
+        with self._lock:
+            return tuple(self._index.search(filters, region=region, key=key, ranges=ranges))
+
+    def cheapest(
+        self,
+        k: int = 1,
+        price_type: str = "OnDemand",
+        filters: Optional[Union[Sequence[Sequence[str]], Dict[str, str]]] = None,
+        ranges: Optional[Dict[str, RangeLike]] = None,
+        region: Optional[str] = None,
+        key: Optional[str] = None,
+        term_attributes: Optional[Dict[str, Any]] = None,
+    ) -> Sequence[Offer]:
+        """
+        k cheapest cached offers matching filters and ranges, cheapest first.
+
+        Offers are ranked on ``Offer.price`` of price_type, term_attributes are
+        its keyword arguments selecting the term and rate. Without region every
+        cached region is searched, use ``prefetch`` to load the regions and keys
+        to compare first. For example the cheapest Linux instance with at least
+        8 vCPU and 32 GiB, by the hourly rate of a 1 year No Upfront reservation::
+
+            offers.cheapest(
+                price_type="Reserved",
+                filters={"operatingSystem": "Linux"},
+                ranges={"vcpu": query.ge(8), "memory": query.ge(32)},
+                term_attributes={
+                    "lease_contract_length": "1yr",
+                    "purchase_option": "No Upfront",
+                    "unit": "Hrs",
+                },
+            )
+        """
+        matches = self.filter_cached(filters=filters, region=region, key=key, ranges=ranges)
+        return top_k(matches, k=k, price_type=price_type, **(term_attributes or dict()))
+
+    def to_table(
+        self,
+        filters: Optional[Union[Sequence[Sequence[str]], Dict[str, str]]] = None,
+        region: Optional[str] = None,
+        key: Optional[str] = None,
+    ):
+        """
+        Columnar ``OfferTable`` of the cached offers matching the filters.
+
+        Requires numpy, install with ``pip install boto_remora[table]``.
+        """
+        from .table import OfferTable  # pylint: disable=import-outside-toplevel
 
-        _LOGGER.debug("Filter for offers %s", filters)
-        return tuple(filter(isdata, data))
+        return OfferTable.from_offers(self.filter_cached(filters=filters, region=region, key=key))
 
     def get_ece2filtered(  # pylint: disable=invalid-name
         self,
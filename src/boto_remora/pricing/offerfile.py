@@ -0,0 +1,256 @@
+"""
+Incremental reader for AWS Price List bulk offer files
+
+Offer files are published per service at
+https://pricing.us-east-1.amazonaws.com/offers/v1.0/aws/index.json
+and can be several gigabytes, so they are walked member by member instead of
+being decoded as a whole.
+"""
+import io
+import json
+import logging
+import os
+import tempfile
+from collections import defaultdict
+from typing import IO, Any, Callable, Container, Dict, Iterator, List, Optional, Tuple, Union
+
+from boto_remora.util import json_loads
+
+
+_LOGGER = logging.getLogger(__name__)
+
+OfferFileSource = Union[str, os.PathLike, IO[str], IO[bytes]]
+
+
+class JsonStreamReader:
+    """
+    Pull reader over a JSON text stream.
+
+    Only the current member is decoded, so memory is bounded by the largest
+    value read with ``value`` rather than by the document.
+    """
+
+    def __init__(self, stream: IO[str], chunk_size: int = 2 ** 20):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """ Append the next chunk to the buffer, dropping consumed text """
+        if self._eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """ Next non whitespace character without consuming it, empty at the end """
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\n\r":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        """ Consume the given structural character """
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r} in offer file.")
+        self._pos += 1
+
+    def _next(self) -> Tuple[Any, int]:
+        """ Decode and consume the next complete value, returning it and its buffer start """
+        self.peek()
+        while True:
+            try:
+                val, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number or literal ending the buffer may continue in the next chunk.
+            if end == len(self._buf) and self._fill():
+                continue
+            start, self._pos = self._pos, end
+            return val, start
+
+    def value(self) -> Any:
+        """ Decode and consume the next complete value """
+        return self._next()[0]
+
+    def raw_value(self) -> str:
+        """ Consume the next complete value, returning its JSON text """
+        _, start = self._next()
+        return self._buf[start : self._pos]
+
+    def members(self) -> Iterator[str]:
+        """
+        Iterate over keys of the next object.
+
+        The caller must consume each member value, with ``value`` or a nested
+        ``members``, before advancing.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self.expect("}")
+            return
+
+
+def _open_text(source: OfferFileSource) -> Tuple[IO[str], Callable[[], Any]]:
+    """ Text stream for the source and how to release it without closing caller streams """
+    if isinstance(source, (str, os.PathLike)):
+        stream = open(source, "r", encoding="utf-8")
+        return stream, stream.close
+    if isinstance(source, io.TextIOBase):
+        return source, lambda: None
+    stream = io.TextIOWrapper(source, encoding="utf-8")
+    return stream, stream.detach
+
+
+class _SpillFile:
+    """ Temporary file holding JSON texts until they are read back by position """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._size = 0
+
+    def __enter__(self) -> "_SpillFile":
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.close()
+
+    def write(self, text: str) -> Tuple[int, int]:
+        """ Append text, returning its offset and length """
+        data = text.encode("utf-8")
+        self._file.seek(self._size)
+        self._file.write(data)
+        position = (self._size, len(data))
+        self._size += len(data)
+        return position
+
+    def read(self, position: Tuple[int, int]) -> Any:
+        """ Decode the JSON text written at position """
+        self._file.seek(position[0])
+        return json_loads(self._file.read(position[1]))
+
+
+def _read_products(
+    reader: JsonStreamReader, product_family: Optional[str], spill: _SpillFile
+) -> Tuple[Dict[str, Tuple[int, int]], Dict[str, str]]:
+    """
+    Positions of spilled products by sku, optionally of one family, and the
+    region codes of locations, from the products section
+    """
+    products = dict()
+    regions = dict()
+    for sku in reader.members():
+        text = reader.raw_value()
+        product = json_loads(text)
+        attributes = product.get("attributes") or dict()
+        if "location" in attributes and "regionCode" in attributes:
+            regions.setdefault(attributes["location"], attributes["regionCode"])
+        if product_family is None or product.get("productFamily") == product_family:
+            products[sku] = spill.write(text)
+    return products, regions
+
+
+def _read_terms(
+    reader: JsonStreamReader, skus: Optional[Container[str]], spill: _SpillFile
+) -> Dict[str, List[Tuple[str, Tuple[int, int]]]]:
+    """
+    Term types and positions of spilled terms by sku from the terms section,
+    of every sku when skus is None
+    """
+    terms = defaultdict(list)
+    for term_type in reader.members():
+        for sku in reader.members():
+            text = reader.raw_value()
+            if skus is None or sku in skus:
+                terms[sku].append((term_type, spill.write(text)))
+    return terms
+
+
+def iter_pricelist_items(
+    source: OfferFileSource, product_family: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield items shaped like the ``PriceList`` entries of ``get_products`` from an offer file.
+
+    Products of the family and their terms are spilled as JSON text to a
+    temporary file while the offer file is read, only their positions are kept
+    in memory. Items are decoded from it when yielded. Products without
+    ``regionCode``, as in older offer files, get the code of other products at
+    the same location.
+
+    Parameters
+    ----------
+    source : str, PathLike or file object
+        Path to an offer file, or a text or byte stream of one.
+    product_family : str, optional
+        Only keep products of this family, e.g. "Compute Instance".
+
+    Returns
+    -------
+    Iterator of price list items with product, serviceCode, terms, version and publicationDate.
+    """
+    header = dict()
+    products: Optional[Dict[str, Tuple[int, int]]] = None
+    regions = dict()
+    terms = dict()
+    with _SpillFile() as spill:
+        stream, release = _open_text(source)
+        try:
+            reader = JsonStreamReader(stream)
+            for section in reader.members():
+                if section == "products":
+                    products, regions = _read_products(reader, product_family, spill)
+                elif section == "terms":
+                    # Terms before products are spilled for every sku
+                    terms = _read_terms(reader, products, spill)
+                else:
+                    header[section] = reader.value()
+        finally:
+            release()
+
+        products = products or dict()
+        _LOGGER.debug(
+            "Read %s products of %s version %s",
+            len(products),
+            header.get("offerCode"),
+            header.get("version"),
+        )
+        for sku, position in products.items():
+            product = spill.read(position)
+            attributes = product.get("attributes")
+            if attributes and "regionCode" not in attributes:
+                if attributes.get("location") in regions:
+                    attributes["regionCode"] = regions[attributes["location"]]
+            yield {
+                "product": product,
+                "serviceCode": header.get("offerCode", ""),
+                "terms": {
+                    term_type_: spill.read(position_)
+                    for term_type_, position_ in terms.get(sku, ())
+                },
+                "version": header.get("version", ""),
+                "publicationDate": header.get("publicationDate", ""),
+            }
@@ -0,0 +1,159 @@
+""" Numeric range predicates and top-k selection over cached offers """
+import dataclasses
+import functools
+import heapq
+import logging
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, List, Optional, Set, Tuple, Union
+
+
+_LOGGER = logging.getLogger(__name__)
+
+_QUANTITY = re.compile(
+    r"(?:(?P<count>\d+)\s*x\s*)?(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<unit>[a-z]+)?", re.IGNORECASE
+)
+# Scale to the giga magnitude of the unit, e.g. memory in GiB or network in Gigabit
+_PREFIX_SCALES = {"k": 1e-6, "m": 1e-3, "g": 1.0, "t": 1e3, "p": 1e6}
+_BINARY_PREFIX_SCALES = {
+    "k": 2.0 ** -20,
+    "m": 2.0 ** -10,
+    "g": 1.0,
+    "t": 2.0 ** 10,
+    "p": 2.0 ** 20,
+}
+
+
+@functools.lru_cache(maxsize=2 ** 16)
+def parse_quantity(value: Optional[str]) -> Optional[float]:
+    """
+    Number of an attribute value, None if it holds none.
+
+    Sizes are scaled to their giga unit and counts are multiplied out, e.g.
+    "16 GiB" is 16.0, "512 MiB" is 0.5, "Up to 10 Gigabit" is 10.0 and
+    "2 x 1900 NVMe SSD" is 3800.0.
+    """
+    if not value:
+        return None
+    match = _QUANTITY.search(value)
+    if match is None:
+        return None
+    number = float(match.group("number").replace(",", ""))
+    if match.group("count"):
+        number *= int(match.group("count"))
+    unit = (match.group("unit") or "").lower()
+    if unit.endswith("ib") and len(unit) == 3:
+        number *= _BINARY_PREFIX_SCALES.get(unit[0], 1.0)
+    elif unit in ("kb", "mb", "gb", "tb", "pb") or unit.endswith("bit"):
+        number *= _PREFIX_SCALES.get(unit[0], 1.0)
+    return number
+
+
+@dataclasses.dataclass(frozen=True)
+class Range:
+    """ Interval of numeric attribute values, unbounded where None """
+
+    low: Optional[float] = None
+    high: Optional[float] = None
+    low_inclusive: bool = True
+    high_inclusive: bool = True
+
+    @classmethod
+    def coerce(cls, value: "RangeLike") -> "Range":
+        """ Range from a Range, an inclusive (low, high) tuple or a single number """
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, (tuple, list)):
+            low, high = value
+            return cls(low=low, high=high)
+        return cls(low=value, high=value)
+
+
+RangeLike = Union[Range, Tuple[Optional[float], Optional[float]], float]
+
+
+def ge(value: float) -> Range:  # pylint: disable=invalid-name
+    """ Values greater than or equal to value """
+    return Range(low=value)
+
+
+def gt(value: float) -> Range:  # pylint: disable=invalid-name
+    """ Values greater than value """
+    return Range(low=value, low_inclusive=False)
+
+
+def le(value: float) -> Range:  # pylint: disable=invalid-name
+    """ Values less than or equal to value """
+    return Range(high=value)
+
+
+def lt(value: float) -> Range:  # pylint: disable=invalid-name
+    """ Values less than value """
+    return Range(high=value, high_inclusive=False)
+
+
+def between(low: float, high: float) -> Range:
+    """ Values from low to high, both included """
+    return Range(low=low, high=high)
+
+
+@dataclasses.dataclass()
+class RangeIndex:
+    """ Offer ids sorted by the parsed value of an attribute """
+
+    values: List[float] = dataclasses.field(default_factory=list, repr=False)
+    ids: List[int] = dataclasses.field(default_factory=list, repr=False)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, postings: Iterable[Tuple[str, Iterable[int]]]) -> "RangeIndex":
+        """ Index from (attribute value, offer ids) pairs, parsing every value once """
+        pairs = sorted(
+            (number_, id_)
+            for number_, ids_ in ((parse_quantity(val_), ids_) for val_, ids_ in postings)
+            if number_ is not None
+            for id_ in ids_
+        )
+        return cls(values=[pair_[0] for pair_ in pairs], ids=[pair_[1] for pair_ in pairs])
+
+    def search(self, rng: Range) -> Set[int]:
+        """ Ids of offers whose value falls in rng """
+        start = 0
+        if rng.low is not None:
+            start = (bisect_left if rng.low_inclusive else bisect_right)(self.values, rng.low)
+        stop = len(self.values)
+        if rng.high is not None:
+            stop = (bisect_right if rng.high_inclusive else bisect_left)(self.values, rng.high)
+        return set(self.ids[start:stop])
+
+
+def offer_price(offer: Any, price_type: str = "OnDemand", **price_kwargs) -> Optional[float]:
+    """ Price of an offer for a term type, None if it has none, see ``Offer.price`` """
+    return offer.price(price_type, **price_kwargs)
+
+
+def top_k(
+    offers: Iterable[Any],
+    k: int = 1,
+    price_type: str = "OnDemand",
+    largest: bool = False,
+    **price_kwargs,
+) -> List[Any]:
+    """
+    k cheapest offers (or most expensive with largest) by price type, in price order.
+
+    Offers are ranked on ``offer_price``, price_kwargs select the term and the
+    rate, e.g. lease_contract_length="1yr", purchase_option="No Upfront" and
+    unit="Hrs" for the hourly rate of a reservation.
+    """
+    priced = (
+        (price_, offer_)
+        for offer_, price_ in (
+            (offer_, offer_price(offer_, price_type, **price_kwargs)) for offer_ in offers
+        )
+        if price_ is not None
+    )
+    select = heapq.nlargest if largest else heapq.nsmallest
+    return [offer_ for _, offer_ in select(k, priced, key=lambda pair_: pair_[0])]
@@ -0,0 +1,161 @@
+""" Fingerprints and deltas of cached offer partitions for incremental refreshes """
+import dataclasses
+import hashlib
+import json
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+_LOGGER = logging.getLogger(__name__)
+
+Partition = Tuple[str, str]
+
+
+def offer_fingerprint(offer: Any) -> str:
+    """
+    Digest of an offer's sku, term codes, effective dates and rates.
+
+    Only these fields are read and rates are hashed as floats, so the digest is
+    the same whether the terms were parsed or not.
+    """
+    terms = sorted(
+        (
+            term_type_,
+            code_,
+            term_.get("effectiveDate", ""),
+            sorted(
+                (
+                    dim_.get("rateCode", ""),
+                    sorted(
+                        (currency_, float(rate_))
+                        for currency_, rate_ in dim_.get("pricePerUnit", dict()).items()
+                    ),
+                )
+                for dim_ in term_.get("priceDimensions", dict()).values()
+            ),
+        )
+        for term_type_, terms_ in offer.terms.to_dict().items()
+        for code_, term_ in terms_.items()
+    )
+    document = json.dumps([offer.sku, terms], separators=(",", ":"))
+    return hashlib.blake2b(document.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def offer_keys(offers: Sequence[Any]) -> List[str]:
+    """
+    Keys matching offers across fetches, their sku.
+
+    Offers without a sku are keyed by their fingerprint and its occurrence, so
+    they do not collapse into one and an unchanged one matches its refetch.
+    """
+    keys = list()
+    occurrences: Counter = Counter()
+    for offer in offers:
+        if offer.sku:
+            keys.append(offer.sku)
+            continue
+        fingerprint = offer_fingerprint(offer)
+        occurrences[fingerprint] += 1
+        keys.append(f"#{fingerprint}.{occurrences[fingerprint]}")
+    return keys
+
+
+def partition_fingerprint(fingerprints: Dict[str, str]) -> str:
+    """ Digest of a partition from the fingerprints of its offers by key """
+    digest = hashlib.blake2b(digest_size=16)
+    for key, fingerprint in sorted(fingerprints.items()):
+        digest.update(f"{key}:{fingerprint};".encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclasses.dataclass()
+class PartitionState:
+    """ When and from which price list version a partition was fetched """
+
+    fetched_at: float
+    version: Optional[str] = None
+    # Offer fingerprints by key, see offer_keys, computed on the first refresh of the partition
+    fingerprints: Optional[Dict[str, str]] = dataclasses.field(default=None, repr=False)
+    # Read from a snapshot rather than fetched by this process
+    restored: bool = False
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """ Partition fingerprint, None until it has been refreshed once """
+        if self.fingerprints is None:
+            return None
+        return partition_fingerprint(self.fingerprints)
+
+
+@dataclasses.dataclass()
+class RefreshReport:
+    """ Outcome of ``Offers.refresh`` """
+
+    checked: List[Partition] = dataclasses.field(default_factory=list)
+    refreshed: List[Partition] = dataclasses.field(default_factory=list)
+    added: List[Any] = dataclasses.field(default_factory=list)
+    removed: List[Any] = dataclasses.field(default_factory=list)
+    # (cached offer, fetched offer) pairs
+    changed: List[Tuple[Any, Any]] = dataclasses.field(default_factory=list)
+    failures: Dict[Partition, Exception] = dataclasses.field(default_factory=dict)
+
+    @property
+    def skipped(self) -> List[Partition]:
+        """ Partitions left as cached because they were up to date """
+        refreshed = set(self.refreshed) | set(self.failures)
+        return [partition_ for partition_ in self.checked if partition_ not in refreshed]
+
+    @property
+    def has_changes(self) -> bool:
+        """ Checks if any offer was added, removed or changed """
+        return bool(self.added or self.removed or self.changed)
+
+
+@dataclasses.dataclass()
+class OfferDelta:
+    """ Difference between the cached and the fetched offers of a partition """
+
+    offers: List[Any]
+    fingerprints: Dict[str, str]
+    added: List[Any] = dataclasses.field(default_factory=list)
+    removed: List[Any] = dataclasses.field(default_factory=list)
+    changed: List[Tuple[Any, Any]] = dataclasses.field(default_factory=list)
+
+    @classmethod
+    def compute(
+        cls,
+        cached: Sequence[Any],
+        fetched: Sequence[Any],
+        cached_fingerprints: Optional[Dict[str, str]] = None,
+    ) -> "OfferDelta":
+        """
+        Match offers by key, see ``offer_keys``, keeping the cached object of every
+        unchanged offer.
+
+        ``offers`` follows the fetched order, so applying it to the cache leaves
+        the partition as a fresh fetch would, minus re-creating unchanged offers.
+        """
+        cached_by_key = dict(zip(offer_keys(cached), cached))
+        if cached_fingerprints is None:
+            cached_fingerprints = {
+                key_: offer_fingerprint(offer_) for key_, offer_ in cached_by_key.items()
+            }
+        delta = cls(offers=list(), fingerprints=dict())
+        for key, offer in zip(offer_keys(fetched), fetched):
+            fingerprint = delta.fingerprints[key] = offer_fingerprint(offer)
+            previous = cached_by_key.pop(key, None)
+            if previous is None:
+                delta.added.append(offer)
+            elif cached_fingerprints.get(key) != fingerprint:
+                delta.changed.append((previous, offer))
+            else:
+                offer = previous
+            delta.offers.append(offer)
+        delta.removed.extend(cached_by_key.values())
+        return delta
+
+    @property
+    def has_changes(self) -> bool:
+        """ Checks if any offer was added, removed or changed """
+        return bool(self.added or self.removed or self.changed)
@@ -0,0 +1,344 @@
+"""
+Compact binary snapshots of cached offers
+
+A snapshot stores offers column by column with every string interned in a
+shared table, partitions being contiguous row ranges. It is read through
+``mmap``, so processes loading the same file share its pages and only the
+partitions they access are turned into ``Offer`` objects. Their raw terms are
+then copied out of the mapping and only parsed on first use.
+
+Layout, all integers little endian::
+
+    header    magic "BRMSNAP\\0", format version u16, reserved u16, section count u32
+    sections  (offset u64, length u64) for each section, aligned to 8 bytes
+"""
+import dataclasses
+import json
+import logging
+import mmap
+import os
+import sys
+import threading
+from array import array
+from struct import Struct
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from boto_remora.exception import BotoRemoraSnapshotError
+
+from .main import Offer
+from .terms import Terms
+
+
+_LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"BRMSNAP\0"
+FORMAT_VERSION = 1
+NONE_ID = 0xFFFFFFFF
+
+_HEADER = Struct("<8sHHI")
+_SECTION = Struct("<QQ")
+_ALIGNMENT = 8
+
+# Sections in file order with their array typecode, None for raw bytes
+_SECTIONS = (
+    ("meta", None),
+    ("string_offsets", "Q"),
+    ("string_data", None),
+    # region id, key id, first row, row count per partition
+    ("partitions", "I"),
+    # one column per _STRING_FIELDS entry, concatenated
+    ("offer_fields", "I"),
+    ("attribute_offsets", "I"),
+    ("attribute_keys", "I"),
+    ("attribute_values", "I"),
+    ("price_offsets", "I"),
+    ("price_types", "I"),
+    ("price_values", "d"),
+    ("terms_offsets", "Q"),
+    ("terms_data", None),
+)
+_STRING_FIELDS = (
+    "unit",
+    "description",
+    "productFamily",
+    "currency",
+    "region",
+    "serviceCode",
+    "sku",
+)
+
+PathType = Union[str, os.PathLike]
+
+
+def _native(values: array) -> bytes:
+    """ Little endian bytes of an array """
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+@dataclasses.dataclass()
+class _StringTable:
+    ids: Dict[str, int] = dataclasses.field(default_factory=dict)
+    offsets: array = dataclasses.field(default_factory=lambda: array("Q", [0]))
+    data: bytearray = dataclasses.field(default_factory=bytearray)
+
+    def intern(self, value: Optional[str]) -> int:
+        """ Id of a string, adding it to the table on first use """
+        if value is None:
+            return NONE_ID
+        id_ = self.ids.get(value)
+        if id_ is None:
+            id_ = self.ids[value] = len(self.ids)
+            self.data += value.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return id_
+
+
+@dataclasses.dataclass()
+class _SnapshotColumns:
+    """ Columns of a snapshot being written, a row per offer """
+
+    strings: _StringTable = dataclasses.field(default_factory=_StringTable)
+    columns: Dict[str, array] = dataclasses.field(
+        default_factory=lambda: {
+            name_: array(typecode_) for name_, typecode_ in _SECTIONS if typecode_
+        }
+    )
+    fields: Dict[str, array] = dataclasses.field(
+        default_factory=lambda: {name_: array("I") for name_ in _STRING_FIELDS}
+    )
+    terms_data: bytearray = dataclasses.field(default_factory=bytearray)
+    rows: int = 0
+
+    def __post_init__(self):
+        for name_ in ("attribute_offsets", "price_offsets", "terms_offsets"):
+            self.columns[name_].append(0)
+
+    def add_partition(self, region: str, key: str, offers: Iterable[Offer]):
+        """ Append the rows of a partition """
+        partitions = self.columns["partitions"]
+        partitions.extend((self.strings.intern(region), self.strings.intern(key), self.rows, 0))
+        for offer in offers:
+            self.add_offer(offer)
+        partitions[-1] = self.rows - partitions[-2]
+
+    def add_offer(self, offer: Offer):
+        """ Append the row of an offer """
+        intern = self.strings.intern
+        columns = self.columns
+        for name_, column_ in self.fields.items():
+            column_.append(intern(getattr(offer, name_)))
+        for attr_, val_ in (offer.attributes or dict()).items():
+            columns["attribute_keys"].append(intern(attr_))
+            columns["attribute_values"].append(intern(val_))
+        columns["attribute_offsets"].append(len(columns["attribute_keys"]))
+        for type_, price_ in offer.price_summary().items():
+            columns["price_types"].append(intern(type_))
+            columns["price_values"].append(price_)
+        columns["price_offsets"].append(len(columns["price_types"]))
+        terms = offer.terms.to_dict() if offer.terms is not None else dict()
+        self.terms_data += json.dumps({"terms": terms}, separators=(",", ":")).encode("utf-8")
+        columns["terms_offsets"].append(len(self.terms_data))
+        self.rows += 1
+
+    def sections(self, meta: Optional[Dict[str, Any]] = None) -> Dict[str, bytes]:
+        """ Bytes of every section """
+        for name_ in _STRING_FIELDS:
+            self.columns["offer_fields"].extend(self.fields[name_])
+        sections = {
+            "meta": json.dumps(dict(meta or dict(), rows=self.rows)).encode("utf-8"),
+            "string_offsets": _native(self.strings.offsets),
+            "string_data": bytes(self.strings.data),
+            "terms_data": bytes(self.terms_data),
+        }
+        sections.update(
+            (name_, _native(column_))
+            for name_, column_ in self.columns.items()
+            if name_ not in sections
+        )
+        return sections
+
+
+def write_snapshot(
+    path: PathType,
+    partitions: Iterable[Tuple[str, str, Sequence[Offer]]],
+    meta: Optional[Dict[str, Any]] = None,
+):
+    """
+    Write offers to a snapshot file.
+
+    The file is written next to path and moved in place once complete, so
+    readers never map a partial snapshot.
+
+    Parameters
+    ----------
+    path : str or PathLike
+        Snapshot file to create or replace
+    partitions : Iterable[Tuple[str, str, Sequence[Offer]]]
+        (region, key, offers) of each partition
+    meta : Dict[str, Any], optional
+        JSON serializable metadata stored with the offers
+    """
+    columns = _SnapshotColumns()
+    for region, key, offers in partitions:
+        columns.add_partition(region, key, offers)
+    sections = columns.sections(meta)
+
+    tmp_path = f"{os.fspath(path)}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as fid:
+            table_end = _HEADER.size + _SECTION.size * len(_SECTIONS)
+            fid.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(_SECTIONS)))
+            offset = -(-table_end // _ALIGNMENT) * _ALIGNMENT
+            for name_, _ in _SECTIONS:
+                fid.write(_SECTION.pack(offset, len(sections[name_])))
+                offset = -(-(offset + len(sections[name_])) // _ALIGNMENT) * _ALIGNMENT
+            for name_, _ in _SECTIONS:
+                fid.write(b"\0" * (-fid.tell() % _ALIGNMENT))
+                fid.write(sections[name_])
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Do not leave a partial file behind, e.g. when the disk is full
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    _LOGGER.debug(
+        "Wrote %s offers and %s strings to %s", columns.rows, len(columns.strings.ids), path
+    )
+
+
+class Snapshot:  # pylint: disable=too-many-instance-attributes
+    """
+    Memory mapped snapshot, materializing ``Offer`` objects a partition at a time.
+
+    Opening only validates the header and maps the file. Strings are decoded
+    and interned on first use.
+    """
+
+    def __init__(self, path: PathType):
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as fid:
+            try:
+                self._mmap = mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as err:
+                raise BotoRemoraSnapshotError(self.path, err) from err
+        self._views: List[memoryview] = list()
+        self._lock = threading.Lock()
+        try:
+            self._sections = self._read_sections()
+            self.meta: Dict[str, Any] = json.loads(bytes(self._raw("meta")))
+            self._string_data = self._raw("string_data")
+            self._columns = {
+                name_: self._column(name_, typecode_)
+                for name_, typecode_ in _SECTIONS
+                if typecode_
+            }
+        except Exception:
+            self.close()
+            raise
+        self._strings: List[Optional[str]] = [None] * (len(self._columns["string_offsets"]) - 1)
+        parts = self._columns["partitions"]
+        self.partitions: Dict[Tuple[str, str], Tuple[int, int]] = {
+            (self.string(parts[pos_]), self.string(parts[pos_ + 1])): (
+                parts[pos_ + 2],
+                parts[pos_ + 3],
+            )
+            for pos_ in range(0, len(parts), 4)
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.meta.get("rows", 0)
+
+    def _read_sections(self) -> Dict[str, Tuple[int, int]]:
+        if len(self._mmap) < _HEADER.size:
+            raise BotoRemoraSnapshotError(self.path, "file is truncated")
+        magic, version, _, count = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise BotoRemoraSnapshotError(self.path, "bad magic number")
+        if version != FORMAT_VERSION or count != len(_SECTIONS):
+            raise BotoRemoraSnapshotError(
+                self.path, f"format version {version}, expected {FORMAT_VERSION}"
+            )
+        sections = dict()
+        for pos, (name, _) in enumerate(_SECTIONS):
+            offset, length = _SECTION.unpack_from(self._mmap, _HEADER.size + pos * _SECTION.size)
+            if offset + length > len(self._mmap):
+                raise BotoRemoraSnapshotError(self.path, f"section {name} is truncated")
+            sections[name] = (offset, length)
+        return sections
+
+    def _raw(self, name: str) -> memoryview:
+        offset, length = self._sections[name]
+        view = memoryview(self._mmap)[offset : offset + length]
+        self._views.append(view)
+        return view
+
+    def _column(self, name: str, typecode: str) -> Union[memoryview, array]:
+        view = self._raw(name)
+        if sys.byteorder == "big":
+            values = array(typecode, view)
+            values.byteswap()
+            return values
+        cast = view.cast(typecode)
+        self._views.append(cast)
+        return cast
+
+    def close(self):
+        """ Release the mapping, materialized offers keep working """
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._mmap.close()
+
+    def string(self, id_: int) -> Optional[str]:
+        """ String of the table by id """
+        if id_ == NONE_ID:
+            return None
+        value = self._strings[id_]
+        if value is None:
+            offsets = self._columns["string_offsets"]
+            value = self._strings[id_] = sys.intern(
+                str(self._string_data[offsets[id_] : offsets[id_ + 1]], "utf-8")
+            )
+        return value
+
+    def terms(self, row: int) -> bytes:
+        """ Raw terms document of an offer, copied out of the mapping """
+        offsets = self._columns["terms_offsets"]
+        offset = self._sections["terms_data"][0]
+        return self._mmap[offset + offsets[row] : offset + offsets[row + 1]]
+
+    def _offer(self, row: int) -> Offer:
+        columns = self._columns
+        string = self.string
+        rows = len(self)
+        kwargs = {
+            name_: string(columns["offer_fields"][col_ * rows + row])
+            for col_, name_ in enumerate(_STRING_FIELDS)
+        }
+        attr_offsets = columns["attribute_offsets"]
+        kwargs["attributes"] = {
+            string(columns["attribute_keys"][pos_]): string(columns["attribute_values"][pos_])
+            for pos_ in range(attr_offsets[row], attr_offsets[row + 1])
+        }
+        price_offsets = columns["price_offsets"]
+        kwargs["prices"] = {
+            string(columns["price_types"][pos_]): columns["price_values"][pos_]
+            for pos_ in range(price_offsets[row], price_offsets[row + 1])
+        }
+        kwargs["terms"] = Terms(self.terms(row))
+        return Offer(**kwargs)
+
+    def offers(self, region: str, key: str) -> List[Offer]:
+        """ Materialize the offers of a partition """
+        start, count = self.partitions[(region, key)]
+        with self._lock:
+            return [self._offer(row_) for row_ in range(start, start + count)]
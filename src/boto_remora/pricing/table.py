@@ -0,0 +1,218 @@
+"""
+Columnar view of offers for vectorized price queries
+
+Requires numpy, install with ``pip install boto_remora[table]``.
+"""
+import dataclasses
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .main import Offer
+
+
+_LOGGER = logging.getLogger(__name__)
+
+MISSING = -1
+OFFER_FIELDS = (
+    "region",
+    "unit",
+    "description",
+    "productFamily",
+    "serviceCode",
+    "currency",
+    "sku",
+)
+
+
+@dataclasses.dataclass()
+class EncodedColumn:
+    """ Dictionary encoded string column """
+
+    codes: np.ndarray
+    values: List[str]
+    lookup: Dict[str, int]
+
+    @classmethod
+    def encode(cls, values: Iterable[Optional[str]], size: int) -> "EncodedColumn":
+        """ Encode strings as int32 codes, None as MISSING """
+        lookup = dict()
+        codes = np.fromiter(
+            (
+                MISSING if val_ is None else lookup.setdefault(val_, len(lookup))
+                for val_ in values
+            ),
+            dtype=np.int32,
+            count=size,
+        )
+        return cls(codes, list(lookup), lookup)
+
+    def code(self, value: str) -> int:
+        """ Code of a value, MISSING if it never occurs """
+        return self.lookup.get(value, MISSING)
+
+    def decode(self, code: int) -> Optional[str]:
+        """ Value of a code """
+        return None if code == MISSING else self.values[code]
+
+
+@dataclasses.dataclass()
+class OfferTable:
+    """
+    Offers stored as dictionary encoded attribute columns and float price arrays.
+
+    Filtering returns a new table sharing the columns with a narrower row
+    selection. ``Offer`` objects are only built for rows a caller touches and
+    do not carry terms.
+    """
+
+    fields: Dict[str, EncodedColumn]
+    attributes: Dict[str, EncodedColumn]
+    prices: Dict[str, np.ndarray]
+    rows: np.ndarray
+
+    @classmethod
+    def from_offers(cls, offers: Iterable[Offer]) -> "OfferTable":
+        """ Build a table from offers """
+        offers = offers if isinstance(offers, Sequence) else list(offers)
+        size = len(offers)
+        attr_names = dict.fromkeys(
+            name_ for offer_ in offers for name_ in (offer_.attributes or dict())
+        )
+        summaries = [offer_.price_summary() for offer_ in offers]
+        price_types = dict.fromkeys(ptype_ for summary_ in summaries for ptype_ in summary_)
+
+        fields = {
+            name_: EncodedColumn.encode((getattr(offer_, name_) for offer_ in offers), size)
+            for name_ in OFFER_FIELDS
+        }
+        attributes = {
+            name_: EncodedColumn.encode(
+                ((offer_.attributes or dict()).get(name_) for offer_ in offers), size
+            )
+            for name_ in attr_names
+        }
+        prices = {
+            ptype_: np.fromiter(
+                (summary_.get(ptype_, np.nan) for summary_ in summaries),
+                dtype=np.float64,
+                count=size,
+            )
+            for ptype_ in price_types
+        }
+        _LOGGER.debug("Built table of %s offers with %s attributes", size, len(attributes))
+        return cls(fields, attributes, prices, np.arange(size))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _select(self, rows: np.ndarray) -> "OfferTable":
+        return dataclasses.replace(self, rows=rows)
+
+    def _mask(self, column: EncodedColumn, value: Union[str, Sequence[str]]) -> np.ndarray:
+        """ Rows of the current selection where column equals (one of) value """
+        values = (value,) if isinstance(value, str) else value
+        codes = [code_ for code_ in map(column.code, values) if code_ != MISSING]
+        return np.isin(column.codes[self.rows], codes)
+
+    def filter(
+        self,
+        filters: Optional[Dict[str, Union[str, Sequence[str]]]] = None,
+        region: Optional[Union[str, Sequence[str]]] = None,
+    ) -> "OfferTable":
+        """
+        Rows whose attributes equal the filter values.
+
+        A sequence of values matches any of them. Unknown attributes match nothing.
+        """
+        mask = np.ones(len(self.rows), dtype=bool)
+        if region is not None:
+            mask &= self._mask(self.fields["region"], region)
+        for name, value in (filters or dict()).items():
+            if name not in self.attributes:
+                return self._select(self.rows[:0])
+            mask &= self._mask(self.attributes[name], value)
+        return self._select(self.rows[mask])
+
+    def price(self, price_type: str = "OnDemand") -> np.ndarray:
+        """ Prices of the selected rows, NaN where an offer has no price of the type """
+        if price_type not in self.prices:
+            return np.full(len(self.rows), np.nan)
+        return self.prices[price_type][self.rows]
+
+    def column(self, name: str) -> List[Optional[str]]:
+        """ Decoded values of an attribute or offer field for the selected rows """
+        column = self.fields.get(name) or self.attributes[name]
+        return [column.decode(code_) for code_ in column.codes[self.rows]]
+
+    def percentile(self, q: Union[float, Sequence[float]], price_type: str = "OnDemand"):
+        """ Price percentiles ignoring offers without a price """
+        return np.nanpercentile(self.price(price_type), q)
+
+    def group_by_region(self, price_type: str = "OnDemand", agg: str = "min") -> Dict[str, float]:
+        """
+        Aggregate prices per region.
+
+        Parameters
+        ----------
+        price_type : str
+            Key of ``Offer.prices`` to aggregate (default "OnDemand")
+        agg : str
+            One of min, max, mean or count (default "min")
+        """
+        prices = self.price(price_type)
+        valid = ~np.isnan(prices)
+        region = self.fields["region"]
+        codes, inverse = np.unique(region.codes[self.rows][valid], return_inverse=True)
+        prices = prices[valid]
+        counts = np.bincount(inverse, minlength=len(codes))
+        if agg == "min":
+            result = np.full(len(codes), np.inf)
+            np.minimum.at(result, inverse, prices)
+        elif agg == "max":
+            result = np.full(len(codes), -np.inf)
+            np.maximum.at(result, inverse, prices)
+        elif agg == "mean":
+            result = np.bincount(inverse, weights=prices, minlength=len(codes)) / counts
+        elif agg == "count":
+            result = counts
+        else:
+            raise ValueError(f"Unsupported aggregation {agg}.")
+
+        return {region.decode(code_): val_.item() for code_, val_ in zip(codes, result)}
+
+    def cheapest(self, k: int = 1, price_type: str = "OnDemand") -> List[Offer]:
+        """ The k cheapest offers, ignoring offers without a price """
+        prices = self.price(price_type)
+        positions = np.flatnonzero(~np.isnan(prices))
+        if k < len(positions):
+            positions = positions[np.argpartition(prices[positions], k)[:k]]
+        positions = positions[np.argsort(prices[positions], kind="stable")]
+        return [self.offer(pos_) for pos_ in positions]
+
+    def offer(self, position: int) -> Offer:
+        """ Build the Offer for a row of the current selection """
+        row = self.rows[position]
+        kwargs: Dict[str, Any] = {
+            name_: column_.decode(column_.codes[row]) for name_, column_ in self.fields.items()
+        }
+        kwargs["attributes"] = {
+            name_: column_.values[column_.codes[row]]
+            for name_, column_ in self.attributes.items()
+            if column_.codes[row] != MISSING
+        }
+        kwargs["prices"] = {
+            ptype_: prices_[row].item()
+            for ptype_, prices_ in self.prices.items()
+            if not np.isnan(prices_[row])
+        }
+        return Offer(**kwargs)
+
+    def __getitem__(self, position: int) -> Offer:
+        if not -len(self.rows) <= position < len(self.rows):
+            raise IndexError(position)
+        return self.offer(position)
+
+    def __iter__(self) -> Iterator[Offer]:
+        return map(self.offer, range(len(self.rows)))
@@ -0,0 +1,335 @@
+""" Structured model of Pricing API terms """
+import dataclasses
+import itertools
+import logging
+import operator
+import sys
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from boto_remora.util import json_loads
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# Approximate bytes of terms decoded from JSON and of parsed terms, measured with
+# tracemalloc: fixed, per term, per price dimension and per character of descriptions
+_DECODED_SIZE = (1500, 1100, 970, 2)
+_PARSED_SIZE = (750, 520, 670, 2)
+
+
+def _range_bound(value: Optional[str], default: float) -> float:
+    """ Parse beginRange/endRange, "Inf" being unbounded """
+    if value in (None, ""):
+        return default
+    return float("inf") if value == "Inf" else float(value)
+
+
+def _format_bound(value: float) -> str:
+    """ Inverse of ``_range_bound`` """
+    return "Inf" if value == float("inf") else f"{value:g}"
+
+
+@dataclasses.dataclass(frozen=True)
+class PriceDimension:
+    """ A rate of a term, e.g. the hourly usage or upfront fee of a reservation """
+
+    rate_code: str
+    unit: str
+    description: str = ""
+    price_per_unit: Dict[str, float] = dataclasses.field(default_factory=dict)
+    begin_range: float = 0.0
+    end_range: float = float("inf")
+    applies_to: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PriceDimension":
+        """ Parse a priceDimensions entry """
+        return cls(
+            rate_code=data.get("rateCode", ""),
+            unit=data.get("unit", ""),
+            description=data.get("description", ""),
+            price_per_unit={k: float(v) for k, v in data.get("pricePerUnit", dict()).items()},
+            begin_range=_range_bound(data.get("beginRange"), 0.0),
+            end_range=_range_bound(data.get("endRange"), float("inf")),
+            applies_to=tuple(data.get("appliesTo", ())),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """ priceDimensions entry as returned by the API """
+        return {
+            "rateCode": self.rate_code,
+            "unit": self.unit,
+            "description": self.description,
+            "pricePerUnit": {k: repr(v) for k, v in self.price_per_unit.items()},
+            "beginRange": _format_bound(self.begin_range),
+            "endRange": _format_bound(self.end_range),
+            "appliesTo": list(self.applies_to),
+        }
+
+    def price(self, currency: str = "USD") -> Optional[float]:
+        """ Price per unit in currency """
+        return self.price_per_unit.get(currency)
+
+    def in_range(self, quantity: float) -> bool:
+        """ Checks if quantity falls in this dimension's tier """
+        return self.begin_range <= quantity < self.end_range
+
+
+@dataclasses.dataclass(frozen=True)
+class Term:  # pylint: disable=too-many-instance-attributes
+    """ An OnDemand or Reserved term of an offer """
+
+    term_type: str
+    offer_term_code: str
+    sku: str = ""
+    effective_date: str = ""
+    lease_contract_length: Optional[str] = None
+    purchase_option: Optional[str] = None
+    offering_class: Optional[str] = None
+    price_dimensions: Tuple[PriceDimension, ...] = ()
+
+    @classmethod
+    def from_dict(cls, term_type: str, data: Dict[str, Any]) -> "Term":
+        """ Parse a term entry """
+        attributes = data.get("termAttributes") or dict()
+        dimensions = map(PriceDimension.from_dict, data.get("priceDimensions", dict()).values())
+        return cls(
+            term_type=term_type,
+            offer_term_code=data.get("offerTermCode", ""),
+            sku=data.get("sku", ""),
+            effective_date=data.get("effectiveDate", ""),
+            lease_contract_length=attributes.get("LeaseContractLength"),
+            purchase_option=attributes.get("PurchaseOption"),
+            offering_class=attributes.get("OfferingClass"),
+            price_dimensions=tuple(sorted(dimensions, key=lambda dim_: dim_.begin_range)),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """ Term entry as returned by the API """
+        attributes = {
+            "LeaseContractLength": self.lease_contract_length,
+            "PurchaseOption": self.purchase_option,
+            "OfferingClass": self.offering_class,
+        }
+        return {
+            "offerTermCode": self.offer_term_code,
+            "sku": self.sku,
+            "effectiveDate": self.effective_date,
+            "termAttributes": {k: v for k, v in attributes.items() if v is not None},
+            "priceDimensions": {dim_.rate_code: dim_.to_dict() for dim_ in self.price_dimensions},
+        }
+
+    def dimension(
+        self, quantity: float = 0.0, unit: Optional[str] = None
+    ) -> Optional[PriceDimension]:
+        """ Price dimension of the tier holding quantity, optionally of a unit """
+        for dim in self.price_dimensions:
+            if (unit is None or dim.unit == unit) and dim.in_range(quantity):
+                return dim
+        return None
+
+
+def _estimate_size(coefficients: Tuple[int, ...], counts: Tuple[int, ...]) -> int:
+    """ Bytes of terms from their counts of terms, dimensions and description characters """
+    return coefficients[0] + sum(map(operator.mul, coefficients[1:], counts))
+
+
+def _decoded_counts(terms: Dict[str, Dict[str, Any]]) -> Tuple[int, int, int]:
+    """ Counts of terms, dimensions and description characters of decoded terms """
+    dimensions = [
+        dim_
+        for terms_ in terms.values()
+        for term_ in terms_.values()
+        for dim_ in term_.get("priceDimensions", dict()).values()
+    ]
+    return (
+        sum(map(len, terms.values())),
+        len(dimensions),
+        sum(len(dim_.get("description", "")) for dim_ in dimensions),
+    )
+
+
+def _raw_price(
+    terms: Iterable[Dict[str, Any]], quantity: float, unit: Optional[str], currency: str
+) -> Optional[float]:
+    """ ``Terms.price`` of raw term entries, without building ``Term`` objects """
+    for term in terms:
+        dimensions = sorted(
+            term.get("priceDimensions", dict()).values(),
+            key=lambda dim_: _range_bound(dim_.get("beginRange"), 0.0),
+        )
+        for dim in dimensions:
+            if unit is not None and dim.get("unit", "") != unit:
+                continue
+            if (
+                _range_bound(dim.get("beginRange"), 0.0)
+                <= quantity
+                < _range_bound(dim.get("endRange"), float("inf"))
+            ):
+                price = dim.get("pricePerUnit", dict()).get(currency)
+                return float(price) if price is not None else None
+    return None
+
+
+class Terms(Mapping):
+    """
+    Terms of an offer by term type, parsed on first access.
+
+    The source is the raw ``PriceList`` JSON string of the offer, an already
+    decoded terms dict or a callable returning either. It is released once parsed.
+    ``on_parse``, when set, is called once with the change of ``sys.getsizeof``
+    when the terms get parsed.
+    """
+
+    __slots__ = ("_source", "_terms", "on_parse")
+
+    def __init__(self, source: Optional[Union[str, bytes, Dict[str, Any], Callable]] = None):
+        self._source = source
+        self._terms: Optional[Dict[str, Tuple[Term, ...]]] = None
+        self.on_parse: Optional[Callable[[int], None]] = None
+
+    @property
+    def is_parsed(self) -> bool:
+        """ Checks if terms have been parsed """
+        return self._terms is not None
+
+    def _decoded_source(self) -> Dict[str, Any]:
+        source = self._source
+        if callable(source):
+            source = source()
+        if isinstance(source, (str, bytes)):
+            source = json_loads(source).get("terms", dict())
+        return source or dict()
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """ Terms as returned by the API, without parsing them when not parsed yet """
+        if self._terms is None:
+            return self._decoded_source()
+        return {
+            term_type_: {
+                f"{term_.sku}.{term_.offer_term_code}": term_.to_dict() for term_ in terms_
+            }
+            for term_type_, terms_ in self._terms.items()
+        }
+
+    @property
+    def _parsed(self) -> Dict[str, Tuple[Term, ...]]:
+        if self._terms is None:
+            on_parse, self.on_parse = self.on_parse, None
+            size = sys.getsizeof(self) if on_parse is not None else 0
+            self._terms = {
+                term_type_: tuple(Term.from_dict(term_type_, term_) for term_ in terms_.values())
+                for term_type_, terms_ in self._decoded_source().items()
+            }
+            self._source = None
+            if on_parse is not None:
+                on_parse(sys.getsizeof(self) - size)
+        return self._terms
+
+    def __getitem__(self, term_type: str) -> Tuple[Term, ...]:
+        return self._parsed[term_type]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._parsed)
+
+    def __len__(self) -> int:
+        return len(self._parsed)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._parsed if self.is_parsed else '...'})"
+
+    def __sizeof__(self) -> int:
+        """
+        Approximate bytes including the unparsed source or the parsed terms.
+        Strings are measured, decoded and parsed terms estimated from their counts.
+        """
+        if self._terms is not None:
+            dimensions = [
+                dim_
+                for term_ in itertools.chain(*self._terms.values())
+                for dim_ in term_.price_dimensions
+            ]
+            counts = (
+                sum(map(len, self._terms.values())),
+                len(dimensions),
+                sum(len(dim_.description) for dim_ in dimensions),
+            )
+            return _estimate_size(_PARSED_SIZE, counts)
+        if isinstance(self._source, Mapping):
+            return _estimate_size(_DECODED_SIZE, _decoded_counts(self._source))
+        size = object.__sizeof__(self)
+        if isinstance(self._source, (str, bytes)):
+            size += sys.getsizeof(self._source)
+        return size
+
+    def summary(
+        self, quantity: float = 0.0, unit: Optional[str] = None, currency: str = "USD"
+    ) -> Dict[str, float]:
+        """
+        ``price`` of each term type with default term attributes, read from the
+        source without parsing it when not parsed yet
+        """
+        if self._terms is None:
+            summary = {
+                term_type_: _raw_price(terms_.values(), quantity, unit, currency)
+                for term_type_, terms_ in self._decoded_source().items()
+            }
+        else:
+            summary = {
+                term_type_: self.price(term_type_, quantity, unit, currency)
+                for term_type_ in self._terms
+            }
+        return {k: v for k, v in summary.items() if v is not None}
+
+    def find(
+        self,
+        term_type: Optional[str] = None,
+        lease_contract_length: Optional[str] = None,
+        purchase_option: Optional[str] = None,
+        offering_class: Optional[str] = None,
+    ) -> List[Term]:
+        """ Terms matching every given attribute """
+        criteria = {
+            "term_type": term_type,
+            "lease_contract_length": lease_contract_length,
+            "purchase_option": purchase_option,
+            "offering_class": offering_class,
+        }
+        criteria = {k: v for k, v in criteria.items() if v is not None}
+        terms = self[term_type] if term_type else sum(self.values(), ())
+        return [
+            term_ for term_ in terms if all(getattr(term_, k) == v for k, v in criteria.items())
+        ]
+
+    def price(
+        self,
+        term_type: str = "OnDemand",
+        quantity: float = 0.0,
+        unit: Optional[str] = None,
+        currency: str = "USD",
+        **term_attributes: str,
+    ) -> Optional[float]:
+        """
+        Price per unit of the first matching term at the tier holding quantity.
+
+        Parameters
+        ----------
+        term_type : str
+            OnDemand or Reserved (default "OnDemand")
+        quantity : float
+            Usage selecting the tier of tiered prices (default 0)
+        unit : str, optional
+            Only consider dimensions of this unit, e.g. "Hrs" or "Quantity"
+        currency : str
+            Currency of the price (default "USD")
+        term_attributes : str
+            Keyword arguments of ``find``, e.g. lease_contract_length="1yr"
+        """
+        if term_type not in self:
+            return None
+        for term in self.find(term_type=term_type, **term_attributes):
+            dim = term.dimension(quantity, unit)
+            if dim is not None:
+                return dim.price(currency)
+        return None
@@ -1,12 +1,53 @@
 """ Helpers """
 
+import importlib
+import json
 import logging
+import sys
 from enum import Enum
+from typing import Any, Callable, Dict, Union
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _json_backend() -> Callable[[Union[str, bytes]], Any]:
+    """ Fastest available JSON decoder, orjson if installed """
+    try:
+        import orjson  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return json.loads
+    _LOGGER.debug("Using orjson to decode JSON")
+    return orjson.loads  # pylint: disable=no-member
+
+
+json_loads = _json_backend()  # pylint: disable=invalid-name
+
+
+def lazy_attributes(module_name: str, attributes: Dict[str, str]) -> Callable[[str], Any]:
+    """
+    Module ``__getattr__`` importing attributes on first access, see PEP 562.
+
+    Parameters
+    ----------
+    module_name : str
+        ``__name__`` of the package
+    attributes : Dict[str, str]
+        Attribute names mapped to the relative module defining them. An
+        attribute named like its module is the module itself.
+    """
+
+    def __getattr__(name: str) -> Any:
+        if name not in attributes:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        submodule = importlib.import_module(attributes[name], module_name)
+        value = submodule if attributes[name] == f".{name}" else getattr(submodule, name)
+        setattr(sys.modules[module_name], name, value)
+        return value
+
+    return __getattr__
+
+
 class ExtendedEnum(Enum):
     """ Add helper methods to Enums """
 
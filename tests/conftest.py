@@ -0,0 +1,79 @@
+""" Shared fixtures """
+import pytest
+
+
+def _dimension(rate_code, unit, price, description=""):
+    return {
+        "rateCode": rate_code,
+        "unit": unit,
+        "description": description,
+        "pricePerUnit": {"USD": price},
+        "beginRange": "0",
+        "endRange": "Inf",
+        "appliesTo": [],
+    }
+
+
+def price_list_item(sku, instance_type="m5.large", region="us-east-1", on_demand="0.096"):
+    """
+    get_products document of an EC2 instance with an OnDemand term and an
+    All Upfront reservation whose hourly rate is zero
+    """
+    return {
+        "product": {
+            "sku": sku,
+            "productFamily": "Compute Instance",
+            "attributes": {
+                "location": "US East (N. Virginia)",
+                "regionCode": region,
+                "instanceType": instance_type,
+                "operatingSystem": "Linux",
+            },
+        },
+        "serviceCode": "AmazonEC2",
+        "terms": {
+            "OnDemand": {
+                f"{sku}.JRTCKXETXF": {
+                    "offerTermCode": "JRTCKXETXF",
+                    "sku": sku,
+                    "effectiveDate": "2020-01-01T00:00:00Z",
+                    "termAttributes": {},
+                    "priceDimensions": {
+                        f"{sku}.JRTCKXETXF.6YS6EN2CT7": _dimension(
+                            f"{sku}.JRTCKXETXF.6YS6EN2CT7", "Hrs", on_demand, "On demand"
+                        )
+                    },
+                }
+            },
+            "Reserved": {
+                f"{sku}.6QCMYABX3D": {
+                    "offerTermCode": "6QCMYABX3D",
+                    "sku": sku,
+                    "effectiveDate": "2020-01-01T00:00:00Z",
+                    "termAttributes": {
+                        "LeaseContractLength": "1yr",
+                        "OfferingClass": "standard",
+                        "PurchaseOption": "All Upfront",
+                    },
+                    "priceDimensions": {
+                        f"{sku}.6QCMYABX3D.2TG2D8R56U": _dimension(
+                            f"{sku}.6QCMYABX3D.2TG2D8R56U", "Quantity", "500"
+                        ),
+                        f"{sku}.6QCMYABX3D.6YS6EN2CT7": _dimension(
+                            f"{sku}.6QCMYABX3D.6YS6EN2CT7", "Hrs", "0.0"
+                        ),
+                    },
+                }
+            },
+        },
+    }
+
+
+@pytest.fixture(name="price_list")
+def fixture_price_list():
+    """ Documents of two instance types in two regions """
+    return [
+        price_list_item("AAA", "m5.large", "us-east-1", "0.096"),
+        price_list_item("BBB", "m5.xlarge", "us-east-1", "0.192"),
+        price_list_item("CCC", "m5.large", "eu-west-1", "0.107"),
+    ]
@@ -0,0 +1,137 @@
+""" boto_remora.aws.aio against a local stub of the SSM and Pricing endpoints """
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from boto_remora.aws.main import Ssm
+
+
+# Skipped without the async extra
+aio = pytest.importorskip("boto_remora.aws.aio")  # pylint: disable=invalid-name
+
+_REGION_PATH = "/aws/service/global-infrastructure/regions"
+
+
+def _product(sku, location):
+    return json.dumps(
+        {
+            "product": {"sku": sku, "attributes": {"location": location}},
+            "terms": {"OnDemand": {}},
+        }
+    )
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """ Answers SSM and Pricing JSON requests, recording their targets """
+
+    calls = []
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """ Dispatch on the operation named by X-Amz-Target """
+        target = self.headers["X-Amz-Target"].split(".")[-1]
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.calls.append((target, request))
+        body = json.dumps(getattr(self, f"_{target}")(request)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-amz-json-1.1")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def _GetParametersByPath(_request):  # pylint: disable=invalid-name
+        codes = ("us-east-1", "xx-new-1", "xx-new-2", "xx-new-3")
+        return {
+            "Parameters": [{"Name": f"{_REGION_PATH}/{code_}", "Value": code_} for code_ in codes]
+        }
+
+    @staticmethod
+    def _GetParameters(request):  # pylint: disable=invalid-name
+        return {
+            "Parameters": [
+                {"Name": name_, "Value": f"New {name_.split('/')[-2]}"}
+                for name_ in request["Names"]
+            ],
+            "InvalidParameters": ["unused"],
+        }
+
+    @staticmethod
+    def _GetProducts(request):  # pylint: disable=invalid-name
+        if "NextToken" not in request:
+            return {"PriceList": [_product("A", "New xx-new-1")], "NextToken": "page2"}
+        return {"PriceList": [_product("B", "New xx-new-1")]}
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture(name="endpoint_url")
+def fixture_endpoint_url(monkeypatch):
+    """ URL of a stub endpoint, with region names forgotten before and after """
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    Ssm.clear_region_names()
+    _StubHandler.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    Ssm.clear_region_names()
+
+
+def _targets():
+    return [target_ for target_, _ in _StubHandler.calls]
+
+
+def test_ssm_region_names_batched_and_memoized(endpoint_url):
+    """ Missing long names are fetched in batches, once per process """
+
+    async def region_names():
+        async with aio.AsyncSsm(
+            region_name="us-east-1", endpoint_url=endpoint_url, parameter_batch_size=2
+        ) as ssm:
+            return await ssm.region_names()
+
+    regions = asyncio.run(region_names())
+    assert regions["xx-new-3"] == "New xx-new-3"
+    assert "us-gov-west-1" in regions
+    assert _targets() == ["GetParametersByPath", "GetParameters", "GetParameters"]
+
+    assert asyncio.run(region_names()) == regions
+    assert len(_StubHandler.calls) == 3
+
+
+def test_ssm_region_names_of_session_partition(endpoint_url):
+    """ all_partitions=False drops the names of other partitions """
+
+    async def region_names():
+        async with aio.AsyncSsm(
+            region_name="us-east-1", endpoint_url=endpoint_url, all_partitions=False
+        ) as ssm:
+            return await ssm.region_names()
+
+    regions = asyncio.run(region_names())
+    assert "us-gov-west-1" not in regions
+    assert regions["xx-new-1"] == "New xx-new-1"
+
+
+def test_pricing_price_list_through_endpoint(endpoint_url):
+    """ Region names and products are both served by endpoint_url """
+
+    async def price_list():
+        async with aio.AsyncPricing(endpoint_url=endpoint_url) as pricing:
+            return await pricing.get_price_list("AmazonEC2", region="xx-new-1")
+
+    items = asyncio.run(price_list())
+    assert [item_["product"]["sku"] for item_ in items] == ["A", "B"]
+    assert all(isinstance(item_, dict) for item_ in items)
+    products = [request_ for target_, request_ in _StubHandler.calls if target_ == "GetProducts"]
+    assert products[0]["Filters"] == [
+        {"Type": "TERM_MATCH", "Field": "location", "Value": "New xx-new-1"}
+    ]
+    assert products[1]["NextToken"] == "page2"
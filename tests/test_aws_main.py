@@ -0,0 +1,118 @@
+""" boto_remora.aws.main against stubbed clients """
+import json
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from boto_remora.aws.main import Pricing, Ssm
+from boto_remora.aws.pricelist import PriceListItem
+
+
+_METADATA = {"RequestId": "stub", "HTTPStatusCode": 200}
+
+
+def _product(sku):
+    return json.dumps({"product": {"sku": sku}, "terms": {"OnDemand": {}}})
+
+
+@pytest.fixture(name="pricing")
+def fixture_pricing():
+    """ Pricing on a stubbed client answering two pages of get_products """
+    session = boto3.Session(
+        aws_access_key_id="testing", aws_secret_access_key="testing", region_name="us-east-1"
+    )
+    pricing = Pricing(session=session, rate_limiter=None)
+    with Stubber(pricing.client) as stubber:
+        stubber.add_response(
+            "get_products",
+            {"PriceList": [_product("A")], "NextToken": "page2", "ResponseMetadata": _METADATA},
+        )
+        stubber.add_response(
+            "get_products", {"PriceList": [_product("B")], "ResponseMetadata": _METADATA}
+        )
+        yield pricing
+
+
+def test_get_price_list_returns_dicts(pricing):
+    """ Items are plain dicts, mutable and JSON serializable """
+    items = pricing.get_price_list("AmazonEC2")
+    assert all(type(item_) is dict for item_ in items)  # pylint: disable=unidiomatic-typecheck
+    assert [item_["product"]["sku"] for item_ in items] == ["A", "B"]
+    items[0]["product"]["sku"] = "C"
+    assert json.loads(json.dumps(items))[0]["product"]["sku"] == "C"
+
+
+def test_iter_price_list_items_decode_lazily(pricing):
+    """ Items keep their raw JSON until terms are accessed """
+    items = list(pricing.iter_price_list_items("AmazonEC2"))
+    assert all(isinstance(item_, PriceListItem) for item_ in items)
+    assert not any(item_.is_decoded for item_ in items)
+    assert items[1]["product"]["sku"] == "B"
+    assert not items[1].is_decoded
+    assert items[1]["terms"] == {"OnDemand": {}}
+    assert items[1].is_decoded and not items[0].is_decoded
+
+
+def test_price_list_item_decodes_members_before_terms():
+    """ Product and single term types are read without decoding the other terms """
+    document = {
+        "product": {"sku": "A", "attributes": {"location": "US East (N. Virginia)"}},
+        "serviceCode": "AmazonEC2",
+        "terms": {"OnDemand": {"A.1": {"sku": "A"}}, "Reserved": {"A.2": {"sku": "A"}}},
+        "version": "20200101",
+    }
+    for raw in (json.dumps(document), json.dumps(document, indent=2)):
+        item = PriceListItem(raw)
+        assert item["product"] == document["product"]
+        assert item["serviceCode"] == "AmazonEC2"
+        assert item.term_type("OnDemand") == {"A.1": {"sku": "A"}}
+        assert item.term_type("Spot") == dict()
+        assert not item.is_decoded
+        assert item["version"] == "20200101"
+        assert item.is_decoded and dict(item) == document
+
+
+def test_price_list_item_terms_first():
+    """ Members after terms decode the whole document """
+    raw = json.dumps({"terms": {"OnDemand": {}}, "product": {"sku": "A"}})
+    item = PriceListItem(raw)
+    assert item.term_type("OnDemand") == dict()
+    assert item["product"] == {"sku": "A"}
+    assert item.is_decoded
+    with pytest.raises(ValueError):
+        PriceListItem('{"product": {"sku": "A"} "terms": {}}').get("product")
+
+
+def test_ssm_skips_invalid_region_parameters(caplog):
+    """ Regions get_parameters does not know are logged and left out """
+    session = boto3.Session(
+        aws_access_key_id="testing", aws_secret_access_key="testing", region_name="us-east-1"
+    )
+    ssm = Ssm(session=session)
+    path = "/aws/service/global-infrastructure/regions"
+    with Stubber(ssm.client) as stubber:
+        stubber.add_response(
+            "get_parameters",
+            {
+                "Parameters": [
+                    {"Name": f"{path}/us-east-1/longName", "Value": "US East (N. Virginia)"}
+                ],
+                "InvalidParameters": [f"{path}/xx-gone-1/longName"],
+                "ResponseMetadata": _METADATA,
+            },
+        )
+        stubber.add_response(
+            "get_parameters",
+            {
+                "Parameters": [],
+                "InvalidParameters": [f"{path}/xx-gone-1/longName"],
+                "ResponseMetadata": _METADATA,
+            },
+        )
+        # pylint: disable=protected-access
+        assert ssm._get_region_long_names(["us-east-1", "xx-gone-1"]) == {
+            "us-east-1": "US East (N. Virginia)"
+        }
+        assert ssm._get_region_long_name("xx-gone-1") is None
+    assert "xx-gone-1" in caplog.text
@@ -0,0 +1,116 @@
+""" boto_remora.aws.cache """
+import json
+import threading
+from types import SimpleNamespace
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from boto_remora.aws import cache as cache_module
+from boto_remora.aws.cache import ResponseCache
+from boto_remora.aws.main import Pricing
+
+
+@pytest.fixture(name="clock")
+def fixture_clock(monkeypatch):
+    """ Time of the cache module, advanced by the tests """
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_ttl_expiry(tmp_path, clock):
+    """ Entries older than the TTL are missing and removed """
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=60)
+    cache.set("key", {"value": 1})
+    clock.now += 59
+    assert cache.get("key") == {"value": 1}
+    clock.now += 2
+    assert cache.get("key") is None
+    assert cache.size == 0
+
+
+def test_least_recently_used_evicted(tmp_path, clock):
+    """ Exceeding max_bytes evicts the entries read or written least recently """
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_bytes=25)
+    for key in ("a", "b"):
+        clock.now += 1
+        cache.set(key, key * 8)
+    clock.now += 1
+    assert cache.get("a") == "aaaaaaaa"
+    clock.now += 1
+    cache.set("c", "c" * 8)
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaaaaaa"
+    assert cache.get("c") == "cccccccc"
+    assert cache.size == 20
+
+
+def test_oversize_value_not_stored(tmp_path):
+    """ A value larger than max_bytes leaves the other entries alone """
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_bytes=30)
+    cache.set("a", "a" * 8)
+    cache.set("b", "b" * 8)
+    cache.set("big", "x" * 8)
+    cache.set("big", "x" * 40)
+    assert cache.get("big") is None
+    assert cache.get("a") == "aaaaaaaa"
+    assert cache.get("b") == "bbbbbbbb"
+
+
+def test_concurrent_writers(tmp_path):
+    """ Threads and separate caches on one file do not lose writes """
+    path = tmp_path / "cache.sqlite"
+    caches = [ResponseCache(path), ResponseCache(path)]
+    errors = list()
+
+    def write(num):
+        try:
+            for entry in range(25):
+                caches[num % 2].set(f"{num}.{entry}", [num, entry])
+        except Exception as err:  # pylint: disable=broad-except
+            errors.append(err)
+
+    threads = [threading.Thread(target=write, args=(num_,)) for num_ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert all(
+        caches[0].get(f"{num_}.{entry_}") == [num_, entry_]
+        for num_ in range(8)
+        for entry_ in range(25)
+    )
+
+
+def test_use_cache_false_bypasses_lookup(tmp_path):
+    """ Pricing serves cached pages and refetches them with use_cache=False """
+    session = boto3.Session(
+        aws_access_key_id="testing", aws_secret_access_key="testing", region_name="us-east-1"
+    )
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    pricing = Pricing(session=session, rate_limiter=None, cache=cache)
+
+    def product(sku):
+        return json.dumps({"product": {"sku": sku}, "terms": {}})
+
+    def skus(**kwargs):
+        return [
+            item_["product"]["sku"] for item_ in pricing.iter_price_list("AmazonEC2", **kwargs)
+        ]
+
+    metadata = {"RequestId": "stub", "HTTPStatusCode": 200}
+    with Stubber(pricing.client) as stubber:
+        stubber.add_response(
+            "get_products", {"PriceList": [product("A")], "ResponseMetadata": metadata}
+        )
+        stubber.add_response(
+            "get_products", {"PriceList": [product("B")], "ResponseMetadata": metadata}
+        )
+        assert skus() == ["A"]
+        assert skus() == ["A"]
+        assert skus(use_cache=False) == ["B"]
+        stubber.assert_no_pending_responses()
+    assert skus() == ["B"]
@@ -0,0 +1,96 @@
+""" boto_remora.pricing.catalog """
+import pytest
+
+from boto_remora.aws.cache import ResponseCache
+from boto_remora.exception import BotoRemoraInvalidFilterValue
+from boto_remora.pricing.catalog import AttributeCatalog
+from boto_remora.pricing.main import Offers
+
+
+class _FakePricing:
+    """ Pricing listing attribute values, counting requests """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.values = {
+            "operatingSystem": ["Linux", "Windows", "RHEL"],
+            "instanceType": ["m5.large", "m5.xlarge", "t3.micro"],
+            "tenancy": ["Shared", "Dedicated"],
+        }
+        self.requests = []
+        self.failing = set()
+
+    @property
+    def services(self):
+        """ Attribute names by service code """
+        return {"AmazonEC2": sorted(self.values)}
+
+    def attribute_values(self, servicecode, attribute):
+        """ Values of an attribute """
+        assert servicecode == "AmazonEC2"
+        self.requests.append(attribute)
+        if attribute in self.failing:
+            raise RuntimeError(f"{attribute} throttled")
+        return list(self.values[attribute])
+
+
+def test_validate_normalizes_values():
+    """ Values are matched ignoring case and whitespace, unknown attributes pass """
+    pricing = _FakePricing()
+    catalog = AttributeCatalog("AmazonEC2", pricing=pricing)
+    filters = {"operatingSystem": " linux ", "instanceType": "M5.Large", "location": "Anywhere"}
+    assert catalog.validate(filters) == {
+        "operatingSystem": "Linux",
+        "instanceType": "m5.large",
+        "location": "Anywhere",
+    }
+    assert sorted(pricing.requests) == ["instanceType", "operatingSystem"]
+    catalog.validate({"operatingSystem": "windows"})
+    assert len(pricing.requests) == 2
+
+
+def test_invalid_values_suggest_close_matches():
+    """ A value the service does not have raises with suggestions or normalizes to None """
+    catalog = AttributeCatalog("AmazonEC2", pricing=_FakePricing())
+    with pytest.raises(BotoRemoraInvalidFilterValue) as err:
+        catalog.validate({"instanceType": "m5.larg"})
+    assert "m5.large" in str(err.value)
+    assert catalog.suggest("instanceType", "m5.larg") == ["m5.large", "m5.xlarge"]
+    assert catalog.normalize({"instanceType": "m7.huge"}) is None
+    assert catalog.values("tenancy") == {"Shared", "Dedicated"}
+    assert catalog.values("location") is None
+
+
+def test_prefetch_reports_failures():
+    """ Failed attributes are returned and fetched again on the next use """
+    pricing = _FakePricing()
+    pricing.failing.add("tenancy")
+    catalog = AttributeCatalog("AmazonEC2", pricing=pricing, max_workers=2)
+    failures = catalog.prefetch()
+    assert list(failures) == ["tenancy"]
+    assert sorted(pricing.requests) == ["instanceType", "operatingSystem", "tenancy"]
+    assert list(catalog.prefetch()) == ["tenancy"]
+    pricing.failing.clear()
+    assert catalog.values("tenancy") == {"Shared", "Dedicated"}
+    assert pricing.requests.count("tenancy") == 3
+    assert not catalog.prefetch()
+
+
+def test_catalog_persisted(tmp_path):
+    """ A new catalog loads the values saved by a previous one from the cache """
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    AttributeCatalog("AmazonEC2", pricing=_FakePricing(cache)).prefetch()
+    pricing = _FakePricing(cache)
+    catalog = AttributeCatalog("AmazonEC2", pricing=pricing)
+    assert catalog.validate({"operatingSystem": "rhel"}) == {"operatingSystem": "RHEL"}
+    assert not pricing.requests
+
+
+def test_offers_skip_the_api_for_unknown_values():
+    """ Offers with a catalog answer unknown keys without fetching """
+    pricing = _FakePricing()
+    offers = Offers("EC2", aws_pricing=pricing)
+    offers.use_catalog()
+    assert offers.get("us-east-1", "m5.huge") == ()
+    assert not offers.is_cached("us-east-1", "m5.huge")
+    assert pricing.requests == ["instanceType"]
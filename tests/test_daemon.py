@@ -0,0 +1,116 @@
+""" boto_remora.pricing.daemon, client and cli """
+import json
+
+import pytest
+
+from boto_remora.aws.pricelist import PriceListItem
+from boto_remora.pricing import cli
+from boto_remora.pricing.client import PricingClient
+from boto_remora.pricing.daemon import PricingDaemon
+
+from .conftest import price_list_item
+
+
+class _FakePricing:
+    """ Pricing answering one offer per region and instance type """
+
+    region_names_rev = dict()
+
+    def __init__(self):
+        self.on_demand = "0.096"
+        self.version = "v1"
+
+    def iter_price_list_items(self, servicecode, region, filter_kv, **_kwargs):
+        """ Item of the instance type in filter_kv """
+        assert servicecode == "AmazonEC2"
+        key = filter_kv["instanceType"]
+        item = price_list_item(f"{region}.{key}", key, region, self.on_demand)
+        return iter([PriceListItem(json.dumps(item))])
+
+    def price_list_versions(self, servicecode, currency="USD"):
+        """ Version of the only region with offers """
+        assert (servicecode, currency) == ("AmazonEC2", "USD")
+        return {"us-east-1": self.version}
+
+
+@pytest.fixture(name="daemon")
+def fixture_daemon():
+    """ Daemon on an ephemeral localhost port """
+    daemon = PricingDaemon(address="127.0.0.1:0", pricing=_FakePricing(), refresh_interval=None)
+    daemon.start()
+    yield daemon
+    daemon.stop()
+
+
+def _address(daemon):
+    return "{}:{}".format(*daemon.server_address)
+
+
+def test_round_trip(daemon):
+    """ Offers fetched, queried and refreshed through the daemon """
+    with PricingClient(address=_address(daemon)) as client:
+        assert client.health()["status"] == "ok"
+        (offer,) = client.get("us-east-1", "m5.large")
+        assert offer["sku"] == "us-east-1.m5.large"
+        assert offer["prices"] == {"OnDemand": 0.096, "Reserved": 0.0}
+        assert "terms" not in offer
+
+        (match,) = client.filter_cached({"instanceType": "m5.large"}, terms=True)
+        assert match["sku"] == offer["sku"]
+        assert list(match["terms"]) == ["OnDemand", "Reserved"]
+        assert not client.filter_cached({"instanceType": "m5.xlarge"})
+
+        assert client.refresh()["refreshed"] == 0
+        daemon.pricing.on_demand, daemon.pricing.version = "0.2", "v2"
+        report = client.refresh()
+        assert (report["refreshed"], report["changed"]) == (1, 1)
+        assert client.get("us-east-1", "m5.large")[0]["prices"]["OnDemand"] == 0.2
+        assert client.stats()["EC2"]["partitions"] == 1
+
+
+def test_cli_terms_option(daemon, capsys):
+    """ --terms is an option of the commands returning offers """
+    assert (
+        cli.main(["--address", _address(daemon), "get", "--terms", "us-east-1", "t3.micro"]) == 0
+    )
+    (offer,) = json.loads(capsys.readouterr().out)
+    assert offer["attributes"]["instanceType"] == "t3.micro"
+    assert "OnDemand" in offer["terms"]
+
+    assert cli.main(["--address", _address(daemon), "query", "--key", "t3.micro"]) == 0
+    (offer,) = json.loads(capsys.readouterr().out)
+    assert "terms" not in offer
+
+
+class _DroppedConnection:
+    """ Connection whose replies are lost, recording the requests sent """
+
+    def __init__(self):
+        self.paths = []
+
+    def request(self, method, path, **_kwargs):
+        """ Record the path of a request """
+        assert method in ("GET", "POST")
+        self.paths.append(path)
+
+    def getresponse(self):
+        """ Fail as a connection closed by the daemon """
+        raise ConnectionResetError(f"{self.paths[-1]} dropped")
+
+    def close(self):
+        """ Nothing to close """
+
+
+def test_only_safe_requests_retried(monkeypatch):
+    """ A dropped refresh is not sent again, lookups are """
+    conn = _DroppedConnection()
+    monkeypatch.setattr(PricingClient, "_connection", lambda self: conn)
+    client = PricingClient()
+    with pytest.raises(ConnectionResetError):
+        client.refresh()
+    assert conn.paths == ["/refresh"]
+    for call in (client.health, lambda: client.get("us-east-1", "m5.large")):
+        conn.paths.clear()
+        with pytest.raises(ConnectionResetError):
+            call()
+        assert len(conn.paths) == 2
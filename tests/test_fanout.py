@@ -0,0 +1,121 @@
+""" boto_remora.aws.fanout """
+# pylint: disable=protected-access
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from boto_remora.aws.fanout import FanOut, Target, _PendingTargets
+
+
+def _fanout(targets, **kwargs):
+    fanout = FanOut(pool=None, **kwargs)
+    fanout._targets = list(targets)
+    return fanout
+
+
+class _Tracker:  # pylint: disable=too-few-public-methods
+    """ Task recording the targets it runs and the most concurrent by account and region """
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.started = []
+        self.peaks = Counter()
+        self._running = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, target):
+        keys = ("all", ("account", target.account), ("region", target.region_name))
+        with self._lock:
+            self.started.append(target)
+            self._running.update(keys)
+            for key_ in keys:
+                self.peaks[key_] = max(self.peaks[key_], self._running[key_])
+        time.sleep(self.delay)
+        with self._lock:
+            self._running.subtract(keys)
+        return target.region_name
+
+
+def _grid(accounts, regions):
+    return [
+        Target(f"profile{account_}", region_, account_)
+        for account_ in accounts
+        for region_ in regions
+    ]
+
+
+def test_concurrency_limits():
+    """ No more tasks run at once than the global, account and region limits """
+    targets = _grid(("111", "222", "333"), ("us-east-1", "eu-west-1", "ap-south-1"))
+    task = _Tracker()
+    fanout = _fanout(targets, max_workers=4, max_per_account=2, max_per_region=1)
+    results = list(fanout.run(task))
+    assert Counter(result_.target for result_ in results) == Counter(targets)
+    assert task.peaks.pop("all") == 3
+    assert max(task.peaks.values()) <= 2
+    assert all(peak_ == 1 for key_, peak_ in task.peaks.items() if key_[0] == "region")
+
+
+def test_targets_start_in_order():
+    """ Targets start in grid order, skipping only those their limits block """
+    targets = _grid(("111", "222"), ("us-east-1", "eu-west-1", "ap-south-1"))
+    task = _Tracker(delay=0)
+    list(_fanout(targets, max_workers=1).run(task))
+    assert task.started == targets
+
+    task = _Tracker(delay=0.05)
+    list(_fanout(targets, max_workers=2, max_per_account=1).run(task))
+    assert {*task.started[:2]} == {targets[0], targets[3]}
+    assert [target_ for target_ in task.started if target_.account == "111"] == targets[:3]
+
+
+def test_unknown_accounts_limited_per_profile():
+    """ Targets without an account do not share a single account slot """
+    barrier = threading.Barrier(2, timeout=5)
+    fanout = _fanout(
+        [Target("first", "us-east-1"), Target("second", "us-east-1")], max_per_account=1
+    )
+    assert all(result_.ok for result_ in fanout.run(lambda target: barrier.wait()))
+
+
+def test_errors_are_captured():
+    """ Failing tasks are returned and collected without stopping the others """
+
+    def task(target):
+        if target.region_name == "eu-west-1":
+            raise RuntimeError(target.account)
+        return target.account
+
+    targets = _grid(("111", "222"), ("us-east-1", "eu-west-1"))
+    fanout = _fanout(targets, max_workers=2)
+    assert fanout.map(task) == {targets[0]: "111", targets[2]: "222"}
+    assert sorted(str(result_.error) for result_ in fanout.errors) == ["111", "222"]
+    assert not any(result_.ok for result_ in fanout.errors)
+
+
+def test_limits_allowing_nothing():
+    """ A limit of zero fails instead of waiting forever """
+    fanout = _fanout(_grid(("111",), ("us-east-1",)), max_per_region=0)
+    with pytest.raises(ValueError):
+        list(fanout.run(lambda target: None))
+
+
+def test_blocked_targets_are_not_rescanned(monkeypatch):
+    """ Finishing a task only checks the queues of the account and region it releases """
+    checks = Counter()
+    allowed = _PendingTargets._allowed
+
+    def counting_allowed(self, keys):
+        checks["allowed"] += 1
+        return allowed(self, keys)
+
+    monkeypatch.setattr(_PendingTargets, "_allowed", counting_allowed)
+    accounts = [f"{num_:012d}" for num_ in range(40)]
+    regions = [f"region-{num_}" for num_ in range(20)]
+    targets = _grid(accounts, regions)
+    fanout = _fanout(targets, max_workers=8, max_per_account=1, max_per_region=2)
+    assert len(list(fanout.run(lambda target: None))) == len(targets)
+    # Rescanning every pending target after each task would take about len(targets) ** 2 / 2
+    assert checks["allowed"] < (len(accounts) + len(regions)) * len(targets)
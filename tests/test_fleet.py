@@ -0,0 +1,156 @@
+""" boto_remora.pricing.fleet """
+from types import SimpleNamespace
+
+import pytest
+
+from boto_remora.pricing.fleet import HOURS_PER_MONTH, INSTANCE, VOLUME, Fleet, FleetResource
+from boto_remora.pricing.main import Offers
+
+from .conftest import price_list_item
+
+
+class _FakeOffers(Offers):
+    """ Offers fetching partitions from a dict of documents, counting fetches """
+
+    def __init__(self, resource_type, documents):
+        super().__init__(resource_type, aws_pricing=SimpleNamespace(region_names_rev=dict()))
+        self.documents = documents
+        self.fetches = []
+
+    def iter_offers(self, region=None, key=None, key_val=None, use_cache=True):
+        self.fetches.append((region, key))
+        return [
+            self._create_offer_from_pricelist_item(doc_)
+            for doc_ in self.documents.get((region, key), ())
+        ]
+
+
+def _document(sku, key, price, unit="Hrs", region="us-east-1", **attributes):
+    """ get_products document with the OnDemand price in unit and extra attributes """
+    doc = price_list_item(sku, key, region, price)
+    doc["product"]["attributes"].update(attributes)
+    for term in doc["terms"]["OnDemand"].values():
+        for dimension in term["priceDimensions"].values():
+            dimension["unit"] = unit
+    return doc
+
+
+def _instance(instance_id, instance_type, **kwargs):
+    return {"InstanceId": instance_id, "InstanceType": instance_type, **kwargs}
+
+
+@pytest.fixture(name="fleet")
+def fixture_fleet():
+    """ Fleet pricing EC2 and EBS offers of us-east-1 """
+    instances = _FakeOffers(
+        "EC2",
+        {
+            ("us-east-1", "m5.large"): [
+                _document(
+                    "RESERVED", "m5.large", "0.0", capacitystatus="AllocatedCapacityReservation"
+                ),
+                _document(
+                    "LINUX", "m5.large", "0.096", operation="RunInstances", tenancy="Shared"
+                ),
+                _document(
+                    "WINDOWS",
+                    "m5.large",
+                    "0.188",
+                    operation="RunInstances:0002",
+                    tenancy="Shared",
+                ),
+                _document(
+                    "DEDICATED",
+                    "m5.large",
+                    "0.106",
+                    operation="RunInstances",
+                    tenancy="Dedicated",
+                ),
+            ]
+        },
+    )
+    volumes = _FakeOffers(
+        "EBS",
+        {
+            ("us-east-1", "General Purpose"): [
+                _document("GP2", "General Purpose", "0.10", "GB-Mo", volumeApiName="gp2"),
+                _document("GP3", "General Purpose", "0.08", "GB-Mo", volumeApiName="gp3"),
+            ]
+        },
+    )
+    return Fleet(fanout=SimpleNamespace(), instances=instances, volumes=volumes)
+
+
+def test_instances_matched_to_offers(fleet):
+    """ Instances match the used capacity offer of their operation and tenancy """
+    resources = [
+        FleetResource.from_instance(_instance("i-1", "m5.large"), "us-east-1"),
+        FleetResource.from_instance(
+            _instance("i-2", "m5.large", Platform="windows"), "us-east-1", "111"
+        ),
+        FleetResource.from_instance(
+            _instance("i-3", "m5.large", Placement={"Tenancy": "dedicated"}), "us-east-1"
+        ),
+        FleetResource.from_instance(
+            _instance("i-4", "m5.large", UsageOperation="RunInstances:0010"), "us-east-1"
+        ),
+        FleetResource.from_instance(
+            _instance("i-5", "m5.large", InstanceLifecycle="spot"), "us-east-1"
+        ),
+    ]
+    costs = {cost_.resource.resource_id: cost_ for cost_ in fleet.price(resources)}
+    assert costs["i-1"].offer.sku == "LINUX"
+    assert costs["i-1"].hourly == pytest.approx(0.096)
+    assert costs["i-1"].monthly == pytest.approx(0.096 * HOURS_PER_MONTH)
+    assert costs["i-2"].offer.sku == "WINDOWS"
+    assert costs["i-2"].resource.account == "111"
+    assert costs["i-3"].offer.sku == "DEDICATED"
+    assert not costs["i-4"].priced
+    assert not costs["i-5"].priced
+    assert costs["i-5"].resource.unpriced == "spot instance"
+    # One fetch of the partition for every instance
+    assert fleet.instances.fetches == [("us-east-1", "m5.large")]
+
+
+def test_volumes_priced_per_gb_month(fleet):
+    """ Volume prices per GB-month are converted to an hourly cost of their size """
+    resources = [
+        FleetResource.from_volume(
+            {"VolumeId": "vol-1", "VolumeType": "gp3", "Size": 100}, "us-east-1"
+        ),
+        FleetResource.from_volume(
+            {"VolumeId": "vol-2", "VolumeType": "gp2", "Size": 8}, "us-east-1"
+        ),
+        FleetResource.from_volume(
+            {"VolumeId": "vol-3", "VolumeType": "io2", "Size": 8}, "us-east-1"
+        ),
+    ]
+    gp3, gp2, io2 = fleet.price(resources)
+    assert gp3.resource.key == "General Purpose"
+    assert gp3.hourly == pytest.approx(0.08 * 100 / HOURS_PER_MONTH)
+    assert gp3.monthly == pytest.approx(8.0)
+    assert gp2.monthly == pytest.approx(0.8)
+    assert not io2.priced
+
+
+def test_total_by_region_and_key(fleet):
+    """ Fleet cost aggregates priced resources and lists the unpriced ones """
+    inventory = [
+        [
+            FleetResource.from_instance(_instance("i-1", "m5.large"), "us-east-1"),
+            FleetResource.from_instance(_instance("i-2", "m5.large"), "us-east-1"),
+            FleetResource.from_instance(_instance("i-3", "m5.huge"), "us-east-1"),
+        ],
+        [
+            FleetResource.from_volume(
+                {"VolumeId": "vol-1", "VolumeType": "gp3", "Size": 100}, "us-east-1"
+            )
+        ],
+    ]
+    total = fleet.total(fleet.iter_costs(inventory))
+    assert total.resources == 4
+    assert [res_.resource_id for res_ in total.unpriced] == ["i-3"]
+    assert total.monthly == pytest.approx(2 * 0.096 * HOURS_PER_MONTH + 8.0)
+    assert total.by_key[(INSTANCE, "m5.large")] == pytest.approx(2 * 0.096)
+    assert total.by_key[(VOLUME, "General Purpose")] * HOURS_PER_MONTH == pytest.approx(8.0)
+    assert total.by_region["us-east-1"] == pytest.approx(total.hourly)
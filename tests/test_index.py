@@ -0,0 +1,100 @@
+""" boto_remora.pricing.index """
+from types import SimpleNamespace
+
+import pytest
+
+from boto_remora.pricing import query
+from boto_remora.pricing.index import OfferIndex
+from boto_remora.pricing.query import RangeIndex
+
+
+def _offer(name, **attributes):
+    return SimpleNamespace(name=name, attributes=attributes)
+
+
+def _names(offers):
+    return [offer_.name for offer_ in offers]
+
+
+@pytest.fixture(name="builds")
+def fixture_builds(monkeypatch):
+    """ Attributes of every range index built """
+    builds = []
+    build = RangeIndex.build.__func__
+
+    def counting_build(cls, postings):
+        postings = list(postings)
+        builds.append(sorted(val_ for val_, _ in postings))
+        return build(cls, postings)
+
+    monkeypatch.setattr(RangeIndex, "build", classmethod(counting_build))
+    return builds
+
+
+def test_range_indexes_rebuilt_per_partition(builds):
+    """ Loading or evicting a partition only indexes the new partition on the next query """
+    index = OfferIndex()
+    index.add_partition("us-east-1", "a", [_offer("a1", vcpu="2"), _offer("a2", vcpu="8")])
+    index.add_partition("us-east-1", "b", [_offer("b1", vcpu="16")])
+    assert _names(index.search((), ranges={"vcpu": query.ge(8)})) == ["a2", "b1"]
+    assert len(builds) == 2
+    assert _names(index.search((), ranges={"vcpu": query.lt(8)})) == ["a1"]
+    assert len(builds) == 2
+
+    index.add_partition("eu-west-1", "a", [_offer("c1", vcpu="4")])
+    assert _names(index.search((), ranges={"vcpu": query.between(4, 8)})) == ["a2", "c1"]
+    assert builds[2:] == [["4"]]
+
+    index.remove_partition("us-east-1", "b")
+    assert _names(index.search((), ranges={"vcpu": query.ge(8)})) == ["a2"]
+    assert len(builds) == 3
+
+    index.add_partition("us-east-1", "a", [_offer("a3", vcpu="32")])
+    assert _names(index.search((), ranges={"vcpu": query.ge(8)})) == ["a3"]
+    assert builds[3:] == [["32"]]
+
+
+def test_range_search_in_scope(builds):
+    """ Queries of a region or key only index and search its partitions """
+    index = OfferIndex()
+    index.add_partition("us-east-1", "a", [_offer("a1", vcpu="8")])
+    index.add_partition("eu-west-1", "a", [_offer("c1", vcpu="8")])
+    eight = {"vcpu": query.between(8, 8)}
+    assert _names(index.search((), region="eu-west-1", ranges=eight)) == ["c1"]
+    assert builds == [["8"]]
+    assert not index.search((), region="ap-south-1", ranges=eight)
+
+
+def test_equality_search():
+    """ Filters intersect attribute postings, results keep the cache order """
+    index = OfferIndex()
+    index.add_partition(
+        "us-east-1",
+        "a",
+        [
+            _offer("a1", os="Linux", tenancy="Shared"),
+            _offer("a2", os="Windows", tenancy="Shared"),
+        ],
+    )
+    index.add_partition("eu-west-1", "a", [_offer("c1", os="Linux", tenancy="Dedicated")])
+    index.add_partition("eu-west-1", "b", [_offer("d1")])
+    assert _names(index.search([("os", "Linux")])) == ["a1", "c1"]
+    assert _names(index.search([("os", "Linux"), ("tenancy", "Shared")])) == ["a1"]
+    assert _names(index.search([("os", "Linux")], region="eu-west-1")) == ["c1"]
+    assert _names(index.search([("os", "Linux")], key="b")) == []
+    assert not index.search([("os", "Solaris")])
+    assert _names(index.search(())) == ["a1", "a2", "c1"]
+
+
+def test_partitions_replaced_and_removed():
+    """ Replacing or removing a partition drops its offers from every posting """
+    index = OfferIndex()
+    index.add_partition("us-east-1", "a", [_offer("a1", os="Linux"), _offer("a2", os="Windows")])
+    index.add_partition("us-east-1", "a", [_offer("a3", os="Linux")])
+    assert len(index) == 1
+    assert _names(index.search([("os", "Linux")])) == ["a3"]
+    assert not index.search([("os", "Windows")])
+    index.remove_partition("us-east-1", "a")
+    index.remove_partition("us-east-1", "missing")
+    assert len(index) == 0
+    assert not index._postings["os"]  # pylint: disable=protected-access
@@ -0,0 +1,81 @@
+""" boto_remora.aws.metrics """
+import dataclasses
+import json
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from boto_remora.aws.metrics import CallRecord, JsonLinesSink, OperationStats, ServiceMetrics
+
+
+_METADATA = {"RequestId": "stub", "HTTPStatusCode": 200}
+
+
+@pytest.fixture(name="client")
+def fixture_client():
+    """ Pricing client with fake credentials """
+    session = boto3.Session(
+        aws_access_key_id="testing", aws_secret_access_key="testing", region_name="us-east-1"
+    )
+    return session.client("pricing")
+
+
+def _page(next_token=None):
+    page = {"PriceList": [], "FormatVersion": "aws_v1", "ResponseMetadata": _METADATA}
+    if next_token:
+        page["NextToken"] = next_token
+    return page
+
+
+def test_counters(client):
+    """ Calls, errors and the pages of results spanning several are counted """
+    metrics = ServiceMetrics("pricing")
+    metrics.attach(client)
+    with Stubber(client) as stubber:
+        stubber.add_response("get_products", _page("page2"))
+        stubber.add_response("get_products", _page())
+        stubber.add_response("get_products", _page())
+        stubber.add_response("describe_services", {"Services": [], "ResponseMetadata": _METADATA})
+        stubber.add_client_error("get_products", "AccessDeniedException", http_status_code=403)
+        list(client.get_paginator("get_products").paginate(ServiceCode="AmazonEC2"))
+        client.get_products(ServiceCode="AmazonEC2")
+        client.describe_services()
+        with pytest.raises(client.exceptions.ClientError):
+            client.get_products(ServiceCode="AmazonEC2")
+
+    stats = metrics.stats()
+    assert (stats["GetProducts"].calls, stats["GetProducts"].pages) == (4, 2)
+    assert stats["GetProducts"].errors == 1
+    assert (stats["DescribeServices"].calls, stats["DescribeServices"].pages) == (1, 0)
+    metrics.reset()
+    assert not metrics.stats()
+
+
+def test_latency_statistics():
+    """ Mean, maximum and histogram quantiles of latencies """
+    stats = OperationStats()
+    for latency in (0.005, 0.02, 0.02, 3.0):
+        stats.add(CallRecord("pricing", "GetProducts", latency, 200))
+    assert stats.latency_mean == pytest.approx(0.76125)
+    assert stats.latency_max == 3.0
+    assert stats.latency_quantile(0.5) == 0.025
+    assert stats.latency_quantile(1.0) == 5.0
+
+
+def test_json_lines_sink(tmp_path):
+    """ Every record is appended as a UTF-8 JSON line, a failing sink is skipped """
+    path = tmp_path / "calls.jsonl"
+    metrics = ServiceMetrics("pricing")
+    metrics.add_sink(lambda record: 1 / 0)
+    metrics.add_sink(JsonLinesSink(str(path)))
+    records = [
+        CallRecord("pricing", "GetProducts", 0.1, 200, paged=True),
+        CallRecord("pricing", "GetProducts", 0.2, 400, error="Données invalides"),
+    ]
+    for record in records:
+        metrics.record(record)
+    assert "Données".encode("utf-8") in path.read_bytes()
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line_) for line_ in lines] == list(map(dataclasses.asdict, records))
+    assert metrics.stats()["GetProducts"].calls == 2
@@ -0,0 +1,124 @@
+""" boto_remora.pricing.offerfile against a sample offer file """
+import io
+import json
+import pathlib
+import tracemalloc
+
+import pytest
+
+from boto_remora.exception import BotoRemoraOfferFileError
+from boto_remora.pricing.main import Offers
+from boto_remora.pricing.offerfile import JsonStreamReader, iter_pricelist_items
+
+
+OFFER_FILE = pathlib.Path(__file__).parent / "data" / "AmazonEC2-sample.json"
+
+
+def test_iter_pricelist_items():
+    """ Items of a family carry the header fields and all their term types """
+    items = {
+        item_["product"]["sku"]: item_
+        for item_ in iter_pricelist_items(OFFER_FILE, product_family="Compute Instance")
+    }
+    assert sorted(items) == [
+        "AAAAAAAAAAAAAAAA",
+        "CCCCCCCCCCCCCCCC",
+        "DDDDDDDDDDDDDDDD",
+        "EEEEEEEEEEEEEEEE",
+    ]
+    item = items["AAAAAAAAAAAAAAAA"]
+    assert (item["serviceCode"], item["version"]) == ("AmazonEC2", "20200401000000")
+    assert sorted(item["terms"]) == ["OnDemand", "Reserved"]
+    assert sorted(items["CCCCCCCCCCCCCCCC"]["terms"]) == ["OnDemand"]
+    assert items["EEEEEEEEEEEEEEEE"]["terms"] == dict()
+    document = json.loads(OFFER_FILE.read_text())
+    assert item["terms"]["Reserved"] == document["terms"]["Reserved"]["AAAAAAAAAAAAAAAA"]
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_iter_pricelist_items_of_streams(binary):
+    """ Text and byte streams are read without being closed """
+    stream = OFFER_FILE.open("rb" if binary else "r")
+    with stream:
+        skus = [item_["product"]["sku"] for item_ in iter_pricelist_items(stream)]
+        assert not stream.closed
+    assert len(skus) == 5
+
+
+def test_reader_across_chunks():
+    """ Values split over chunk boundaries are read whole """
+    text = OFFER_FILE.read_text()
+    reader = JsonStreamReader(io.StringIO(text), chunk_size=7)
+    sections = dict()
+    for section in reader.members():
+        sections[section] = json.loads(reader.raw_value())
+    assert sections == json.loads(text)
+
+
+def test_from_offer_file():
+    """ Offers with terms are cached by region and instance type """
+    offers = Offers.from_offer_file(OFFER_FILE, "EC2")
+    assert offers.is_cached("us-east-1", "m5.large")
+    assert offers.is_cached("us-east-1", "m5.xlarge")
+    assert offers.is_cached("eu-west-1", "m5.large")
+    assert not offers.is_cached("us-east-1", "m5.2xlarge")
+    (offer,) = offers.get("eu-west-1", "m5.large")
+    assert (offer.sku, offer.unit) == ("DDDDDDDDDDDDDDDD", "Hrs")
+    assert offer.price() == 0.107
+    assert offer.price("Reserved", unit="Quantity") == 560.0
+    assert [offer_.sku for offer_ in offers.cheapest(k=2)] == [
+        "AAAAAAAAAAAAAAAA",
+        "DDDDDDDDDDDDDDDD",
+    ]
+
+
+def test_terms_before_products():
+    """ The terms section may come first """
+    document = json.loads(OFFER_FILE.read_text())
+    reordered = {"terms": document.pop("terms"), **document}
+    items = list(iter_pricelist_items(io.StringIO(json.dumps(reordered)), "Compute Instance"))
+    assert items == list(iter_pricelist_items(OFFER_FILE, "Compute Instance"))
+
+
+def test_region_codes_from_the_offer_file(tmp_path):
+    """ Products without regionCode take the one of their location, or fail to load """
+    document = json.loads(OFFER_FILE.read_text())
+    del document["products"]["DDDDDDDDDDDDDDDD"]["attributes"]["regionCode"]
+    del document["products"]["AAAAAAAAAAAAAAAA"]["attributes"]["regionCode"]
+    path = tmp_path / "offers.json"
+    path.write_text(json.dumps(document))
+    items = {item_["product"]["sku"]: item_ for item_ in iter_pricelist_items(path)}
+    assert items["AAAAAAAAAAAAAAAA"]["product"]["attributes"]["regionCode"] == "us-east-1"
+    assert "regionCode" not in items["DDDDDDDDDDDDDDDD"]["product"]["attributes"]
+    # Offers without an API client must not reach for one
+    offers = Offers("EC2", aws_pricing=object())
+    with pytest.raises(BotoRemoraOfferFileError, match="EU \\(Ireland\\)"):
+        offers.load_offer_file(path)
+    assert not offers.is_cached("us-east-1", "m5.large")
+
+
+def test_offer_file_is_not_held_in_memory(tmp_path):
+    """ Reading an offer file keeps less than its size in memory """
+    document = json.loads(OFFER_FILE.read_text())
+    (product,) = [document["products"]["AAAAAAAAAAAAAAAA"]]
+    (terms,) = document["terms"]["Reserved"]["AAAAAAAAAAAAAAAA"].values()
+    terms = dict(terms, termAttributes={"padding": "x" * 4000})
+    document["products"] = {f"SKU{num_:06d}": product for num_ in range(2000)}
+    document["terms"] = {
+        "Reserved": {f"SKU{num_:06d}": {"T": terms} for num_ in range(2000)},
+    }
+    path = tmp_path / "offers.json"
+    path.write_text(json.dumps(document))
+    size = path.stat().st_size
+    assert size > 8 * 2 ** 20
+
+    items = iter_pricelist_items(path, "Compute Instance")
+    tracemalloc.start()
+    try:
+        item = next(items)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        items.close()
+    assert item["terms"]["Reserved"]["T"]["termAttributes"]["padding"] == "x" * 4000
+    assert peak < size
@@ -0,0 +1,210 @@
+""" Offers cache loading and refreshing without calling AWS """
+# pylint: disable=protected-access
+import copy
+import gc
+import json
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from boto_remora.pricing.main import Offers
+
+from .conftest import price_list_item
+
+
+class _FakeOffers(Offers):
+    """ Offers fetching partitions from a dict of prices, counting fetches """
+
+    def __init__(self, prices, versions=None, **kwargs):
+        pricing = SimpleNamespace(
+            region_names_rev=dict(), price_list_versions=self._price_list_versions
+        )
+        super().__init__("EC2", aws_pricing=pricing, **kwargs)
+        self.prices_by_partition = prices
+        self.versions = dict(versions or ())
+        self.fetches = []
+        self.version_checks = 0
+
+    def _price_list_versions(self, servicecode, currency):
+        assert (servicecode, currency) == ("AmazonEC2", "USD")
+        self.version_checks += 1
+        return dict(self.versions)
+
+    def iter_offers(self, region=None, key=None, key_val=None, use_cache=True):
+        self.fetches.append((region, key))
+        return [
+            self._create_offer_from_pricelist_item(
+                price_list_item(f"{region}.{key}", key, region, price)
+            )
+            for price in self.prices_by_partition[(region, key)]
+        ]
+
+
+def _prices(region, *keys):
+    return {(region, key_): ["0.1"] for key_ in keys}
+
+
+def test_get_many_returns_loaded_partitions():
+    """ With a budget smaller than the request, every partition is fetched once """
+    offers = _FakeOffers(_prices("us-east-1", "a", "b", "c"), max_partitions=1)
+    offers._keys = ("a", "b", "c")
+    result = offers.get_many(regions=["us-east-1"], max_workers=1)
+    assert list(result) == [("us-east-1", "a"), ("us-east-1", "b"), ("us-east-1", "c")]
+    assert all(len(offers_) == 1 for offers_ in result.values())
+    assert sorted(offers.fetches) == sorted(result)
+    assert offers.cache_stats.partitions == 1
+
+
+class _GatedOffers(_FakeOffers):
+    """ Offers whose fetches wait for the gate and fail while error is set """
+
+    def __init__(self, prices, **kwargs):
+        super().__init__(prices, **kwargs)
+        self.gate = threading.Event()
+        self.error = None
+
+    def iter_offers(self, region=None, key=None, key_val=None, use_cache=True):
+        offers = super().iter_offers(region, key, key_val, use_cache)
+        assert self.gate.wait(10)
+        if self.error is not None:
+            raise self.error  # pylint: disable=raising-bad-type
+        return offers
+
+
+def _get_concurrently(offers, callers):
+    """ Results or errors of concurrent calls of get, released once all of them missed """
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        futures = [executor.submit(offers.get, "us-east-1", "a") for _ in range(callers)]
+        deadline = time.monotonic() + 10
+        while offers.cache_stats.misses < callers and time.monotonic() < deadline:
+            time.sleep(0.001)
+        offers.gate.set()
+    return [future_.exception() or future_.result() for future_ in futures]
+
+
+def test_concurrent_get_fetches_once():
+    """ Concurrent misses of a partition share a single fetch and its offers """
+    offers = _GatedOffers(_prices("us-east-1", "a"))
+    results = _get_concurrently(offers, 8)
+    assert offers.fetches == [("us-east-1", "a")]
+    assert all(result_ is results[0] for result_ in results)
+    assert offers.cache_stats.misses == 8
+    assert not offers._inflight
+
+
+def test_concurrent_get_shares_errors():
+    """ Every waiter gets the error of the fetch, which is not cached """
+    offers = _GatedOffers(_prices("us-east-1", "a"))
+    offers.error = RuntimeError("throttled")
+    results = _get_concurrently(offers, 8)
+    assert offers.fetches == [("us-east-1", "a")]
+    assert all(result_ is offers.error for result_ in results)
+    assert not offers._inflight and not offers.is_cached("us-east-1", "a")
+
+    offers.error = None
+    assert len(offers.get("us-east-1", "a")) == 1
+    assert len(offers.fetches) == 2
+
+
+def test_refresh_without_get():
+    """ Refresh fetches each stale partition once and applies its delta """
+    offers = _FakeOffers(_prices("us-east-1", "a", "b"), max_partitions=1)
+    offers.get("us-east-1", "a")
+    offers.get("us-east-1", "b")
+    offers.prices_by_partition[("us-east-1", "b")] = ["0.2"]
+    offers.fetches.clear()
+    report = offers.refresh(check_versions=False)
+    assert offers.fetches == [("us-east-1", "b")]
+    assert [(old_.price(), new_.price()) for old_, new_ in report.changed] == [(0.1, 0.2)]
+    assert offers.get("us-east-1", "b")[0].price() == 0.2
+    assert offers.fetches == [("us-east-1", "b")]
+
+
+def test_first_refresh_skips_current_partitions():
+    """ Versions recorded when fetching spare the first refresh from fetching again """
+    offers = _FakeOffers(_prices("us-east-1", "a", "b"), versions={"us-east-1": "v1"})
+    offers.get("us-east-1", "a")
+    offers.get("us-east-1", "b")
+    assert offers.version_checks == 1
+    offers.fetches.clear()
+    report = offers.refresh()
+    assert not offers.fetches
+    assert sorted(report.skipped) == [("us-east-1", "a"), ("us-east-1", "b")]
+
+    offers.versions["us-east-1"] = "v2"
+    report = offers.refresh()
+    assert sorted(offers.fetches) == sorted(report.refreshed) == sorted(report.checked)
+
+
+def test_snapshot_keeps_partition_versions(tmp_path):
+    """ A loaded snapshot only refreshes partitions whose version changed since """
+    offers = _FakeOffers({**_prices("us-east-1", "a"), **_prices("eu-west-1", "a")})
+    offers.versions = {"us-east-1": "v1", "eu-west-1": "v1"}
+    offers.get("us-east-1", "a")
+    offers.get("eu-west-1", "a")
+    offers.save_snapshot(tmp_path / "offers.snap")
+
+    versions = {"us-east-1": "v1", "eu-west-1": "v2"}
+    loaded = Offers.load_snapshot(
+        tmp_path / "offers.snap",
+        aws_pricing=SimpleNamespace(price_list_versions=lambda *args, **kwargs: versions),
+    )
+    report = loaded.refresh()
+    assert report.skipped == [("us-east-1", "a")]
+    # Refetching the changed partition fails without an API, it is no longer skipped.
+    assert list(report.failures) == [("eu-west-1", "a")]
+
+
+def _reserved_item(sku, count):
+    """ Document of an offer with count reservations of two rates each """
+    item = price_list_item(sku)
+    (template,) = item["terms"]["Reserved"].values()
+    for num in range(count):
+        term = copy.deepcopy(template)
+        term["offerTermCode"] = f"TERM{num:06d}"
+        term["priceDimensions"] = {
+            f"{sku}.{num}.{unit_}": dict(
+                dim_,
+                rateCode=f"{sku}.{num}.{unit_}",
+                description=f"USD {num} per {unit_} of a {sku} reservation",
+            )
+            for unit_, dim_ in zip(("Quantity", "Hrs"), template["priceDimensions"].values())
+        }
+        item["terms"]["Reserved"][f"{sku}.TERM{num:06d}"] = term
+    return json.dumps(item)
+
+
+def test_cache_bytes_close_to_measured():
+    """ The accounted size follows the memory of the offers, unparsed and parsed """
+    documents = [_reserved_item(f"SKU{num_:04d}", 40) for num_ in range(100)]
+    cache = Offers("EC2")
+    gc.collect()
+    tracemalloc.start()
+    try:
+        offers = [cache._create_offer_from_pricelist_item(json.loads(doc_)) for doc_ in documents]
+        gc.collect()
+        resident = tracemalloc.get_traced_memory()[0]
+        cache._store_partition("us-east-1", "m5.large", offers)
+        assert 0.75 < cache.cache_stats.bytes / resident < 1.33
+
+        before = tracemalloc.get_traced_memory()[0]
+        assert all(offer_.price("Reserved", unit="Hrs") is not None for offer_ in offers)
+        gc.collect()
+        resident += tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert 0.75 < cache.cache_stats.bytes / resident < 1.33
+
+
+def test_evicted_offers_stop_accounting():
+    """ Parsing offers of an evicted partition does not change the cache size """
+    offers = _FakeOffers(_prices("us-east-1", "a", "b"), max_partitions=1)
+    evicted = offers.get("us-east-1", "a")
+    offers.get("us-east-1", "b")
+    size = offers.cache_stats.bytes
+    evicted[0].price()
+    assert offers.cache_stats.bytes == size
+    offers.get("us-east-1", "b")[0].price()
+    assert offers.cache_stats.bytes != size
@@ -0,0 +1,82 @@
+""" boto_remora.aws.pool """
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import boto3
+import pytest
+from botocore.config import Config
+
+from boto_remora.aws import pool as pool_module
+from boto_remora.aws.pool import ClientPool
+
+
+@pytest.fixture(name="clock")
+def fixture_clock(monkeypatch):
+    """ Monotonic time of the pool module, advanced by the tests """
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(pool_module, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_sessions_per_profile_and_region():
+    """ Sessions are shared by profile and region """
+    pool = ClientPool()
+    session = pool.session(None, "us-east-1")
+    assert pool.session(None, "us-east-1") is session
+    assert pool.session(None, "eu-west-1") is not session
+    assert session.region_name == "us-east-1"
+
+
+def test_clients_per_session_and_region():
+    """ Clients are shared by session, region, service and options """
+    pool = ClientPool(max_pool_connections=20)
+    client = pool.client("pricing", region_name="us-east-1")
+    assert pool.client("pricing", region_name="us-east-1") is client
+    assert pool.client("pricing", region_name="ap-south-1") is not client
+    assert pool.client("ec2", region_name="us-east-1") is not client
+    assert client.meta.config.max_pool_connections == 20
+    assert len(pool) == 2 + 3
+
+    retries = Config(retries={"mode": "standard"})
+    configured = pool.client("pricing", region_name="us-east-1", config=retries)
+    assert configured is not client
+    same = Config(retries={"mode": "standard"})
+    assert pool.client("pricing", region_name="us-east-1", config=same) is configured
+    assert configured.meta.config.max_pool_connections == 20
+
+    session = boto3.Session(region_name="us-east-1")
+    own = pool.client("pricing", session=session)
+    assert own is not client
+    assert pool.client("pricing", session=session) is own
+    assert own.meta.region_name == "us-east-1"
+
+
+def test_concurrent_users_share_a_client():
+    """ Threads asking for the same client at once get a single one """
+    pool = ClientPool()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(
+            executor.map(lambda _: pool.client("pricing", region_name="us-east-1"), range(16))
+        )
+    assert all(client_ is clients[0] for client_ in clients)
+
+
+def test_idle_entries_evicted(clock):
+    """ Entries unused for max_idle seconds are dropped and created again on use """
+    pool = ClientPool(max_idle=300)
+    clock.now = pool._last_sweep  # pylint: disable=protected-access
+    client = pool.client("pricing", region_name="us-east-1")
+    clock.now += 200
+    kept = pool.client("ec2", region_name="eu-west-1")
+    clock.now += 200
+    assert pool.evict_idle() == 2
+    assert len(pool) == 2
+    assert pool.client("ec2", region_name="eu-west-1") is kept
+    assert pool.client("pricing", region_name="us-east-1") is not client
+
+    # Using the pool sweeps idle entries at most once a minute
+    clock.now += 400
+    pool.client("pricing", region_name="us-east-1")
+    assert len(pool) == 2
+    pool.clear()
+    assert len(pool) == 0
@@ -0,0 +1,60 @@
+""" boto_remora.pricing.main without calling AWS """
+# pylint: disable=protected-access
+import copy
+import json
+
+from boto_remora.aws.pricelist import PriceListItem
+from boto_remora.pricing.main import Offers
+
+from .conftest import price_list_item
+
+
+def test_offer_keeps_terms_unparsed():
+    """ Unit, description and prices come from the OnDemand rate, terms are parsed on use """
+    item = price_list_item("AAA")
+    offer = Offers("EC2")._create_offer_from_pricelist_item(copy.deepcopy(item))
+    assert (offer.region, offer.sku, offer.unit, offer.description) == (
+        "us-east-1",
+        "AAA",
+        "Hrs",
+        "On demand",
+    )
+    assert offer.prices == {"OnDemand": 0.096, "Reserved": 0.0}
+    assert not offer.terms.is_parsed
+    assert offer.terms.to_dict() == item["terms"]
+
+
+def test_price_summary_matches_price():
+    """ The summary holds the price of each term type in the offer unit """
+    offer = Offers("EC2")._create_offer_from_pricelist_item(price_list_item("AAA"))
+    unparsed = offer.price_summary()
+    assert not offer.terms.is_parsed
+    assert unparsed == {
+        "OnDemand": offer.price("OnDemand", unit="Hrs"),
+        "Reserved": offer.price("Reserved", unit="Hrs"),
+    }
+    assert offer.terms.is_parsed
+    assert offer.price_summary() == unparsed == {"OnDemand": 0.096, "Reserved": 0.0}
+    assert offer.price("Reserved") == 500.0
+
+
+def test_given_prices_are_kept():
+    """ Prices given with the offer are returned instead of derived ones """
+    offer = Offers("EC2")._create_offer_from_pricelist_item(price_list_item("AAA"))
+    offer.prices = {"OnDemand": 1.0}
+    assert offer.prices == offer.price_summary() == {"OnDemand": 1.0}
+    offer.prices = None
+    assert offer.prices["OnDemand"] == 0.096
+
+
+def test_offer_keeps_raw_price_list_item():
+    """ Offers of lazy items decode the OnDemand terms only and keep the raw JSON """
+    document = price_list_item("AAA")
+    item = PriceListItem(json.dumps(document))
+    offer = Offers("EC2")._create_offer_from_pricelist_item(item)
+    assert not item.is_decoded
+    assert (offer.sku, offer.unit, offer.description) == ("AAA", "Hrs", "On demand")
+    assert offer.prices == {"OnDemand": 0.096, "Reserved": 0.0}
+    assert not offer.terms.is_parsed
+    assert offer.terms.to_dict() == document["terms"]
+    assert offer.price("Reserved") == 500.0
@@ -0,0 +1,45 @@
+""" boto_remora.pricing.query """
+# pylint: disable=protected-access
+from boto_remora.pricing import query
+from boto_remora.pricing.main import Offers
+
+
+def _offers(price_list):
+    offers = Offers("EC2")
+    for item_ in price_list:
+        offer = offers._create_offer_from_pricelist_item(item_)
+        offers._store_partition(offer.region, offer.attributes["instanceType"], [offer])
+    return offers
+
+
+def test_parse_quantity():
+    """ Sizes are scaled to giga units and counts multiplied out """
+    assert query.parse_quantity("16 GiB") == 16.0
+    assert query.parse_quantity("512 MiB") == 0.5
+    assert query.parse_quantity("2 x 1900 NVMe SSD") == 3800.0
+    assert query.parse_quantity("NA") is None
+
+
+def test_top_k_ranks_on_offer_price(price_list):
+    """ Offers are ranked on the price of their terms """
+    offers = [Offers("EC2")._create_offer_from_pricelist_item(item_) for item_ in price_list]
+    assert [offer_.sku for offer_ in query.top_k(offers, k=2)] == ["AAA", "CCC"]
+    assert [offer_.sku for offer_ in query.top_k(offers, largest=True)] == ["BBB"]
+    assert query.offer_price(offers[0], "Reserved") == 500.0
+    assert query.offer_price(offers[0], "Reserved", unit="Hrs") == 0.0
+
+
+def test_cheapest_with_term_attributes(price_list):
+    """ term_attributes select the rate the offers are ranked on """
+    offers = _offers(price_list)
+    cheapest = offers.cheapest(k=3, filters={"operatingSystem": "Linux"})
+    assert [offer_.sku for offer_ in cheapest] == ["AAA", "CCC", "BBB"]
+    reserved = offers.cheapest(
+        price_type="Reserved",
+        filters={"operatingSystem": "Linux"},
+        term_attributes={"purchase_option": "All Upfront", "unit": "Quantity"},
+    )
+    assert reserved[0].price("Reserved", unit="Quantity") == 500.0
+    assert not offers.cheapest(
+        price_type="Reserved", term_attributes={"purchase_option": "No Upfront"}
+    )
@@ -0,0 +1,113 @@
+""" boto_remora.aws.ratelimit """
+# pylint: disable=protected-access
+import boto3
+import pytest
+from botocore.retries import standard
+from botocore.stub import Stubber
+
+from boto_remora.aws import ratelimit
+from boto_remora.aws.main import Pricing
+from boto_remora.aws.pool import ClientPool
+from boto_remora.aws.ratelimit import AdaptiveRateLimiter
+
+
+_METADATA = {"RequestId": "stub", "HTTPStatusCode": 200}
+
+
+@pytest.fixture(name="session")
+def fixture_session():
+    """ Session with fake credentials """
+    return boto3.Session(
+        aws_access_key_id="testing", aws_secret_access_key="testing", region_name="us-east-1"
+    )
+
+
+def _handler_ids(client):
+    """ Unique ids of the handlers registered on a client """
+    return list(client.meta.events._emitter._unique_id_handlers)
+
+
+def test_handlers_registered_once_per_client(session):
+    """ Pricing objects sharing a pooled client do not pile up handlers """
+    pool = ClientPool()
+    limiters = [AdaptiveRateLimiter(), AdaptiveRateLimiter()]
+    pricings = [
+        Pricing(session=session, pool=pool, rate_limiter=limiters[num_ % 2]) for num_ in range(4)
+    ]
+    client = pricings[0].client
+    assert all(pricing_.client is client for pricing_ in pricings)
+    retry_handler = client.meta.events._emitter._unique_id_handlers["retry-config-pricing"]
+    for pricing in pricings:
+        pricing.get_client()
+    paced = [id_ for id_ in _handler_ids(client) if id_.startswith("boto_remora-ratelimit-")]
+    assert len(paced) == 3
+    assert all(id_.startswith(f"boto_remora-ratelimit-{id(limiters[0])}-") for id_ in paced)
+    assert (
+        client.meta.events._emitter._unique_id_handlers["retry-config-pricing"] is retry_handler
+    )
+
+
+def test_throttling_left_to_the_caller(session, monkeypatch):
+    """ Throttled calls are retried by Pricing with backoff, other errors are raised """
+    delays = []
+    monkeypatch.setattr(ratelimit, "jittered_backoff", lambda attempt: attempt + 0.5)
+    monkeypatch.setattr("boto_remora.aws.main.time.sleep", delays.append)
+    pricing = Pricing(session=session, rate_limiter=AdaptiveRateLimiter(burst=10))
+    with Stubber(pricing.client) as stubber:
+        for _ in range(2):
+            stubber.add_client_error("describe_services", "ThrottlingException")
+        stubber.add_response("describe_services", {"Services": [], "ResponseMetadata": _METADATA})
+        stubber.add_client_error("describe_services", "AccessDeniedException")
+        assert pricing._call("describe_services")["Services"] == []
+        assert delays == [0.5, 1.5]
+        with pytest.raises(ratelimit.botocore.exceptions.ClientError):
+            pricing._call("describe_services")
+    assert delays == [0.5, 1.5]
+
+
+def test_retry_conditions_skip_throttling(session):
+    """ The replaced standard mode handler retries transient errors but not throttling """
+    conditions = ratelimit._RetryConditions(max_attempts=3)
+    operation = session.client("pricing").meta.service_model.operation_model("GetProducts")
+
+    def retried(code):
+        context = standard.RetryContext(
+            attempt_number=1,
+            operation_model=operation,
+            parsed_response={"Error": {"Code": code}},
+            request_context=dict(),
+        )
+        return conditions.is_retryable(context)
+
+    assert retried("RequestTimeout")
+    assert not retried("ThrottlingException")
+    assert not retried("AccessDeniedException")
+
+
+def test_rate_adapts_within_bounds():
+    """ Throttling halves the rate down to min_rate, successes recover it to max_rate """
+    limiter = AdaptiveRateLimiter(rate=4.0, max_rate=5.0, min_rate=1.0)
+    limiter.on_throttle()
+    assert limiter.current_rate == 2.0
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.current_rate == 1.0
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.current_rate == 5.0
+    limiter.set_rate(50.0)
+    assert limiter.current_rate == 5.0
+
+
+def test_acquire_waits_for_tokens(monkeypatch):
+    """ Calls beyond the burst wait for the bucket to refill at the current rate """
+    limiter = AdaptiveRateLimiter(rate=2.0, burst=2.0)
+    start = limiter._updated
+    clock = [start]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(
+        ratelimit.time, "sleep", lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+    )
+    for _ in range(4):
+        limiter.acquire()
+    assert clock[0] - start == pytest.approx(1.0)
@@ -0,0 +1,46 @@
+""" boto_remora.pricing.refresh """
+# pylint: disable=protected-access
+from boto_remora.pricing.main import Offers
+from boto_remora.pricing.refresh import OfferDelta, offer_fingerprint
+
+from .conftest import price_list_item
+
+
+def _offer(sku, on_demand="0.0960000000"):
+    return Offers("EC2")._create_offer_from_pricelist_item(
+        price_list_item(sku, on_demand=on_demand)
+    )
+
+
+def test_fingerprint_ignores_parse_state():
+    """ Parsing the terms does not change the fingerprint of an offer """
+    offer = _offer("AAA")
+    fingerprint = offer_fingerprint(offer)
+    assert offer.price() == 0.096
+    assert offer.terms.is_parsed
+    assert offer_fingerprint(offer) == fingerprint
+
+
+def test_delta_of_parsed_cache():
+    """ Parsed cached offers match their unparsed refetch """
+    cached = [_offer("AAA"), _offer("BBB")]
+    cached[0].price()
+    delta = OfferDelta.compute(cached, [_offer("AAA"), _offer("BBB", "0.2"), _offer("CCC")])
+    assert not delta.removed
+    assert [offer_.sku for offer_ in delta.added] == ["CCC"]
+    assert [(old_.sku, new_.sku) for old_, new_ in delta.changed] == [("BBB", "BBB")]
+    assert delta.offers[0] is cached[0]
+
+
+def test_delta_of_offers_without_sku():
+    """ Offers without a sku are matched by their terms rather than collapsed """
+    cached = [_offer(""), _offer("", "0.2"), _offer("", "0.2")]
+    delta = OfferDelta.compute(cached, [_offer(""), _offer("", "0.2"), _offer("", "0.2")])
+    assert not delta.has_changes
+    assert all(new_ is old_ for new_, old_ in zip(delta.offers, cached))
+    assert len(delta.fingerprints) == 3
+
+    delta = OfferDelta.compute(cached, [_offer("", "0.3"), _offer("", "0.2")])
+    assert [offer_.price() for offer_ in delta.added] == [0.3]
+    assert sorted(offer_.price() for offer_ in delta.removed) == [0.096, 0.2]
+    assert delta.offers[1] is cached[1]
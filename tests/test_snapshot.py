@@ -0,0 +1,83 @@
+""" boto_remora.pricing.snapshot round trips """
+# pylint: disable=protected-access
+import pytest
+
+from boto_remora.exception import BotoRemoraSnapshotError
+from boto_remora.pricing import snapshot as snapshot_module
+from boto_remora.pricing.main import Offers
+from boto_remora.pricing.snapshot import Snapshot
+
+
+@pytest.fixture(name="offers")
+def fixture_offers(price_list):
+    """ Offers of the price list with the terms of the first offer parsed """
+    offers = Offers("EC2")
+    for item_ in price_list:
+        offer = offers._create_offer_from_pricelist_item(item_)
+        offers._store_partition(offer.region, offer.attributes["instanceType"], [offer])
+    offers.get("us-east-1", "m5.large")[0].price()
+    return offers
+
+
+def test_round_trip(offers, tmp_path):
+    """ Loaded offers price like the saved ones, parsed or not when saved """
+    path = tmp_path / "ec2.snap"
+    offers.save_snapshot(path)
+    loaded = Offers.load_snapshot(path)
+    assert loaded._snapshot_pending == {
+        ("us-east-1", "m5.large"),
+        ("us-east-1", "m5.xlarge"),
+        ("eu-west-1", "m5.large"),
+    }
+    for region, key, sku, price in (
+        ("us-east-1", "m5.large", "AAA", 0.096),
+        ("us-east-1", "m5.xlarge", "BBB", 0.192),
+        ("eu-west-1", "m5.large", "CCC", 0.107),
+    ):
+        (offer,) = loaded.get(region, key)
+        assert (offer.sku, offer.region, offer.unit) == (sku, region, "Hrs")
+        assert offer.attributes == offers.get(region, key)[0].attributes
+        assert not offer.terms.is_parsed
+        assert offer.price() == price
+        assert offer.price("Reserved", unit="Quantity") == 500.0
+        assert offer.prices == {"OnDemand": price, "Reserved": 0.0}
+
+
+def test_offers_outlive_the_mapping(offers, tmp_path):
+    """ Materialized offers parse their terms after the snapshot is closed """
+    path = tmp_path / "ec2.snap"
+    offers.save_snapshot(path)
+    with Snapshot(path) as snapshot:
+        materialized = snapshot.offers("us-east-1", "m5.xlarge")
+    assert materialized[0].price("Reserved", unit="Hrs") == 0.0
+
+
+def test_bad_magic(tmp_path):
+    """ Files which are not snapshots raise BotoRemoraSnapshotError """
+    path = tmp_path / "bad.snap"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(BotoRemoraSnapshotError):
+        Snapshot(path)
+
+
+def test_writing_keeps_terms_unparsed(offers, tmp_path):
+    """ Saving reads prices and terms from the raw terms without parsing them """
+    offers.save_snapshot(tmp_path / "ec2.snap")
+    assert not offers.get("us-east-1", "m5.xlarge")[0].terms.is_parsed
+    assert not offers.get("eu-west-1", "m5.large")[0].terms.is_parsed
+
+
+def test_failed_write_leaves_no_file(offers, tmp_path, monkeypatch):
+    """ A failing write removes its temporary file and keeps the previous snapshot """
+    path = tmp_path / "ec2.snap"
+    offers.save_snapshot(path)
+    previous = path.read_bytes()
+
+    def fail(*args):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(snapshot_module.os, "replace", fail)
+    with pytest.raises(OSError):
+        offers.save_snapshot(path)
+    assert [path_.name for path_ in tmp_path.iterdir()] == ["ec2.snap"]
+    assert path.read_bytes() == previous
@@ -0,0 +1,82 @@
+""" boto_remora.pricing.table """
+import math
+
+import pytest
+
+from boto_remora.pricing.main import Offer
+
+
+table = pytest.importorskip("boto_remora.pricing.table")  # pylint: disable=invalid-name
+
+
+def _offer(sku, region, instance_type, os_name, prices):
+    return Offer(
+        unit="Hrs",
+        description=sku,
+        attributes={"instanceType": instance_type, "operatingSystem": os_name},
+        region=region,
+        prices=prices,
+        sku=sku,
+    )
+
+
+@pytest.fixture(name="offers")
+def fixture_offers():
+    """ Table of five instances in two regions, one without a Reserved price """
+    return table.OfferTable.from_offers(
+        [
+            _offer("A", "us-east-1", "m5.large", "Linux", {"OnDemand": 0.096, "Reserved": 0.06}),
+            _offer("B", "us-east-1", "m5.xlarge", "Linux", {"OnDemand": 0.192, "Reserved": 0.12}),
+            _offer("C", "us-east-1", "m5.large", "Windows", {"OnDemand": 0.188}),
+            _offer("D", "eu-west-1", "m5.large", "Linux", {"OnDemand": 0.107, "Reserved": 0.07}),
+            _offer(
+                "E", "eu-west-1", "m5.xlarge", "Windows", {"OnDemand": 0.398, "Reserved": 0.3}
+            ),
+        ]
+    )
+
+
+def test_filter(offers):
+    """ Filters match any of several values, unknown attributes or values nothing """
+    assert offers.filter({"operatingSystem": "Linux"}).column("sku") == ["A", "B", "D"]
+    linux = offers.filter({"operatingSystem": "Linux"})
+    assert linux.filter({"instanceType": "m5.large"}).column("sku") == ["A", "D"]
+    assert offers.filter(region="eu-west-1").column("sku") == ["D", "E"]
+    assert offers.filter(
+        {"instanceType": ["m5.xlarge", "m7.huge"]}, region=["us-east-1", "eu-west-1"]
+    ).column("sku") == ["B", "E"]
+    assert not offers.filter({"tenancy": "Shared"})
+    assert not offers.filter({"operatingSystem": "RHEL"})
+    assert len(offers) == 5
+
+
+def test_prices(offers):
+    """ Prices of the selection, NaN where an offer has no price of the type """
+    us_east = offers.filter(region="us-east-1")
+    assert us_east.price().tolist() == [0.096, 0.192, 0.188]
+    reserved = us_east.price("Reserved")
+    assert reserved[:2].tolist() == [0.06, 0.12]
+    assert math.isnan(reserved[2])
+    assert all(math.isnan(price_) for price_ in offers.price("Spot"))
+    assert offers.percentile(50) == pytest.approx(0.188)
+    assert offers.group_by_region() == {"us-east-1": 0.096, "eu-west-1": 0.107}
+    assert offers.group_by_region("Reserved", "count") == {"us-east-1": 2, "eu-west-1": 2}
+    assert offers.group_by_region("Reserved", "mean") == pytest.approx(
+        {"us-east-1": 0.09, "eu-west-1": 0.185}
+    )
+    with pytest.raises(ValueError):
+        offers.group_by_region(agg="median")
+
+
+def test_cheapest_builds_offers(offers):
+    """ Offers of the cheapest rows are rebuilt with their attributes and prices """
+    assert [offer_.sku for offer_ in offers.cheapest(3)] == ["A", "D", "C"]
+    assert [offer_.sku for offer_ in offers.cheapest(9, "Reserved")] == ["A", "D", "B", "E"]
+    windows = offers.filter({"operatingSystem": "Windows"})
+    (offer,) = windows.cheapest()
+    assert offer == _offer("C", "us-east-1", "m5.large", "Windows", {"OnDemand": 0.188})
+    assert offer.prices == {"OnDemand": 0.188}
+    assert windows[-1].sku == "E"
+    assert [offer_.region for offer_ in windows] == ["us-east-1", "eu-west-1"]
+    with pytest.raises(IndexError):
+        windows[2]  # pylint: disable=pointless-statement